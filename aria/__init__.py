@@ -77,6 +77,7 @@ def application_model_storage(api, api_kwargs=None):
 
         storage.model.Execution,
         storage.model.Task,
+        storage.model.TaskDurationStatistics,
     ]
     # if api not in _model_storage:
     return storage.ModelStorage(api, items=models, api_kwargs=api_kwargs or {})
@@ -70,6 +70,7 @@ def config_parser(parser=None):
     add_parse_parser(sub_parser)
     add_workflow_parser(sub_parser)
     add_spec_parser(sub_parser)
+    add_task_stats_parser(sub_parser)
     add_csar_create_parser(sub_parser)
     add_csar_open_parser(sub_parser)
     add_csar_validate_parser(sub_parser)
@@ -111,6 +112,20 @@ def add_parse_parser(parse):
     parse.add_argument(
         '--prefix', nargs='*',
         help='prefixes for imports')
+    parse.add_argument(
+        '--reading-cache',
+        help='directory for caching read documents (e.g. imported profiles) between runs')
+    parse.add_argument(
+        '--resolution-cache',
+        help='file for caching where imported URIs were found between runs')
+    parse.add_argument(
+        '--request-cache',
+        help='directory for caching remote documents (defaults to aria-<user>-requests in the '
+             'temporary directory, private to the current user)')
+    parse.add_argument(
+        '--offline',
+        action='store_true',
+        help='load remote documents only from the request cache')
     parse.add_flag_argument(
         'debug',
         help_true='print debug info',
@@ -228,6 +243,10 @@ def add_csar_create_parser(parse):
         '-d', '--destination',
         help='Output CSAR zip destination',
         required=True)
+    parse.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='Number of processes compressing files (defaults to the number of CPUs)')
 
 
 @sub_parser_decorator(
@@ -266,3 +285,29 @@ def add_spec_parser(spec):
         '--csv',
         action='store_true',
         help='output as CSV')
+
+
+@sub_parser_decorator(
+    name='task-stats',
+    help='Show task duration statistics',
+    formatter_class=SmartFormatter)
+def add_task_stats_parser(task_stats):
+    """
+    ``task-stats`` command parser configuration
+    """
+    task_stats.add_argument(
+        'storage_path',
+        help='Path to the Sqlite storage file')
+    task_stats.add_argument(
+        '-o', '--operation',
+        help='Only show statistics for this operation')
+    task_stats.add_argument(
+        '-t', '--node-type',
+        help='Only show statistics for this node type')
+    task_stats.add_argument(
+        '--plugin',
+        help='Only show statistics for this plugin')
+    task_stats.add_argument(
+        '--csv',
+        action='store_true',
+        help='output as CSV')
@@ -37,6 +37,7 @@ from .commands import (
     CSAROpenCommand,
     CSARValidateCommand,
     SpecCommand,
+    TaskStatsCommand,
 )
 
 __version__ = '0.1.0'
@@ -58,6 +59,7 @@ class AriaCli(LoggerMixin):
             'csar-open': CSAROpenCommand.with_logger(base_logger=self.logger),
             'csar-validate': CSARValidateCommand.with_logger(base_logger=self.logger),
             'spec': SpecCommand.with_logger(base_logger=self.logger),
+            'task-stats': TaskStatsCommand.with_logger(base_logger=self.logger),
         }
 
     def __enter__(self):
@@ -21,14 +21,13 @@ import json
 import os
 import sys
 import csv
-import shutil
-import tempfile
 from glob import glob
 from importlib import import_module
 
 from ruamel import yaml # @UnresolvedImport
+from sqlalchemy import (create_engine, orm) # @UnresolvedImport
 
-from .. import extension
+from .. import (extension, application_model_storage)
 from ..logger import LoggerMixin
 from ..parser import iter_specifications
 from ..parser.consumption import (
@@ -41,7 +40,8 @@ from ..parser.consumption import (
     Inputs,
     Instance
 )
-from ..parser.loading import LiteralLocation, UriLocation
+from ..parser.loading import UriLocation, UriResolutionCache, RequestSession, CsarLoaderSource
+from ..parser.reading import ReadingCache
 from ..parser.modeling import initialize_storage
 from ..utils.application import StorageManager
 from ..utils.caching import cachedmethod
@@ -51,6 +51,8 @@ from ..utils.collections import OrderedDict
 from ..orchestrator import WORKFLOW_DECORATOR_RESERVED_ARGUMENTS
 from ..orchestrator.runner import Runner
 from ..orchestrator.workflows.builtin import BUILTIN_WORKFLOWS
+from ..orchestrator.workflows.core.statistics import (DurationEstimator, get_statistics)
+from ..storage.sql_mapi import SQLAlchemyModelAPI
 
 from .exceptions import (
     AriaCliFormatInputsError,
@@ -172,6 +174,11 @@ class ParseCommand(BaseCommand):
             dumper = consumer.consumers[-1]
 
         consumer.consume()
+        context.loading.resolution_cache.save()
+        if args_namespace.debug:
+            self.logger.debug('Local documents: {0}'.format(context.loading.metrics))
+            self.logger.debug('Remote documents: {0}'.format(
+                context.loading.request_session.metrics))
 
         if not context.validation.dump_issues():
             dumper.dump()
@@ -190,10 +197,21 @@ class ParseCommand(BaseCommand):
                        presenter_source,
                        presenter,
                        debug,
+                       reading_cache=None,
+                       resolution_cache=None,
+                       request_cache=None,
+                       offline=False,
                        **kwargs):
         context = ConsumptionContext()
         context.loading.loader_source = import_fullname(loader_source)()
         context.reading.reader_source = import_fullname(reader_source)()
+        if reading_cache:
+            context.reading.cache = ReadingCache(reading_cache)
+        if resolution_cache:
+            context.loading.resolution_cache = UriResolutionCache(resolution_cache)
+        if request_cache or offline:
+            context.loading.request_session = RequestSession(cache_directory=request_cache,
+                                                             offline=offline)
         context.presentation.location = UriLocation(uri) if isinstance(uri, basestring) else uri
         context.presentation.presenter_source = import_fullname(presenter_source)()
         context.presentation.presenter_class = import_fullname(presenter)
@@ -394,7 +412,8 @@ class ExecuteCommand(BaseCommand):
         executor = ProcessExecutor()
         workflow_engine = Engine(executor=executor,
                                  workflow_context=workflow_context,
-                                 tasks_graph=tasks_graph)
+                                 tasks_graph=tasks_graph,
+                                 duration_estimator=DurationEstimator(model_storage))
         workflow_engine.execute()
         executor.close()
 
@@ -453,8 +472,9 @@ class BaseCSARCommand(BaseCommand):
     @staticmethod
     def _parse_and_dump(reader):
         context = ConsumptionContext()
-        context.loading.prefixes += [os.path.join(reader.destination, 'definitions')]
-        context.presentation.location = LiteralLocation(reader.entry_definitions_yaml)
+        context.loading.loader_source = CsarLoaderSource(reader.archive,
+                                                         prefixes=('', 'definitions'))
+        context.presentation.location = UriLocation(reader.entry_definitions_uri)
         chain = ConsumerChain(context, (Read, Validate, Model, Instance))
         chain.consume()
         if context.validation.dump_issues():
@@ -462,28 +482,30 @@ class BaseCSARCommand(BaseCommand):
         dumper = chain.consumers[-1]
         dumper.dump()
 
-    def _read(self, source, destination):
+    def _read(self, source, destination, verify=False):
         reader = csar.read(
             source=source,
             destination=destination,
-            logger=self.logger)
-        self.logger.info(
-            'Path: {r.destination}\n'
-            'TOSCA meta file version: {r.meta_file_version}\n'
-            'CSAR Version: {r.csar_version}\n'
-            'Created By: {r.created_by}\n'
-            'Entry definitions: {r.entry_definitions}'
-            .format(r=reader))
-        self._parse_and_dump(reader)
-
-    def _validate(self, source):
-        workdir = tempfile.mkdtemp()
+            logger=self.logger,
+            verify=verify)
         try:
-            self._read(
-                source=source,
-                destination=workdir)
+            self.logger.info(
+                'Path: {path}\n'
+                'TOSCA meta file version: {r.meta_file_version}\n'
+                'CSAR Version: {r.csar_version}\n'
+                'Created By: {r.created_by}\n'
+                'Entry definitions: {r.entry_definitions}'
+                .format(path=reader.destination or reader.source, r=reader))
+            self._parse_and_dump(reader)
         finally:
-            shutil.rmtree(workdir, ignore_errors=True)
+            reader.close()
+
+    def _validate(self, source, verify=False):
+        # The CSAR is parsed straight from the archive, without extracting it
+        self._read(
+            source=source,
+            destination=None,
+            verify=verify)
 
 
 class CSARCreateCommand(BaseCSARCommand):
@@ -493,7 +515,8 @@ class CSARCreateCommand(BaseCSARCommand):
             source=args_namespace.source,
             entry=args_namespace.entry,
             destination=args_namespace.destination,
-            logger=self.logger)
+            logger=self.logger,
+            jobs=args_namespace.jobs)
         self._validate(args_namespace.destination)
 
 
@@ -508,7 +531,7 @@ class CSAROpenCommand(BaseCSARCommand):
 class CSARValidateCommand(BaseCSARCommand):
     def __call__(self, args_namespace, unknown_args):
         super(CSARValidateCommand, self).__call__(args_namespace, unknown_args)
-        self._validate(args_namespace.source)
+        self._validate(args_namespace.source, verify=True)
 
 
 class SpecCommand(BaseCommand):
@@ -543,3 +566,55 @@ class SpecCommand(BaseCommand):
                         with indent(2):
                             for k, v in details.iteritems():
                                 puts('%s: %s' % (Colored.magenta(k), v))
+
+
+class TaskStatsCommand(BaseCommand):
+    """
+    :code:`task-stats` command.
+
+    Emits the task duration statistics gathered in a storage, in human-readable or CSV format.
+    """
+
+    PERCENTILES = (50, 95)
+
+    def __call__(self, args_namespace, unknown_args):
+        super(TaskStatsCommand, self).__call__(args_namespace, unknown_args)
+
+        storage_path = os.path.abspath(args_namespace.storage_path)
+        # sqlite would create an empty database for a missing file
+        if not os.path.isfile(storage_path):
+            raise ValueError('{0} does not exist. Please specify a valid storage path.'
+                             .format(storage_path))
+        sqlite_engine = create_engine('sqlite:///{0}'.format(storage_path))
+        model_storage = application_model_storage(
+            SQLAlchemyModelAPI,
+            api_kwargs=dict(engine=sqlite_engine, session=orm.sessionmaker(bind=sqlite_engine)()))
+        all_statistics = get_statistics(model_storage,
+                                        operation_name=args_namespace.operation,
+                                        node_type=args_namespace.node_type,
+                                        plugin_name=args_namespace.plugin)
+
+        if args_namespace.csv:
+            writer = csv.writer(sys.stdout, quoting=csv.QUOTE_ALL)
+            writer.writerow(('Operation', 'Node type', 'Plugin', 'Count', 'Mean') +
+                            tuple('P{0}'.format(percent) for percent in self.PERCENTILES) +
+                            ('Max',))
+            for statistics in all_statistics:
+                writer.writerow(
+                    (statistics.name, statistics.node_type, statistics.plugin_name,
+                     statistics.count, statistics.mean) +
+                    tuple(statistics.percentile(percent) for percent in self.PERCENTILES) +
+                    (statistics.max_duration,))
+
+        else:
+            for statistics in all_statistics:
+                puts(Colored.cyan(statistics.name))
+                with indent(2):
+                    puts('%s: %s' % (Colored.magenta('node type'), statistics.node_type))
+                    puts('%s: %s' % (Colored.magenta('plugin'), statistics.plugin_name))
+                    puts('%s: %d' % (Colored.magenta('count'), statistics.count))
+                    puts('%s: %.2fs' % (Colored.magenta('mean'), statistics.mean))
+                    for percent in self.PERCENTILES:
+                        puts('%s: %.2fs' % (Colored.magenta('p%d' % percent),
+                                            statistics.percentile(percent)))
+                    puts('%s: %.2fs' % (Colored.magenta('max'), statistics.max_duration))
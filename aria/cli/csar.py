@@ -14,13 +14,21 @@
 # limitations under the License.
 
 import os
+import zlib
+import time
+import shutil
 import pprint
+import hashlib
 import tempfile
 import zipfile
+import itertools
+import multiprocessing
 
 import requests
 from ruamel import yaml # @UnresolvedImport
 
+from ..parser.loading import ZipArchive
+
 
 META_FILE = 'TOSCA-Metadata/TOSCA.meta'
 META_FILE_VERSION_KEY = 'TOSCA-Meta-File-Version'
@@ -30,14 +38,22 @@ META_CSAR_VERSION_VALUE = '1.1'
 META_CREATED_BY_KEY = 'Created-By'
 META_CREATED_BY_VALUE = 'ARIA'
 META_ENTRY_DEFINITIONS_KEY = 'Entry-Definitions'
+# SHA-256 digests of the other members, one "<digest>  <member>" line each (like sha256sum)
+DIGESTS_FILE = 'TOSCA-Metadata/SHA-256-Digests.txt'
 BASE_METADATA = {
     META_FILE_VERSION_KEY: META_FILE_VERSION_VALUE,
     META_CSAR_VERSION_KEY: META_CSAR_VERSION_VALUE,
     META_CREATED_BY_KEY: META_CREATED_BY_VALUE,
 }
 
+# Already compressed formats, which are stored as is
+INCOMPRESSIBLE_EXTENSIONS = frozenset((
+    '.gz', '.tgz', '.bz2', '.xz', '.zip', '.jar', '.war', '.whl', '.csar', '.rpm', '.deb',
+    '.qcow2', '.vmdk', '.iso', '.png', '.jpg', '.jpeg', '.gif'))
+CHUNK_SIZE = 1024 * 1024
+
 
-def write(source, entry, destination, logger):
+def write(source, entry, destination, logger, jobs=None):
     source = os.path.expanduser(source)
     destination = os.path.expanduser(destination)
     entry_definitions = os.path.join(source, entry)
@@ -54,49 +70,152 @@ def write(source, entry, destination, logger):
     if os.path.exists(meta_file):
         raise ValueError('{0} already exists. This commands generates a meta file for you. Please '
                          'remove the existing metafile.'.format(meta_file))
+    if os.path.exists(os.path.join(source, DIGESTS_FILE)):
+        raise ValueError('{0} already exists. This commands generates a digests file for you. '
+                         'Please remove the existing digests file.'
+                         .format(os.path.join(source, DIGESTS_FILE)))
     metadata = BASE_METADATA.copy()
     metadata[META_ENTRY_DEFINITIONS_KEY] = entry
+
     logger.debug('Compressing root directory to ZIP')
-    with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as f:
-        for root, _, files in os.walk(source):
-            for file in files:
-                file_full_path = os.path.join(root, file)
-                file_relative_path = os.path.relpath(file_full_path, source)
-                logger.debug('Writing to archive: {0}'.format(file_relative_path))
-                f.write(file_full_path, file_relative_path)
-        logger.debug('Writing new metadata file to {0}'.format(META_FILE))
-        f.writestr(META_FILE, yaml.dump(metadata, default_flow_style=False))
+    members = _get_members(source)
+    work_dir = tempfile.mkdtemp()
+    pool = multiprocessing.Pool(jobs) if jobs != 1 else None
+    try:
+        prepared = (pool.imap if pool is not None else itertools.imap)(
+            _prepare_member, [(path, compress, work_dir) for path, _, compress in members])
+        digests = []
+        with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as f:
+            for (path, arcname, _), member in itertools.izip(members, prepared):
+                logger.debug('Writing to archive: {0}'.format(arcname))
+                zinfo = _write_member(f, path, arcname, member)
+                digests.append('{0}  {1}\n'.format(member[3], zinfo.filename))
+            logger.debug('Writing digests file to {0}'.format(DIGESTS_FILE))
+            f.writestr(DIGESTS_FILE, ''.join(digests))
+            logger.debug('Writing new metadata file to {0}'.format(META_FILE))
+            f.writestr(META_FILE, yaml.dump(metadata, default_flow_style=False))
+    finally:
+        if pool is not None:
+            pool.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _get_members(source):
+    members = []
+    for root, _, files in os.walk(source):
+        for file in files:
+            file_full_path = os.path.join(root, file)
+            file_relative_path = os.path.relpath(file_full_path, source)
+            compress = os.path.splitext(file)[1].lower() not in INCOMPRESSIBLE_EXTENSIONS
+            members.append((file_full_path, file_relative_path, compress))
+    return members
+
+
+def _prepare_member(args):
+    """
+    Reads a file once to compute its CRC and digest and, if it should be compressed, to compress
+    it into a temporary file. Runs in a worker process.
+    """
+
+    path, compress, work_dir = args
+    crc = 0
+    file_size = 0
+    digest = hashlib.sha256()
+    compressed_path = None
+    compressed = None
+    if compress:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        file_descriptor, compressed_path = tempfile.mkstemp(dir=work_dir)
+        compressed = os.fdopen(file_descriptor, 'wb')
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                digest.update(chunk)
+                if compressed is not None:
+                    compressed.write(compressor.compress(chunk))
+        if compressed is not None:
+            compressed.write(compressor.flush())
+    finally:
+        if compressed is not None:
+            compressed.close()
+    return crc & 0xffffffff, file_size, compressed_path, digest.hexdigest()
+
+
+def _write_member(zip_file, path, arcname, member):  # pylint: disable=protected-access
+    """
+    Streams a member prepared by :func:`_prepare_member` into the archive.
+
+    :code:`ZipFile.write` would compress the file again, so this does what it does with the
+    already known CRC and sizes, including its checks and bookkeeping.
+    """
+
+    crc, file_size, compressed_path, _ = member
+    stat = os.stat(path)
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(stat.st_mtime)[0:6])
+    if zinfo.filename in zip_file.NameToInfo:
+        raise ValueError('{0} is already in the archive.'.format(zinfo.filename))
+    zinfo.external_attr = (stat.st_mode & 0xFFFF) << 16L
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    if compressed_path is not None:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.compress_size = os.path.getsize(compressed_path)
+    else:
+        zinfo.compress_type = zipfile.ZIP_STORED
+        zinfo.compress_size = file_size
+    # A closed archive has no file, which _writecheck reports
+    zinfo.header_offset = zip_file.fp.tell() if zip_file.fp else 0
+    zip_file._writecheck(zinfo)
+    zip_file._didModify = True
+    zip_file.fp.write(zinfo.FileHeader())
+    with open(compressed_path or path, 'rb') as f:
+        shutil.copyfileobj(f, zip_file.fp, CHUNK_SIZE)
+    if compressed_path is not None:
+        os.remove(compressed_path)
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+    return zinfo
 
 
 class _CSARReader(object):
 
-    def __init__(self, source, destination, logger):
+    def __init__(self, source, destination, logger, verify=False):
         self.logger = logger
-        if os.path.isdir(destination) and os.listdir(destination):
-            raise ValueError('{0} already exists and is not empty. '
-                             'Please specify the location where the CSAR '
-                             'should be extracted.'.format(destination))
-        downloaded_csar = '://' in source
-        if downloaded_csar:
-            file_descriptor, download_target = tempfile.mkstemp()
+        if destination is not None:
+            destination = os.path.expanduser(destination)
+            if os.path.isdir(destination) and os.listdir(destination):
+                raise ValueError('{0} already exists and is not empty. '
+                                 'Please specify the location where the CSAR '
+                                 'should be extracted.'.format(destination))
+        self._download_target = None
+        if '://' in source:
+            # Zip archives require random access, so remote CSARs are downloaded
+            file_descriptor, self._download_target = tempfile.mkstemp()
             os.close(file_descriptor)
-            self._download(source, download_target)
-            source = download_target
+            self._download(source, self._download_target)
+            source = self._download_target
         self.source = os.path.expanduser(source)
-        self.destination = os.path.expanduser(destination)
+        self.destination = destination
         self.metadata = {}
+        self.archive = None
         try:
             if not os.path.exists(self.source):
                 raise ValueError('{0} does not exists. Please specify a valid CSAR path.'
                                  .format(self.source))
             if not zipfile.is_zipfile(self.source):
                 raise ValueError('{0} is not a valid CSAR.'.format(self.source))
-            self._extract()
+            self.archive = ZipArchive(self.source)
             self._read_metadata()
             self._validate()
-        finally:
-            if downloaded_csar:
-                os.remove(self.source)
+            if verify:
+                self._verify()
+            if self.destination is not None:
+                self._extract()
+        except BaseException:
+            self.close()
+            raise
 
     @property
     def created_by(self):
@@ -114,27 +233,34 @@ class _CSARReader(object):
     def entry_definitions(self):
         return self.metadata.get(META_ENTRY_DEFINITIONS_KEY)
 
+    @property
+    def entry_definitions_uri(self):
+        return self.archive.get_uri(self.entry_definitions)
+
     @property
     def entry_definitions_yaml(self):
-        with open(os.path.join(self.destination, self.entry_definitions)) as f:
-            return yaml.load(f)
+        return yaml.load(self.archive.read(self.entry_definitions))
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+        if self._download_target is not None:
+            os.remove(self._download_target)
+            self._download_target = None
 
     def _extract(self):
         self.logger.debug('Extracting CSAR contents')
         if not os.path.exists(self.destination):
             os.mkdir(self.destination)
-        with zipfile.ZipFile(self.source) as f:
-            f.extractall(self.destination)
+        self.archive.extract(self.destination)
         self.logger.debug('CSAR contents successfully extracted')
 
     def _read_metadata(self):
-        csar_metafile = os.path.join(self.destination, META_FILE)
-        if not os.path.exists(csar_metafile):
-            raise ValueError('Metadata file {0} is missing from the CSAR'.format(csar_metafile))
-        self.logger.debug('CSAR metadata file: {0}'.format(csar_metafile))
+        if META_FILE not in self.archive:
+            raise ValueError('Metadata file {0} is missing from the CSAR'.format(META_FILE))
+        self.logger.debug('CSAR metadata file: {0}'.format(META_FILE))
         self.logger.debug('Attempting to parse CSAR metadata YAML')
-        with open(csar_metafile) as f:
-            self.metadata.update(yaml.load(f))
+        self.metadata.update(yaml.load(self.archive.read(META_FILE)))
         self.logger.debug('CSAR metadata:\n{0}'.format(pprint.pformat(self.metadata)))
 
     def _validate(self):
@@ -150,10 +276,42 @@ class _CSARReader(object):
         validate_key(META_CREATED_BY_KEY)
         validate_key(META_ENTRY_DEFINITIONS_KEY)
         self.logger.debug('CSAR entry definitions: {0}'.format(self.entry_definitions))
-        entry_definitions_path = os.path.join(self.destination, self.entry_definitions)
-        if not os.path.isfile(entry_definitions_path):
+        if self.entry_definitions not in self.archive:
             raise ValueError('The entry definitions {0} referenced by the metadata file does not '
-                             'exist.'.format(entry_definitions_path))
+                             'exist.'.format(self.entry_definitions))
+
+    def _verify(self):
+        if DIGESTS_FILE not in self.archive:
+            self.logger.debug('No digests file in the CSAR, skipping integrity verification')
+            return
+        digests = {}
+        for line in self.archive.read(DIGESTS_FILE).splitlines():
+            expected, separator, name = line.partition('  ')
+            if not (separator and name and len(expected) == 64):
+                raise ValueError('{0} is malformed: {1!r}'.format(DIGESTS_FILE, line))
+            digests[name] = expected
+        unlisted = self.archive.names - set(digests) - set((META_FILE, DIGESTS_FILE))
+        if unlisted:
+            raise ValueError('{0} missing from the digests file.'
+                             .format(', '.join(sorted(unlisted))))
+        for name, expected in digests.iteritems():
+            if name not in self.archive:
+                raise ValueError('{0} is listed in the digests file but is missing from the '
+                                 'CSAR.'.format(name))
+            digest = hashlib.sha256()
+            try:
+                with self.archive.open(name) as member:
+                    while True:
+                        chunk = member.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+            except zipfile.BadZipfile as e:
+                raise ValueError('{0} is corrupt: {1}'.format(name, e))
+            if digest.hexdigest() != expected:
+                raise ValueError('{0} does not match its SHA-256 digest in the digests file.'
+                                 .format(name))
+        self.logger.debug('Verified the SHA-256 digests of {0} files'.format(len(digests)))
 
     def _download(self, url, target):
         response = requests.get(url, stream=True)
@@ -167,5 +325,5 @@ class _CSARReader(object):
                     f.write(chunk)
 
 
-def read(source, destination, logger):
-    return _CSARReader(source=source, destination=destination, logger=logger)
+def read(source, destination, logger, verify=False):
+    return _CSARReader(source=source, destination=destination, logger=logger, verify=verify)
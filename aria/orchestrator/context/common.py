@@ -17,10 +17,9 @@ A common context for both workflow and operation
 """
 from uuid import uuid4
 
-import jinja2
-
 from aria import logger
 from aria.storage import exceptions
+from aria.utils import templates
 
 
 class BaseContext(logger.LoggerMixin):
@@ -130,6 +129,16 @@ class BaseContext(logger.LoggerMixin):
         except exceptions.StorageError:
             return self.resource.blueprint.read(entry_id=str(self.blueprint.id), path=path)
 
+    def get_resource_stat(self, path=None):
+        """
+        Get the metadata of a deployment resource from the resource storage, without reading it
+        (see ResourceAPI.stat)
+        """
+        try:
+            return self.resource.deployment.stat(entry_id=str(self.deployment.id), path=path)
+        except exceptions.StorageError:
+            return self.resource.blueprint.stat(entry_id=str(self.blueprint.id), path=path)
+
     def get_resource_and_render(self, path=None, variables=None):
         """
         Read a deployment resource as string from the resource storage and render it as a jinja
@@ -143,5 +152,4 @@ class BaseContext(logger.LoggerMixin):
         variables = variables or {}
         if 'ctx' not in variables:
             variables['ctx'] = self
-        resource_template = jinja2.Template(resource_content)
-        return resource_template.render(variables)
+        return templates.template_cache.render(resource_content, variables)
@@ -0,0 +1,154 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-memory snapshot of a deployment's topology, used when building workflow graphs
+"""
+
+from collections import OrderedDict
+
+# the number of values in each ``IN`` filter, keeping queries within SQLite's limit on the number of
+# query parameters
+_MAX_FILTER_VALUES = 500
+
+
+class TopologySnapshot(object):
+    """
+    The nodes, node instances, relationships and relationship instances of a deployment, loaded in
+    a handful of queries and indexed by id.
+
+    Since all the models are loaded into the storage session, accessing their many-to-one
+    attributes (e.g. ``node_instance.node`` or ``relationship_instance.target_node_instance``)
+    doesn't require any further queries. Collections (e.g.
+    ``node_instance.outbound_relationship_instances``) are still loaded lazily by the models, so
+    use the snapshot's methods instead.
+
+    The snapshot isn't updated when the models change.
+    """
+
+    def __init__(self, nodes, node_instances, relationships, relationship_instances):
+        self.nodes = OrderedDict((node.id, node) for node in nodes)
+        self.node_instances = OrderedDict(
+            (node_instance.id, node_instance) for node_instance in node_instances)
+        self.relationships = OrderedDict(
+            (relationship.id, relationship) for relationship in relationships
+            if relationship.source_node_fk in self.nodes)
+        self.relationship_instances = OrderedDict(
+            (relationship_instance.id, relationship_instance)
+            for relationship_instance in relationship_instances
+            if relationship_instance.source_node_instance_fk in self.node_instances)
+
+        self._node_instances_by_node = _index(self.node_instances.itervalues(), 'node_fk')
+        # hosts are hosted on themselves
+        self._contained_node_instances = _index(
+            (node_instance for node_instance in self.node_instances.itervalues()
+             if node_instance.host_fk != node_instance.id),
+            'host_fk')
+        self._outbound_relationships = _index(
+            self.relationships.itervalues(), 'source_node_fk', 'source_position')
+        self._inbound_relationships = _index(
+            self.relationships.itervalues(), 'target_node_fk', 'target_position')
+        self._outbound_relationship_instances = _index(
+            self.relationship_instances.itervalues(), 'source_node_instance_fk', 'source_position')
+        self._inbound_relationship_instances = _index(
+            self.relationship_instances.itervalues(), 'target_node_instance_fk', 'target_position')
+
+    @classmethod
+    def load(cls, workflow_context):
+        """
+        Loads the topology of the workflow context's deployment
+        :param workflow_context: the workflow context
+        :return: the topology snapshot
+        :rtype: TopologySnapshot
+        """
+        model = workflow_context.model
+        nodes = list(workflow_context.nodes)
+        node_instances = list(workflow_context.node_instances)
+        # only the relationships (and relationship instances) of the deployment are loaded
+        return cls(nodes=nodes,
+                   node_instances=node_instances,
+                   relationships=_iter_in(model.relationship,
+                                          'source_node_fk',
+                                          [node.id for node in nodes]),
+                   relationship_instances=_iter_in(
+                       model.relationship_instance,
+                       'source_node_instance_fk',
+                       [node_instance.id for node_instance in node_instances]))
+
+    def node_instances_of(self, node_id):
+        """
+        :return: the node instances of the node
+        """
+        return self._node_instances_by_node.get(node_id, [])
+
+    def contained_node_instances(self, node_instance_id):
+        """
+        :return: the node instances which are directly hosted on the node instance
+        """
+        return self._contained_node_instances.get(node_instance_id, [])
+
+    def host_chain(self, node_instance_id):
+        """
+        :return: the node instance followed by its host, the host's host and so on
+        """
+        chain = []
+        while node_instance_id is not None and node_instance_id in self.node_instances:
+            node_instance = self.node_instances[node_instance_id]
+            chain.append(node_instance)
+            node_instance_id = (node_instance.host_fk
+                                if node_instance.host_fk != node_instance_id else None)
+        return chain
+
+    def outbound_relationships(self, node_id):
+        """
+        :return: the relationships whose source is the node, in order
+        """
+        return self._outbound_relationships.get(node_id, [])
+
+    def inbound_relationships(self, node_id):
+        """
+        :return: the relationships whose target is the node, in order
+        """
+        return self._inbound_relationships.get(node_id, [])
+
+    def outbound_relationship_instances(self, node_instance_id):
+        """
+        :return: the relationship instances whose source is the node instance, in order
+        """
+        return self._outbound_relationship_instances.get(node_instance_id, [])
+
+    def inbound_relationship_instances(self, node_instance_id):
+        """
+        :return: the relationship instances whose target is the node instance, in order
+        """
+        return self._inbound_relationship_instances.get(node_instance_id, [])
+
+
+def _iter_in(model_api, column, values):
+    for i in xrange(0, len(values), _MAX_FILTER_VALUES):
+        for model in model_api.iter(filters={column: values[i:i + _MAX_FILTER_VALUES]}):
+            yield model
+
+
+def _index(models, key, position=None):
+    index = {}
+    for model in models:
+        value = getattr(model, key)
+        if value is not None:
+            index.setdefault(value, []).append(model)
+    if position is not None:
+        for models_list in index.itervalues():
+            models_list.sort(key=lambda model: getattr(model, position))
+    return index
@@ -23,6 +23,7 @@ from datetime import datetime
 
 from .exceptions import ContextException
 from .common import BaseContext
+from .topology import TopologySnapshot
 
 
 class WorkflowContext(BaseContext):
@@ -36,6 +37,7 @@ class WorkflowContext(BaseContext):
                  task_max_attempts=1,
                  task_retry_interval=0,
                  task_ignore_failure=False,
+                 scheduling_policy=None,
                  *args, **kwargs):
         super(WorkflowContext, self).__init__(*args, **kwargs)
         self._workflow_name = workflow_name
@@ -43,9 +45,11 @@ class WorkflowContext(BaseContext):
         self._task_max_attempts = task_max_attempts
         self._task_retry_interval = task_retry_interval
         self._task_ignore_failure = task_ignore_failure
+        self.scheduling_policy = scheduling_policy
         # TODO: execution creation should happen somewhere else
         # should be moved there, when such logical place exists
         self._execution_id = self._create_execution() if execution_id is None else execution_id
+        self._topology = None
 
     def __repr__(self):
         return (
@@ -105,6 +109,16 @@ class WorkflowContext(BaseContext):
             }
         )
 
+    @property
+    def topology(self):
+        """
+        A snapshot of the deployment's topology, loaded on first access
+        :rtype: TopologySnapshot
+        """
+        if self._topology is None:
+            self._topology = TopologySnapshot.load(self)
+        return self._topology
+
 
 class _CurrentContext(threading.local):
     """
@@ -13,12 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import imp
 import json
+import marshal
 import os
+import stat
 import tempfile
+import threading
+import time
 
 import requests
 
+from aria.utils import file as file_utils
 from . import constants
 from . import exceptions
 
@@ -31,23 +38,277 @@ def download_script(ctx, script_path):
     split = script_path.split('://')
     schema = split[0]
     suffix = script_path.split('/')[-1]
-    file_descriptor, dest_script_path = tempfile.mkstemp(suffix='-{0}'.format(suffix))
-    os.close(file_descriptor)
-    try:
-        if schema in ['http', 'https']:
-            response = requests.get(script_path)
-            if response.status_code == 404:
-                ctx.task.abort('Failed to download script: {0} (status code: {1})'
-                               .format(script_path, response.status_code))
-            content = response.text
-            with open(dest_script_path, 'wb') as f:
-                f.write(content)
+    if schema in ['http', 'https']:
+        cached_script_path, headers = script_cache.lookup_url(script_path)
+        response = requests.get(script_path, headers=headers)
+        if response.status_code == 304:
+            if script_cache.touch(cached_script_path):
+                return cached_script_path
+            # the cached entry was evicted after we looked it up
+            response = requests.get(script_path, headers={})
+        if response.status_code == 404:
+            ctx.task.abort('Failed to download script: {0} (status code: {1})'
+                           .format(script_path, response.status_code))
+        return script_cache.put(name=suffix,
+                                content=response.content,
+                                url=script_path,
+                                response_headers=response.headers)
+    else:
+        try:
+            resource_stat = ctx.get_resource_stat(path=script_path)
+        except NotImplementedError:
+            # the resource storage can't tell whether the resource changed, so it is read every time
+            resource_stat = None
         else:
-            ctx.download_resource(destination=dest_script_path, path=script_path)
-    except:
-        os.remove(dest_script_path)
-        raise
-    return dest_script_path
+            cached_script_path = script_cache.lookup_resource(resource_stat)
+            if cached_script_path:
+                return cached_script_path
+        return script_cache.put(name=suffix,
+                                content=ctx.get_resource(path=script_path),
+                                resource_stat=resource_stat)
+
+
+class ScriptCache(object):
+    """
+    Content addressed, disk based cache for downloaded scripts.
+
+    Each script is stored once under ``<sha256 of its content>-<script name>``, so all operations
+    running the same script share a single file, even when they run in different processes.
+    Remote scripts are revalidated using their ``ETag``/``Last-Modified`` headers. Resource
+    scripts are reused as long as the metadata of the resource (see ``ResourceAPI.stat``) is
+    unchanged, so they are not read from the resource storage again.
+
+    The code compiled for python scripts may be stored next to their entries, so that it is
+    reused by all the processes running them.
+
+    Entries are written atomically and the least recently used entries are evicted once the
+    cache grows beyond ``max_size`` bytes, except for the entries used during the last
+    ``eviction_grace_period`` seconds, which may still be about to run. Cached paths are shared,
+    and are thus read only.
+
+    The cache directory must be private to the current user. Remote scripts are re-hashed before
+    they are reused, so a tampered entry is never run; resource scripts are only checked for
+    their size and read only mode, and are re-hashed once the metadata of the resource changes.
+    """
+
+    def __init__(self, directory, max_size,
+                 eviction_grace_period=constants.SCRIPT_CACHE_EVICTION_GRACE_PERIOD):
+        self.directory = directory
+        self.max_size = max_size
+        self.eviction_grace_period = eviction_grace_period
+        self._lock = threading.Lock()
+        self._directory_verified = False
+
+    def put(self, name, content, url=None, response_headers=None, resource_stat=None):
+        """
+        Stores a script in the cache (unless it is already there) and returns its path.
+
+        :param name: the script file name
+        :param content: the script content
+        :param url: the url the script was downloaded from, if it is a remote script
+        :param response_headers: the headers of the response the script was downloaded with
+        :param resource_stat: the metadata of the resource the script was read from, if it is a
+         resource script
+        """
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        entry_name = '{0}-{1}'.format(hashlib.sha256(content).hexdigest(), name)
+        path = os.path.join(self.directory, entry_name)
+        self._ensure_directory()
+        if not self._verify(path):
+            self._write(path, content, mode=0555)
+            self._evict(keep=path)
+        if url:
+            response_headers = response_headers or {}
+            self._write(self._metadata_path(url), json.dumps({
+                'path': path,
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified')
+            }))
+        if resource_stat:
+            location, modified_at, size = resource_stat
+            self._write(self._metadata_path(location), json.dumps({
+                'path': path,
+                'modified_at': modified_at,
+                'size': size,
+                'entry_size': len(content)
+            }))
+        return path
+
+    def lookup_url(self, url):
+        """
+        Returns the cached path of a remote script along with the headers required to revalidate
+        it with a conditional request, or ``(None, {})`` if the script is not cached.
+        """
+        metadata = self._read_metadata(self._metadata_path(url))
+        headers = {}
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+        path = metadata.get('path')
+        if not headers or not self._in_directory(path) or not self._verify(path):
+            return None, {}
+        return path, headers
+
+    def lookup_resource(self, resource_stat):
+        """
+        Returns the cached path of a resource script if the metadata of the resource is unchanged
+        since it was cached, otherwise None. Only the entry's size and mode are checked.
+
+        :param resource_stat: the current metadata of the resource (see ``ResourceAPI.stat``)
+        """
+        location, modified_at, size = resource_stat
+        metadata = self._read_metadata(self._metadata_path(location))
+        path = metadata.get('path')
+        if metadata.get('modified_at') != modified_at or metadata.get('size') != size or \
+                not self._in_directory(path):
+            return None
+        try:
+            entry_stat = os.stat(path)
+        except OSError:
+            return None
+        if entry_stat.st_size != metadata.get('entry_size') or \
+                entry_stat.st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH) or \
+                not self.touch(path):
+            return None
+        return path
+
+    def get_code(self, path, digest):
+        """
+        Returns the code compiled for a script entry (see ``put_code``), or None if there is none.
+
+        :param path: the path of the script entry
+        :param digest: the sha256 of the script content, as it was read to be run
+        """
+        code_path = self._code_path(path, digest)
+        if code_path is None:
+            return None
+        try:
+            with open(code_path, 'rb') as f:
+                code = marshal.load(f)
+        except (IOError, EOFError, ValueError, TypeError):
+            return None
+        self.touch(code_path)
+        return code
+
+    def put_code(self, path, digest, code):
+        """
+        Stores the code compiled for a script entry. Nothing is stored for scripts which are not
+        entries of this cache.
+
+        :param path: the path of the script entry
+        :param digest: the sha256 of the script content the code was compiled from
+        :param code: the code object
+        """
+        code_path = self._code_path(path, digest)
+        if code_path is not None:
+            self._write(code_path, marshal.dumps(code))
+
+    @staticmethod
+    def touch(path):
+        """
+        Marks a cache entry as recently used. Returns False if the entry does not exist.
+        """
+        try:
+            os.utime(path, None)
+            return True
+        except (OSError, TypeError):
+            return False
+
+    def _ensure_directory(self):
+        if not self._directory_verified:
+            file_utils.make_private_dirs(self.directory)
+            self._directory_verified = True
+
+    def _verify(self, path):
+        """
+        Makes sure a script entry exists and that its content matches the digest in its name, and
+        marks it as recently used.
+        """
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except IOError:
+            return False
+        digest = os.path.basename(path).split('-', 1)[0]
+        return hashlib.sha256(content).hexdigest() == digest and self.touch(path)
+
+    def _code_path(self, path, digest):
+        # the content of an entry is known from its name, so the code compiled for it can be
+        # reused as is (as long as it was compiled by the same python version)
+        if not self._in_directory(path) or not os.path.basename(path).startswith(digest + '-'):
+            return None
+        return '{0}.{1}.code'.format(path, imp.get_magic().encode('hex'))
+
+    def _in_directory(self, path):
+        return bool(path) and os.path.dirname(path) == self.directory
+
+    def _read_metadata(self, metadata_path):
+        self._ensure_directory()
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except (IOError, ValueError):
+            return {}
+        return metadata if isinstance(metadata, dict) else {}
+
+    def _metadata_path(self, key):
+        if isinstance(key, unicode):
+            key = key.encode('utf-8')
+        return os.path.join(self.directory, '{0}.json'.format(hashlib.sha256(key).hexdigest()))
+
+    def _write(self, path, content, mode=None):
+        self._ensure_directory()
+        # writing to a temporary file and renaming it makes concurrent writers (threads or
+        # processes) safe, as readers only ever see complete files
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as f:
+                f.write(content)
+            if mode is not None:
+                os.chmod(temp_path, mode)
+            try:
+                os.rename(temp_path, path)
+            except OSError:
+                # on windows, renaming fails if the destination exists
+                if not os.path.exists(path):
+                    raise
+                os.remove(temp_path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _evict(self, keep):
+        with self._lock:
+            # entries used recently may have just been handed out (possibly to other processes)
+            # and not opened yet, so they are kept even when the cache is too large
+            used_before = time.time() - self.eviction_grace_period
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.startswith('.tmp-') or name.endswith('.json') or path == keep:
+                    continue
+                try:
+                    entry_stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, path))
+            size = sum(entry[1] for entry in entries) + os.path.getsize(keep)
+            for used_at, entry_size, path in sorted(entries):
+                if size <= self.max_size or used_at >= used_before:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # another process may have evicted it already
+                    pass
+                size -= entry_size
+
+
+script_cache = ScriptCache(directory=constants.DEFAULT_SCRIPT_CACHE_DIR,
+                           max_size=constants.DEFAULT_SCRIPT_CACHE_MAX_SIZE)
 
 
 def create_process_config(script_path, process, operation_kwargs, quote_json_env_vars=False):
@@ -13,24 +13,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from aria.utils import file as file_utils
 from . import exceptions
 
 # related to local
 PYTHON_SCRIPT_FILE_EXTENSION = '.py'
 POWERSHELL_SCRIPT_FILE_EXTENSION = '.ps1'
 DEFAULT_POWERSHELL_EXECUTABLE = 'powershell'
+COMPILED_SCRIPTS_CACHE_CAPACITY = 100
 
 # related to both local and ssh
 ILLEGAL_CTX_OPERATION_MESSAGE = 'ctx may only abort or retry once'
+DEFAULT_SCRIPT_CACHE_DIR = file_utils.get_user_cache_dir('script-cache')
+DEFAULT_SCRIPT_CACHE_MAX_SIZE = 100 * 1024 * 1024
+# seconds during which a script cache entry which was just handed out is not evicted
+SCRIPT_CACHE_EVICTION_GRACE_PERIOD = 60
 
 # related to ssh
 DEFAULT_BASE_DIR = '/tmp/aria-ctx'
+SSH_CONNECTION_IDLE_TIMEOUT = 60
 FABRIC_ENV_DEFAULTS = {
     'connection_attempts': 5,
     'timeout': 10,
     'forward_agent': False,
     'abort_on_prompts': True,
-    'keepalive': 0,
+    'keepalive': 15,
     'linewise': False,
     'pool_size': 0,
     'skip_bad_hosts': False,
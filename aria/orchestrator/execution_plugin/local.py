@@ -13,11 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import os
 import subprocess
 import threading
 import StringIO
 
+from aria.utils import caching
+
 from . import ctx_proxy
 from . import exceptions
 from . import common
@@ -25,6 +28,9 @@ from . import constants
 from . import environment_globals
 from . import python_script_scope
 
+# compiled code objects of python scripts, keyed by the script's path and the hash of its content
+_compiled_scripts = caching.LRUCache(constants.COMPILED_SCRIPTS_CACHE_CAPACITY)
+
 
 def run_script(ctx, script_path, process, **kwargs):
     if not script_path:
@@ -61,12 +67,39 @@ def _treat_script_as_powershell_script(script_path):
 
 
 def _eval_script_func(script_path, ctx, operation_kwargs, **_):
+    code = _compile_script(script_path)
+    initial_globals = environment_globals.create_initial_globals(script_path)
     with python_script_scope(operation_ctx=ctx, operation_inputs=operation_kwargs):
-        execfile(script_path, environment_globals.create_initial_globals(script_path))
+        exec code in initial_globals  # pylint: disable=exec-used
+
+
+def _compile_script(script_path):
+    """
+    Compiles a python script, reusing the code compiled for it as long as its content is unchanged.
+
+    Compiled code is kept in memory, keyed by the script's path as well as its content, so that
+    tracebacks always name the script that is actually running. The code of scripts from the
+    script cache is also stored in the cache, so that it is reused by other processes too (e.g. the
+    process executor runs each task in a new process).
+    """
+    with open(script_path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    key = (script_path, digest)
+    code = _compiled_scripts.get(key)
+    if code is None:
+        code = common.script_cache.get_code(script_path, digest)
+        if code is None:
+            code = compile(source, script_path, 'exec')
+            common.script_cache.put_code(script_path, digest, code)
+        _compiled_scripts[key] = code
+    return code
 
 
 def _execute_func(script_path, ctx, process, operation_kwargs):
-    os.chmod(script_path, 0755)
+    # cached scripts are shared between operations and are already executable
+    if not os.access(script_path, os.X_OK):
+        os.chmod(script_path, 0755)
     process = common.create_process_config(
         script_path=script_path,
         process=process,
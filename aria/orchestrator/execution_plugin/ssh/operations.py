@@ -13,27 +13,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
+import io
 import os
 import random
 import string
+import tarfile
 import tempfile
+import time
 import StringIO
 
 import fabric.api
 import fabric.context_managers
-import fabric.contrib.files
 
+from aria.orchestrator import events
 from .. import constants
 from .. import exceptions
 from .. import common
 from .. import ctx_proxy
 from . import tunnel
+from . import pool
 
 
 _PROXY_CLIENT_PATH = ctx_proxy.client.__file__
 if _PROXY_CLIENT_PATH.endswith('.pyc'):
     _PROXY_CLIENT_PATH = _PROXY_CLIENT_PATH[:-1]
 
+# prefix of the lines the remote directories preparation command prints for missing files
+_MISSING_PATH_PREFIX = 'missing:'
+
+connection_pool = pool.ConnectionPool(idle_timeout=constants.SSH_CONNECTION_IDLE_TIMEOUT)
+atexit.register(connection_pool.close)
+
+
+@events.on_success_workflow_signal.connect
+@events.on_failure_workflow_signal.connect
+@events.on_cancelled_workflow_signal.connect
+def _close_connections(*args, **kwargs):
+    # the workflow is done with the connections its operations opened
+    connection_pool.close()
+
 
 def run_commands(ctx, commands, fabric_env, use_sudo, hide_output, **_):
     """Runs the provider 'commands' in sequence
@@ -43,60 +62,98 @@ def run_commands(ctx, commands, fabric_env, use_sudo, hide_output, **_):
     """
     with fabric.api.settings(_hide_output(ctx, groups=hide_output),
                              **_fabric_env(ctx, fabric_env, warn_only=True)):
-        for command in commands:
-            ctx.logger.info('Running command: {0}'.format(command))
-            run = fabric.api.sudo if use_sudo else fabric.api.run
-            result = run(command)
-            if result.failed:
-                raise exceptions.ProcessException(
-                    command=result.command,
-                    exit_code=result.return_code,
-                    stdout=result.stdout,
-                    stderr=result.stderr)
+        with connection_pool.connection():
+            for command in commands:
+                ctx.logger.info('Running command: {0}'.format(command))
+                run = fabric.api.sudo if use_sudo else fabric.api.run
+                result = run(command)
+                if result.failed:
+                    raise exceptions.ProcessException(
+                        command=result.command,
+                        exit_code=result.return_code,
+                        stdout=result.stdout,
+                        stderr=result.stderr)
 
 
 def run_script(ctx, script_path, fabric_env, process, use_sudo, hide_output, **kwargs):
     process = process or {}
+    local_script_path = common.download_script(ctx, script_path)
     paths = _Paths(base_dir=process.get('base_dir', constants.DEFAULT_BASE_DIR),
-                   local_script_path=common.download_script(ctx, script_path))
+                   local_script_path=local_script_path)
     with fabric.api.settings(_hide_output(ctx, groups=hide_output),
                              **_fabric_env(ctx, fabric_env, warn_only=False)):
-        # the remote host must have the ctx before running any fabric scripts
-        if not fabric.contrib.files.exists(paths.remote_ctx_path):
-            # there may be race conditions with other operations that
-            # may be running in parallel, so we pass -p to make sure
-            # we get 0 exit code if the directory already exists
-            fabric.api.run('mkdir -p {0} && mkdir -p {1}'.format(paths.remote_scripts_dir,
-                                                                 paths.remote_work_dir))
-            # this file has to be present before using ctx
-            fabric.api.put(_PROXY_CLIENT_PATH, paths.remote_ctx_path)
-        _patch_ctx(ctx)
-        process = common.create_process_config(
-            script_path=paths.remote_script_path,
-            process=process,
-            operation_kwargs=kwargs,
-            quote_json_env_vars=True)
-        fabric.api.put(paths.local_script_path, paths.remote_script_path)
-        with ctx_proxy.server.CtxProxy(ctx) as proxy:
-            local_port = proxy.port
-            with fabric.context_managers.cd(process.get('cwd', paths.remote_work_dir)):  # pylint: disable=not-context-manager
-                with tunnel.remote(ctx, local_port=local_port) as remote_port:
-                    local_socket_url = proxy.socket_url
-                    remote_socket_url = local_socket_url.replace(str(local_port), str(remote_port))
-                    env_script = _write_environment_script_file(
-                        process=process,
-                        paths=paths,
-                        local_socket_url=local_socket_url,
-                        remote_socket_url=remote_socket_url)
-                    fabric.api.put(env_script, paths.remote_env_script_path)
-                    try:
-                        command = 'source {0} && {1}'.format(paths.remote_env_script_path,
-                                                             process['command'])
-                        run = fabric.api.sudo if use_sudo else fabric.api.run
-                        run(command)
-                    except exceptions.TaskException:
-                        return common.check_error(ctx, reraise=True)
-            return common.check_error(ctx)
+        with connection_pool.connection():
+            # the remote host must have the ctx before running any fabric scripts.
+            # scripts are cached on the remote host by their content, so they are only
+            # uploaded the first time they are used
+            bundle = _Bundle(paths.remote_bundle_path)
+            missing_paths = _prepare_remote_dirs(paths, [paths.remote_ctx_path,
+                                                         paths.remote_script_path])
+            if paths.remote_ctx_path in missing_paths:
+                bundle.add_file(_PROXY_CLIENT_PATH, paths.remote_ctx_path)
+            if paths.remote_script_path in missing_paths:
+                bundle.add_file(paths.local_script_path, paths.remote_script_path)
+            _patch_ctx(ctx)
+            process = common.create_process_config(
+                script_path=paths.remote_script_path,
+                process=process,
+                operation_kwargs=kwargs,
+                quote_json_env_vars=True)
+            with ctx_proxy.server.CtxProxy(ctx) as proxy:
+                local_port = proxy.port
+                with fabric.context_managers.cd(process.get('cwd', paths.remote_work_dir)):  # pylint: disable=not-context-manager
+                    with tunnel.remote(ctx, local_port=local_port) as remote_port:
+                        local_socket_url = proxy.socket_url
+                        remote_socket_url = local_socket_url.replace(str(local_port),
+                                                                     str(remote_port))
+                        env_script = _write_environment_script_file(
+                            process=process,
+                            paths=paths,
+                            local_socket_url=local_socket_url,
+                            remote_socket_url=remote_socket_url)
+                        bundle.add_content(env_script.getvalue(), paths.remote_env_script_path)
+                        # all files are uploaded at once, and (unless running with sudo) unpacked
+                        # by the same command that runs the script
+                        bundle.upload()
+                        try:
+                            command = 'source {0} && {1}'.format(paths.remote_env_script_path,
+                                                                 process['command'])
+                            if use_sudo:
+                                # the files are unpacked as the login user, so the remote cache
+                                # never ends up owned by root
+                                fabric.api.run(bundle.unpack_command())
+                                fabric.api.sudo(command)
+                            else:
+                                fabric.api.run('{0} && {1}'.format(bundle.unpack_command(),
+                                                                   command))
+                        except exceptions.TaskException:
+                            return common.check_error(ctx, reraise=True)
+                return common.check_error(ctx)
+
+
+def _prepare_remote_dirs(paths, remote_paths):
+    """
+    Creates the remote directories and checks which of ``remote_paths`` are missing, in a single
+    command to save round-trips. Returns the missing paths.
+    """
+    # there may be race conditions with other operations that may be running in parallel,
+    # so we pass -p to make sure we get 0 exit code if the directories already exist
+    command = 'mkdir -p {0} {1} {2}'.format(paths.remote_scripts_dir,
+                                            paths.remote_work_dir,
+                                            paths.remote_cache_dir)
+    for remote_path in remote_paths:
+        command += ' && {{ test -f {0} || echo {1}{0}; }}'.format(
+            remote_path, _MISSING_PATH_PREFIX)
+    with fabric.api.settings(warn_only=True):
+        result = fabric.api.run(command)
+    if result.failed:
+        raise exceptions.ProcessException(
+            command=result.command,
+            exit_code=result.return_code,
+            stdout=result.stdout,
+            stderr=result.stderr)
+    return set(line.strip()[len(_MISSING_PATH_PREFIX):] for line in result.stdout.splitlines()
+               if line.strip().startswith(_MISSING_PATH_PREFIX))
 
 
 def _patch_ctx(ctx):
@@ -184,9 +241,56 @@ class _Paths(object):
         self.remote_ctx_path = '{0}/ctx'.format(self.remote_ctx_dir)
         self.remote_scripts_dir = '{0}/scripts'.format(self.remote_ctx_dir)
         self.remote_work_dir = '{0}/work'.format(self.remote_ctx_dir)
+        self.remote_cache_dir = '{0}/cache'.format(self.remote_ctx_dir)
         random_suffix = ''.join(random.choice(string.ascii_lowercase + string.digits)
                                 for _ in range(8))
         remote_path_suffix = '{0}-{1}'.format(self.base_script_path, random_suffix)
         self.remote_env_script_path = '{0}/env-{1}'.format(self.remote_scripts_dir,
                                                            remote_path_suffix)
-        self.remote_script_path = '{0}/{1}'.format(self.remote_scripts_dir, remote_path_suffix)
+        self.remote_bundle_path = '{0}/bundle-{1}.tar'.format(self.remote_scripts_dir,
+                                                              remote_path_suffix)
+        # local scripts are named after their content digest (see ``common.ScriptCache``), so the
+        # remote copy can be shared by all operations running the same script
+        self.remote_script_path = '{0}/{1}'.format(self.remote_cache_dir, self.base_script_path)
+
+
+class _Bundle(object):
+    """
+    Tar archive of the files an operation uploads to the remote host, so they are all uploaded
+    at once.
+
+    The files are unpacked to a staging directory and then moved into place, so operations running
+    concurrently on the same host never see (or execute) partially written files.
+    """
+
+    def __init__(self, remote_path):
+        self.remote_path = remote_path
+        self._remote_staging_dir = '{0}.d'.format(remote_path)
+        self._remote_paths = []
+        self._buffer = io.BytesIO()
+        self._tar = tarfile.open(fileobj=self._buffer, mode='w')
+
+    def add_file(self, local_path, remote_path):
+        with open(local_path, 'rb') as f:
+            self.add_content(f.read(), remote_path)
+
+    def add_content(self, content, remote_path):
+        info = tarfile.TarInfo(name=str(len(self._remote_paths)))
+        info.size = len(content)
+        info.mode = 0755
+        info.mtime = time.time()
+        self._tar.addfile(info, io.BytesIO(content))
+        self._remote_paths.append(remote_path)
+
+    def upload(self):
+        self._tar.close()
+        self._buffer.seek(0)
+        fabric.api.put(self._buffer, self.remote_path)
+
+    def unpack_command(self):
+        commands = ['mkdir -p {0}'.format(self._remote_staging_dir),
+                    'tar -xf {0} -C {1}'.format(self.remote_path, self._remote_staging_dir)]
+        commands.extend('mv -f {0}/{1} {2}'.format(self._remote_staging_dir, index, remote_path)
+                        for index, remote_path in enumerate(self._remote_paths))
+        commands.append('rm -rf {0} {1}'.format(self.remote_path, self._remote_staging_dir))
+        return ' && '.join(commands)
@@ -0,0 +1,111 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+SSH connection pooling for the ssh operations
+"""
+
+import contextlib
+import hashlib
+import threading
+import time
+
+import fabric.network
+import fabric.state
+
+
+class ConnectionPool(object):
+    """
+    Shares SSH connections between operations running in the same process.
+
+    Fabric already caches connections in ``fabric.state.connections``, keyed by ``user@host:port``,
+    but never lets go of them. The pool makes that cache safe to reuse across the operations of an
+    execution: a cached connection is dropped (and transparently reopened by fabric) when its
+    transport is no longer active, when it was opened with different credentials, or when it has
+    been idle for more than ``idle_timeout`` seconds.
+
+    As fabric shares a single connection per host, an operation using different credentials than
+    the ones the connection was opened with waits until the connection is no longer in use.
+    """
+
+    def __init__(self, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._credentials = {}
+        self._last_used = {}
+        self._in_use = {}
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Prepares the connection for the host of the current fabric env (i.e. must be called within
+        ``fabric.api.settings``). The connection itself is opened lazily by fabric, on first use.
+        """
+        env = fabric.state.env
+        key = fabric.network.normalize_to_string(env.host_string)
+        credentials = _credentials_digest(env)
+        with self._lock:
+            self._evict_idle()
+            while self._in_use.get(key) and self._credentials.get(key) != credentials:
+                self._idle.wait()
+            client = dict.get(fabric.state.connections, key)
+            if client is not None and (self._credentials.get(key) != credentials or
+                                       not _is_active(client)):
+                self._disconnect(key)
+            self._credentials[key] = credentials
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                self._last_used[key] = time.time()
+                if not self._in_use[key]:
+                    self._idle.notify_all()
+
+    def close(self):
+        """
+        Closes all connections which are not currently in use.
+        """
+        with self._lock:
+            for key in list(self._last_used):
+                if not self._in_use.get(key):
+                    self._disconnect(key)
+
+    def _evict_idle(self):
+        now = time.time()
+        for key, last_used in list(self._last_used.items()):
+            if not self._in_use.get(key) and now - last_used > self.idle_timeout:
+                self._disconnect(key)
+
+    def _disconnect(self, key):
+        client = fabric.state.connections.pop(key, None)
+        self._credentials.pop(key, None)
+        self._last_used.pop(key, None)
+        if client is not None:
+            client.close()
+
+
+def _is_active(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _credentials_digest(env):
+    digest = hashlib.sha256()
+    for credential in (env.get('password'), env.get('key_filename'), env.get('key')):
+        digest.update(repr(credential))
+    return digest.hexdigest()
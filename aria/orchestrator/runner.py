@@ -26,6 +26,7 @@ from sqlalchemy.pool import StaticPool # @UnresolvedImport
 
 from .context.workflow import WorkflowContext
 from .workflows.core.engine import Engine
+from .workflows.core.statistics import DurationEstimator
 from .workflows.executor.thread import ThreadExecutor
 from ..storage import model
 from ..storage.sql_mapi import SQLAlchemyModelAPI
@@ -47,10 +48,13 @@ class Runner(object):
     :param path: path to Sqlite database file; use '' (the default) to use a temporary file,
                  and None to use an in-memory database
     :type path: string
+    :param execution_id: the id of an interrupted or failed execution to resume, in an existing
+                         (non-temporary) storage, which is then not initialized again; the tasks
+                         which succeeded before are not run again
     """
 
     def __init__(self, workflow_name, workflow_fn, inputs, initialize_model_storage_fn,
-                 deployment_id, storage_path='', is_storage_temporary=True):
+                 deployment_id, storage_path='', is_storage_temporary=True, execution_id=None):
         if storage_path == '':
             # Temporary file storage
             the_file, storage_path = tempfile.mkstemp(suffix='.db', prefix='aria-')
@@ -60,14 +64,17 @@ class Runner(object):
         self._is_storage_temporary = is_storage_temporary
 
         workflow_context = self.create_workflow_context(workflow_name, deployment_id,
-                                                        initialize_model_storage_fn)
+                                                        initialize_model_storage_fn,
+                                                        execution_id)
 
         tasks_graph = workflow_fn(ctx=workflow_context, **inputs)
 
         self._engine = Engine(
             executor=ThreadExecutor(),
             workflow_context=workflow_context,
-            tasks_graph=tasks_graph)
+            tasks_graph=tasks_graph,
+            duration_estimator=DurationEstimator(workflow_context.model),
+            resume=execution_id is not None)
 
     def run(self):
         try:
@@ -75,15 +82,18 @@ class Runner(object):
         finally:
             self.cleanup()
 
-    def create_workflow_context(self, workflow_name, deployment_id, initialize_model_storage_fn):
+    def create_workflow_context(self, workflow_name, deployment_id, initialize_model_storage_fn,
+                                execution_id=None):
         model_storage = self.create_sqlite_model_storage()
-        initialize_model_storage_fn(model_storage)
+        if execution_id is None:
+            initialize_model_storage_fn(model_storage)
         resource_storage = self.create_fs_resource_storage()
         return WorkflowContext(
             name=workflow_name,
             model_storage=model_storage,
             resource_storage=resource_storage,
             deployment_id=deployment_id,
+            execution_id=execution_id,
             workflow_name=self.__class__.__name__,
             task_max_attempts=1,
             task_retry_interval=1)
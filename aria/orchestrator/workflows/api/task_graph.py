@@ -18,9 +18,7 @@ Task graph. Used by users to build workflows
 """
 
 from uuid import uuid4
-from collections import Iterable
-
-from networkx import DiGraph, topological_sort
+from collections import Iterable, deque
 
 from . import task as api_task
 
@@ -32,6 +30,13 @@ class TaskNotInGraphError(Exception):
     pass
 
 
+class TaskGraphCycleError(Exception):
+    """
+    An error representing a scenario where the graph's dependencies contain a cycle
+    """
+    pass
+
+
 def _filter_out_empty_tasks(func=None):
     if func is None:
         return lambda f: _filter_out_empty_tasks(func=f)
@@ -45,16 +50,24 @@ class TaskGraph(object):
     """
     A tasks graph builder.
     Build an operations flow graph
+
+    Each task is assigned an integer index when added to the graph, and dependencies are kept as
+    sets of indices per task (in both directions), so membership checks and adding dependencies
+    are O(1).
     """
 
     def __init__(self, name):
         self.name = name
         self._id = str(uuid4())
-        self._graph = DiGraph()
+        # removed tasks leave a None in place, so that the indices of other tasks remain valid
+        self._tasks = []
+        self._indices = {}
+        self._dependencies = []
+        self._dependents = []
 
     def __repr__(self):
-        return '{name}(id={self._id}, name={self.name}, graph={self._graph!r})'.format(
-            name=self.__class__.__name__, self=self)
+        return '{name}(id={self._id}, name={self.name}, tasks={tasks})'.format(
+            name=self.__class__.__name__, self=self, tasks=len(self._indices))
 
     @property
     def id(self):
@@ -72,17 +85,32 @@ class TaskGraph(object):
         An iterator on tasks added to the graph
         :yields: Iterator over all tasks in the graph
         """
-        for _, data in self._graph.nodes_iter(data=True):
-            yield data['task']
+        for task in self._tasks:
+            if task is not None:
+                yield task
 
     def topological_order(self, reverse=False):
         """
         Returns topological sort on the graph
         :param reverse: whether to reverse the sort
         :return: a list which represents the topological sort
+        :raise: TaskGraphCycleError if the graph's dependencies contain a cycle
         """
-        for task_id in topological_sort(self._graph, reverse=reverse):
-            yield self.get_task(task_id)
+        # by default, dependents come before their dependencies
+        predecessors, successors = ((self._dependencies, self._dependents) if reverse
+                                    else (self._dependents, self._dependencies))
+        remaining = dict((index, len(predecessors[index])) for index in self._indices.itervalues())
+        ready = deque(sorted(index for index, count in remaining.iteritems() if count == 0))
+        while ready:
+            index = ready.popleft()
+            del remaining[index]
+            yield self._tasks[index]
+            for successor in successors[index]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.append(successor)
+        if remaining:
+            raise TaskGraphCycleError('Graph {0} contains a dependency cycle'.format(self.name))
 
     def get_dependencies(self, dependent_task):
         """
@@ -91,10 +119,8 @@ class TaskGraph(object):
         :yields: Iterator over all tasks which dependency_task depends on
         :raise: TaskNotInGraphError if dependent_task is not in the graph
         """
-        if not self.has_tasks(dependent_task):
-            raise TaskNotInGraphError('Task id: {0}'.format(dependent_task.id))
-        for _, dependency_id in self._graph.out_edges_iter(dependent_task.id):
-            yield self.get_task(dependency_id)
+        for index in self._dependencies[self._get_index(dependent_task.id)]:
+            yield self._tasks[index]
 
     def get_dependents(self, dependency_task):
         """
@@ -103,10 +129,8 @@ class TaskGraph(object):
         :yields: Iterator over all tasks which depend on dependency_task
         :raise: TaskNotInGraphError if dependency_task is not in the graph
         """
-        if not self.has_tasks(dependency_task):
-            raise TaskNotInGraphError('Task id: {0}'.format(dependency_task.id))
-        for dependent_id, _ in self._graph.in_edges_iter(dependency_task.id):
-            yield self.get_task(dependent_id)
+        for index in self._dependents[self._get_index(dependency_task.id)]:
+            yield self._tasks[index]
 
     # task methods
 
@@ -118,10 +142,7 @@ class TaskGraph(object):
         :rtype: BaseTask
         :raise: TaskNotInGraphError if no task found in the graph with the given id
         """
-        if not self._graph.has_node(task_id):
-            raise TaskNotInGraphError('Task id: {0}'.format(task_id))
-        data = self._graph.node[task_id]
-        return data['task']
+        return self._tasks[self._get_index(task_id)]
 
     @_filter_out_empty_tasks
     def add_tasks(self, *tasks):
@@ -137,8 +158,11 @@ class TaskGraph(object):
         for task in tasks:
             if isinstance(task, Iterable):
                 return_tasks += self.add_tasks(*task)
-            elif not self.has_tasks(task):
-                self._graph.add_node(task.id, task=task)
+            elif task.id not in self._indices:
+                self._indices[task.id] = len(self._tasks)
+                self._tasks.append(task)
+                self._dependencies.append(set())
+                self._dependents.append(set())
                 return_tasks.append(task)
 
         return return_tasks
@@ -156,8 +180,15 @@ class TaskGraph(object):
         for task in tasks:
             if isinstance(task, Iterable):
                 return_tasks += self.remove_tasks(*task)
-            elif self.has_tasks(task):
-                self._graph.remove_node(task.id)
+            elif task.id in self._indices:
+                index = self._indices.pop(task.id)
+                for dependency_index in self._dependencies[index]:
+                    self._dependents[dependency_index].discard(index)
+                for dependent_index in self._dependents[index]:
+                    self._dependencies[dependent_index].discard(index)
+                self._tasks[index] = None
+                self._dependencies[index] = set()
+                self._dependents[index] = set()
                 return_tasks.append(task)
 
         return return_tasks
@@ -177,7 +208,7 @@ class TaskGraph(object):
             if isinstance(task, Iterable):
                 return_value &= self.has_tasks(*task)
             else:
-                return_value &= self._graph.has_node(task.id)
+                return_value &= task.id in self._indices
 
         return return_value
 
@@ -196,19 +227,7 @@ class TaskGraph(object):
         """
         if not (self.has_tasks(dependent) and self.has_tasks(dependency)):
             raise TaskNotInGraphError()
-
-        if self.has_dependency(dependent, dependency):
-            return
-
-        if isinstance(dependent, Iterable):
-            for dependent_task in dependent:
-                self.add_dependency(dependent_task, dependency)
-        else:
-            if isinstance(dependency, Iterable):
-                for dependency_task in dependency:
-                    self.add_dependency(dependent, dependency_task)
-            else:
-                self._graph.add_edge(dependent.id, dependency.id)
+        self._add_dependencies(self._get_indices(dependent), self._get_indices(dependency))
 
     def has_dependency(self, dependent, dependency):
         """
@@ -240,7 +259,8 @@ class TaskGraph(object):
                 for dependency_task in dependency:
                     return_value &= self.has_dependency(dependent, dependency_task)
             else:
-                return_value &= self._graph.has_edge(dependent.id, dependency.id)
+                return_value &= (self._indices[dependency.id] in
+                                 self._dependencies[self._indices[dependent.id]])
 
         return return_value
 
@@ -265,14 +285,10 @@ class TaskGraph(object):
         if not self.has_dependency(dependent, dependency):
             return
 
-        if isinstance(dependent, Iterable):
-            for dependent_task in dependent:
-                self.remove_dependency(dependent_task, dependency)
-        elif isinstance(dependency, Iterable):
-            for dependency_task in dependency:
-                self.remove_dependency(dependent, dependency_task)
-        else:
-            self._graph.remove_edge(dependent.id, dependency.id)
+        for dependent_index in self._get_indices(dependent):
+            for dependency_index in self._get_indices(dependency):
+                self._dependencies[dependent_index].discard(dependency_index)
+                self._dependents[dependency_index].discard(dependent_index)
 
     @_filter_out_empty_tasks
     def sequence(self, *tasks):
@@ -284,7 +300,29 @@ class TaskGraph(object):
         if tasks:
             self.add_tasks(*tasks)
 
-            for i in xrange(1, len(tasks)):
-                self.add_dependency(tasks[i], tasks[i-1])
+            # all tasks were just added, so their indices can be looked up directly
+            indices = [self._get_indices(task) for task in tasks]
+            for i in xrange(1, len(indices)):
+                self._add_dependencies(indices[i], indices[i-1])
 
         return tasks
+
+    def _get_index(self, task_id):
+        try:
+            return self._indices[task_id]
+        except KeyError:
+            raise TaskNotInGraphError('Task id: {0}'.format(task_id))
+
+    def _get_indices(self, item):
+        """
+        Returns the indices of a task, or of all the tasks in a (possibly nested) group of tasks
+        """
+        if isinstance(item, Iterable):
+            return [index for task in item for index in self._get_indices(task)]
+        return [self._indices[item.id]]
+
+    def _add_dependencies(self, dependent_indices, dependency_indices):
+        for dependent_index in dependent_indices:
+            self._dependencies[dependent_index].update(dependency_indices)
+            for dependency_index in dependency_indices:
+                self._dependents[dependency_index].add(dependent_index)
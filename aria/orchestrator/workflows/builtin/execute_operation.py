@@ -17,7 +17,8 @@
 Builtin execute_operation workflow
 """
 
-from ..api.task import OperationTask
+from ..api.task import OperationTask, StubTask
+from ..core import scheduling
 from ... import workflow
 
 
@@ -32,6 +33,7 @@ def execute_operation(
         type_names,
         node_ids,
         node_instance_ids,
+        max_concurrency=None,
         **kwargs):
     """
     The execute_operation workflow
@@ -45,82 +47,87 @@ def execute_operation(
     :param type_names:
     :param node_ids:
     :param node_instance_ids:
+    :param int max_concurrency: the maximum number of operations to run in parallel (unbounded
+     if None)
     :param kwargs:
     :return:
     """
-    subgraphs = {}
+    topology = ctx.topology
+
     # filtering node instances
-    filtered_node_instances = list(_filter_node_instances(
-        context=ctx,
+    filtered_node_instances = _filter_node_instances(
+        topology=topology,
         node_ids=node_ids,
         node_instance_ids=node_instance_ids,
-        type_names=type_names))
+        type_names=type_names)
 
-    if run_by_dependency_order:
-        filtered_node_instances_ids = set(node_instance.id
-                                          for node_instance in filtered_node_instances)
-        for node_instance in ctx.node_instances:
-            if node_instance.id not in filtered_node_instances_ids:
-                subgraphs[node_instance.id] = ctx.task_graph(
-                    name='execute_operation_stub_{0}'.format(node_instance.id))
-
-    # registering actual tasks to sequences
+    if allow_kwargs_override is not None:
+        operation_kwargs['allow_kwargs_override'] = allow_kwargs_override
+
+    # registering actual tasks
+    tasks = {}
     for node_instance in filtered_node_instances:
-        graph.add_tasks(
-            _create_node_instance_task(
-                node_instance=node_instance,
-                operation=operation,
-                operation_kwargs=operation_kwargs,
-                allow_kwargs_override=allow_kwargs_override
-            )
-        )
-
-    for _, node_instance_sub_workflow in subgraphs.items():
-        graph.add_tasks(node_instance_sub_workflow)
+        tasks[node_instance.id] = OperationTask.node_instance(
+            instance=node_instance,
+            name=operation,
+            inputs=operation_kwargs)
+        graph.add_tasks(tasks[node_instance.id])
 
     # adding tasks dependencies if required
     if run_by_dependency_order:
-        for node_instance in ctx.node_instances:
-            for relationship_instance in node_instance.relationship_instances:
-                graph.add_dependency(source_task=subgraphs[node_instance.id],
-                                     after=[subgraphs[relationship_instance.target_id]])
+        # node instances which weren't filtered still take part in the dependency order
+        for node_instance_id in topology.node_instances:
+            if node_instance_id not in tasks:
+                tasks[node_instance_id] = StubTask()
+                graph.add_tasks(tasks[node_instance_id])
 
+        for relationship_instance in topology.relationship_instances.itervalues():
+            graph.add_dependency(tasks[relationship_instance.source_node_instance_fk],
+                                 tasks[relationship_instance.target_node_instance_fk])
 
-def _filter_node_instances(context, node_ids=(), node_instance_ids=(), type_names=()):
-    def _is_node_by_id(node_id):
-        return not node_ids or node_id in node_ids
+    if max_concurrency:
+        _limit_concurrency(ctx, graph, tasks.itervalues(), max_concurrency)
 
-    def _is_node_instance_by_id(node_instance_id):
-        return not node_instance_ids or node_instance_id in node_instance_ids
 
-    def _is_node_by_type(node_type_hierarchy):
-        return not type_names or node_type_hierarchy in type_names
-
-    for node_instance in context.node_instances:
-        if all((_is_node_by_id(node_instance.node.id),
-                _is_node_instance_by_id(node_instance.id),
-                _is_node_by_type(node_instance.node.type_hierarchy))):
-            yield node_instance
-
-
-def _create_node_instance_task(
-        node_instance,
-        operation,
-        operation_kwargs,
-        allow_kwargs_override):
+def _filter_node_instances(topology, node_ids=(), node_instance_ids=(), type_names=()):
     """
-    A workflow which executes a single operation
-    :param node_instance: the node instance to install
-    :param basestring operation: the operation name
-    :param dict operation_kwargs:
-    :param bool allow_kwargs_override:
-    :return:
+    Returns the node instances matching all the given filters, in the order they were loaded
     """
-
-    if allow_kwargs_override is not None:
-        operation_kwargs['allow_kwargs_override'] = allow_kwargs_override
-
-    return OperationTask.node_instance(
-        instance=node_instance,
-        name=operation,
-        inputs=operation_kwargs)
+    if node_instance_ids:
+        node_instances = [topology.node_instances[node_instance_id]
+                          for node_instance_id in set(node_instance_ids)
+                          if node_instance_id in topology.node_instances]
+    elif node_ids:
+        node_instances = [node_instance
+                          for node_id in set(node_ids)
+                          for node_instance in topology.node_instances_of(node_id)]
+    else:
+        node_instances = topology.node_instances.values()
+
+    if node_ids:
+        node_ids = set(node_ids)
+        node_instances = [node_instance for node_instance in node_instances
+                          if node_instance.node_fk in node_ids]
+    if type_names:
+        type_names = set(type_names)
+        typed_node_ids = set(node.id for node in topology.nodes.itervalues()
+                             if type_names.intersection(node.type_hierarchy or ()))
+        node_instances = [node_instance for node_instance in node_instances
+                          if node_instance.node_fk in typed_node_ids]
+
+    order = dict((node_instance_id, index)
+                 for index, node_instance_id in enumerate(topology.node_instances))
+    return sorted(node_instances, key=lambda node_instance: order[node_instance.id])
+
+
+def _limit_concurrency(ctx, graph, tasks, max_concurrency):
+    """
+    Limits the number of the workflow's operation tasks the engine runs at once, through the
+    workflow context's scheduling policy
+    """
+    if ctx.scheduling_policy is None:
+        ctx.scheduling_policy = scheduling.SchedulingPolicy()
+    ctx.scheduling_policy.limit_group(
+        name=graph.id,
+        task_ids=[task.id for task in tasks if isinstance(task, OperationTask)],
+        limit=scheduling.Limit(max_concurrency=max_concurrency))
@@ -19,6 +19,8 @@
 Builtin heal workflow
 """
 
+from collections import deque
+
 from aria import workflow
 
 from .workflows import (install_node_instance, uninstall_node_instance)
@@ -35,12 +37,16 @@ def heal(ctx, graph, node_instance_id):
     :param node_instance_id: the id of the node instance to heal
     :return:
     """
-    failing_node = ctx.model.node_instance.get(node_instance_id)
-    host_node = ctx.model.node_instance.get(failing_node.host.id)
-    failed_node_instance_subgraph = _get_contained_subgraph(ctx, host_node)
-    failed_node_instance_ids = list(n.id for n in failed_node_instance_subgraph)
-
-    targeted_node_instances = [node_instance for node_instance in ctx.node_instances
+    topology = ctx.topology
+    # the id may be passed as a string (e.g. as a workflow input), so it is looked up in storage
+    failing_node = topology.node_instances[ctx.model.node_instance.get(node_instance_id).id]
+    # a node instance which isn't hosted on anything is healed along with what it contains
+    host_node = topology.node_instances[failing_node.host_fk
+                                        if failing_node.host_fk is not None else failing_node.id]
+    failed_node_instance_subgraph = _get_contained_subgraph(topology, host_node)
+    failed_node_instance_ids = set(n.id for n in failed_node_instance_subgraph)
+
+    targeted_node_instances = [node_instance for node_instance in topology.node_instances.values()
                                if node_instance.id not in failed_node_instance_ids]
 
     uninstall_subgraph = task.WorkflowTask(
@@ -68,6 +74,8 @@ def heal_uninstall(ctx, graph, failing_node_instances, targeted_node_instances):
     source
     :return:
     """
+    topology = ctx.topology
+    failing_node_instance_ids = set(n.id for n in failing_node_instances)
     node_instance_sub_workflows = {}
 
     # Create install stub workflow for each unaffected node instance
@@ -86,23 +94,24 @@ def heal_uninstall(ctx, graph, failing_node_instances, targeted_node_instances):
     # create dependencies between the node instance sub workflow
     for node_instance in failing_node_instances:
         node_instance_sub_workflow = node_instance_sub_workflows[node_instance.id]
-        for relationship_instance in reversed(node_instance.outbound_relationship_instances):
+        for relationship_instance in reversed(
+                topology.outbound_relationship_instances(node_instance.id)):
             graph.add_dependency(
-                node_instance_sub_workflows[relationship_instance.target_node_instance.id],
+                node_instance_sub_workflows[relationship_instance.target_node_instance_fk],
                 node_instance_sub_workflow)
 
     # Add operations for intact nodes depending on a node instance belonging to node_instances
     for node_instance in targeted_node_instances:
         node_instance_sub_workflow = node_instance_sub_workflows[node_instance.id]
 
-        for relationship_instance in reversed(node_instance.outbound_relationship_instances):
+        for relationship_instance in reversed(
+                topology.outbound_relationship_instances(node_instance.id)):
 
-            target_node_instance = \
-                ctx.model.node_instance.get(relationship_instance.target_node_instance.id)
-            target_node_instance_subgraph = node_instance_sub_workflows[target_node_instance.id]
+            target_node_instance_id = relationship_instance.target_node_instance_fk
+            target_node_instance_subgraph = node_instance_sub_workflows[target_node_instance_id]
             graph.add_dependency(target_node_instance_subgraph, node_instance_sub_workflow)
 
-            if target_node_instance in failing_node_instances:
+            if target_node_instance_id in failing_node_instance_ids:
                 dependency = relationship_tasks(
                     relationship_instance=relationship_instance,
                     operation_name='aria.interfaces.relationship_lifecycle.unlink')
@@ -121,6 +130,8 @@ def heal_install(ctx, graph, failing_node_instances, targeted_node_instances):
     source
     :return:
     """
+    topology = ctx.topology
+    failing_node_instance_ids = set(n.id for n in failing_node_instances)
     node_instance_sub_workflows = {}
 
     # Create install sub workflow for each unaffected
@@ -139,10 +150,11 @@ def heal_install(ctx, graph, failing_node_instances, targeted_node_instances):
     # create dependencies between the node instance sub workflow
     for node_instance in failing_node_instances:
         node_instance_sub_workflow = node_instance_sub_workflows[node_instance.id]
-        if node_instance.outbound_relationship_instances:
+        relationship_instances = topology.outbound_relationship_instances(node_instance.id)
+        if relationship_instances:
             dependencies = \
-                [node_instance_sub_workflows[relationship_instance.target_node_instance.id]
-                 for relationship_instance in node_instance.outbound_relationship_instances]
+                [node_instance_sub_workflows[relationship_instance.target_node_instance_fk]
+                 for relationship_instance in relationship_instances]
             graph.add_dependency(node_instance_sub_workflow, dependencies)
 
     # Add operations for intact nodes depending on a node instance
@@ -150,13 +162,12 @@ def heal_install(ctx, graph, failing_node_instances, targeted_node_instances):
     for node_instance in targeted_node_instances:
         node_instance_sub_workflow = node_instance_sub_workflows[node_instance.id]
 
-        for relationship_instance in node_instance.outbound_relationship_instances:
-            target_node_instance = ctx.model.node_instance.get(
-                relationship_instance.target_node_instance.id)
-            target_node_instance_subworkflow = node_instance_sub_workflows[target_node_instance.id]
+        for relationship_instance in topology.outbound_relationship_instances(node_instance.id):
+            target_node_instance_id = relationship_instance.target_node_instance_fk
+            target_node_instance_subworkflow = node_instance_sub_workflows[target_node_instance_id]
             graph.add_dependency(node_instance_sub_workflow, target_node_instance_subworkflow)
 
-            if target_node_instance in failing_node_instances:
+            if target_node_instance_id in failing_node_instance_ids:
                 dependent = relationship_tasks(
                     relationship_instance=relationship_instance,
                     operation_name='aria.interfaces.relationship_lifecycle.establish')
@@ -164,18 +175,18 @@ def heal_install(ctx, graph, failing_node_instances, targeted_node_instances):
                 graph.add_dependency(dependent, node_instance_sub_workflow)
 
 
-def _get_contained_subgraph(context, host_node_instance):
-    contained_instances = [node_instance
-                           for node_instance in context.node_instances
-                           if node_instance.host_fk == host_node_instance.id and
-                           node_instance.host_fk != node_instance.id]
+def _get_contained_subgraph(topology, host_node_instance):
+    """
+    Returns the host node instance along with all the node instances contained in it, directly or
+    transitively
+    """
     result = [host_node_instance]
-
-    if not contained_instances:
-        return result
-
-    result.extend(contained_instances)
-    for node_instance in contained_instances:
-        result.extend(_get_contained_subgraph(context, node_instance))
-
-    return set(result)
+    visited = set([host_node_instance.id])
+    queue = deque([host_node_instance.id])
+    while queue:
+        for node_instance in topology.contained_node_instances(queue.popleft()):
+            if node_instance.id not in visited:
+                visited.add(node_instance.id)
+                result.append(node_instance)
+                queue.append(node_instance.id)
+    return result
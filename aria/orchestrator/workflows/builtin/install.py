@@ -26,9 +26,9 @@ from ... import workflow
 @workflow
 def install(ctx, graph):
     tasks_and_node_instances = []
-    for node_instance in ctx.model.node_instance.iter():
+    for node_instance in ctx.topology.node_instances.itervalues():
         tasks_and_node_instances.append((
             WorkflowTask(install_node_instance, node_instance=node_instance),
             node_instance))
     graph.add_tasks([task for task, _ in tasks_and_node_instances])
-    create_node_instance_task_dependencies(graph, tasks_and_node_instances)
+    create_node_instance_task_dependencies(ctx, graph, tasks_and_node_instances)
@@ -28,14 +28,14 @@ def create_node_instance_task(operation_name, node_instance):
     return None
 
 
-def create_relationship_instance_tasks(operation_name, operations_attr, node_instance):
+def create_relationship_instance_tasks(ctx, operation_name, operations_attr, node_instance):
     """
     Returns a list of operation tasks for each outbound relationship of the node instance if
     the operation exists there.
     """
 
     sequence = []
-    for relationship_instance in node_instance.outbound_relationship_instances:
+    for relationship_instance in ctx.topology.outbound_relationship_instances(node_instance.id):
         if operation_name in getattr(relationship_instance.relationship, operations_attr):
             sequence.append(
                 OperationTask.relationship_instance(instance=relationship_instance,
@@ -44,24 +44,20 @@ def create_relationship_instance_tasks(operation_name, operations_attr, node_ins
     return sequence
 
 
-def create_node_instance_task_dependencies(graph, tasks_and_node_instances, reverse=False):
+def create_node_instance_task_dependencies(ctx, graph, tasks_and_node_instances, reverse=False):
     """
     Creates dependencies between tasks if there is an outbound relationship between their node
     instances.
     """
 
-    def get_task(node_instance_id):
-        for task, node_instance in tasks_and_node_instances:
-            if node_instance.id == node_instance_id:
-                return task
-        return None
+    tasks = dict((node_instance.id, task) for task, node_instance in tasks_and_node_instances)
 
     for task, node_instance in tasks_and_node_instances:
-        dependencies = []
-        for relationship_instance in node_instance.outbound_relationship_instances:
-            dependency = get_task(relationship_instance.target_node_instance.id)
-            if dependency:
-                dependencies.append(dependency)
+        dependencies = [
+            tasks[relationship_instance.target_node_instance_fk]
+            for relationship_instance in ctx.topology.outbound_relationship_instances(
+                node_instance.id)
+            if relationship_instance.target_node_instance_fk in tasks]
         if dependencies:
             if reverse:
                 for dependency in dependencies:
@@ -30,7 +30,7 @@ __all__ = (
 
 
 @workflow(suffix_template='{node_instance.id}')
-def install_node_instance(graph, node_instance, **kwargs):
+def install_node_instance(ctx, graph, node_instance, **kwargs):
     sequence = []
 
     # Create
@@ -42,11 +42,13 @@ def install_node_instance(graph, node_instance, **kwargs):
     # Configure
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.pre_configure_source',
             'source_operations',
             node_instance)
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.pre_configure_target',
             'target_operations',
             node_instance)
@@ -56,25 +58,27 @@ def install_node_instance(graph, node_instance, **kwargs):
             node_instance))
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.post_configure_source',
             'source_operations',
             node_instance)
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.post_configure_target',
             'target_operations',
             node_instance)
 
     # Start
-    sequence += _create_start_tasks(node_instance)
+    sequence += _create_start_tasks(ctx, node_instance)
 
     graph.sequence(*sequence)
 
 
 @workflow(suffix_template='{node_instance.id}')
-def uninstall_node_instance(graph, node_instance, **kwargs):
+def uninstall_node_instance(ctx, graph, node_instance, **kwargs):
     # Stop
-    sequence = _create_stop_tasks(node_instance)
+    sequence = _create_stop_tasks(ctx, node_instance)
 
     # Delete
     sequence.append(
@@ -86,16 +90,16 @@ def uninstall_node_instance(graph, node_instance, **kwargs):
 
 
 @workflow(suffix_template='{node_instance.id}')
-def start_node_instance(graph, node_instance, **kwargs):
-    graph.sequence(*_create_start_tasks(node_instance))
+def start_node_instance(ctx, graph, node_instance, **kwargs):
+    graph.sequence(*_create_start_tasks(ctx, node_instance))
 
 
 @workflow(suffix_template='{node_instance.id}')
-def stop_node_instance(graph, node_instance, **kwargs):
-    graph.sequence(*_create_stop_tasks(node_instance))
+def stop_node_instance(ctx, graph, node_instance, **kwargs):
+    graph.sequence(*_create_stop_tasks(ctx, node_instance))
 
 
-def _create_start_tasks(node_instance):
+def _create_start_tasks(ctx, node_instance):
     sequence = []
     sequence.append(
         create_node_instance_task(
@@ -103,31 +107,36 @@ def _create_start_tasks(node_instance):
             node_instance))
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.add_source',
             'source_operations',
             node_instance)
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.add_target',
             'target_operations',
             node_instance)
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.target_changed',
             'target_operations',
             node_instance)
     return sequence
 
 
-def _create_stop_tasks(node_instance):
+def _create_stop_tasks(ctx, node_instance):
     sequence = []
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.remove_target',
             'target_operations',
             node_instance)
     sequence += \
         create_relationship_instance_tasks(
+            ctx,
             'tosca.interfaces.relationship.Configure.target_changed',
             'target_operations',
             node_instance)
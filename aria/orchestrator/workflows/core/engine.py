@@ -18,6 +18,7 @@ The workflow engine. Executes workflows
 """
 
 import time
+import heapq
 from datetime import datetime
 
 import networkx
@@ -29,6 +30,8 @@ from aria.orchestrator import events
 from .. import exceptions
 from . import task as engine_task
 from . import translation
+from . import resumption
+from . import statistics
 # Import required so all signals are registered
 from . import events_handler  # pylint: disable=unused-import
 
@@ -38,13 +41,30 @@ class Engine(logger.LoggerMixin):
     The workflow engine. Executes workflows
     """
 
-    def __init__(self, executor, workflow_context, tasks_graph, **kwargs):
+    def __init__(self, executor, workflow_context, tasks_graph, duration_estimator=None,
+                 resume=False, idempotency_policy=None, **kwargs):
+        """
+        :param duration_estimator: a callable returning the expected duration of an operation
+         task in seconds (or None if unknown), used to prioritize the tasks on the critical path.
+         By default, all operation tasks are considered to take the same time.
+        :param resume: whether to resume the workflow context's execution from the tasks stored by
+         its previous run, instead of running it from scratch. Succeeded tasks are not run again.
+        :param idempotency_policy: when resuming, decides which of the tasks that were in flight
+         may be run again (see resumption.IdempotencyPolicy)
+        """
         super(Engine, self).__init__(**kwargs)
         self._workflow_context = workflow_context
         self._execution_graph = networkx.DiGraph()
         self._executor = executor
+        self._scheduling_policy = workflow_context.scheduling_policy
+        self._dispatched_tasks = {}
+        self._sent_task_ids = set()
+        stored_tasks = (resumption.load_stored_tasks(workflow_context, idempotency_policy)
+                        if resume else None)
         translation.build_execution_graph(task_graph=tasks_graph,
-                                          execution_graph=self._execution_graph)
+                                          execution_graph=self._execution_graph,
+                                          stored_tasks=stored_tasks)
+        self._priorities = self._compute_priorities(duration_estimator)
 
     def execute(self):
         """
@@ -58,6 +78,7 @@ class Engine(logger.LoggerMixin):
                     break
                 for task in self._ended_tasks():
                     self._handle_ended_tasks(task)
+                self._release_dispatched_tasks()
                 for task in self._executable_tasks():
                     self._handle_executable_task(task)
                 if self._all_tasks_consumed():
@@ -84,12 +105,39 @@ class Engine(logger.LoggerMixin):
         return self._workflow_context.execution.status in [model.Execution.CANCELLING,
                                                            model.Execution.CANCELLED]
 
+    def _compute_priorities(self, duration_estimator=None):
+        """
+        Computes the priority of each task: the (estimated) duration of the longest path from the
+        task to the end of the workflow, the task itself included
+        """
+        priorities = {}
+        for task_id in networkx.topological_sort(self._execution_graph, reverse=True):
+            task = self._execution_graph.node[task_id]['task']
+            if isinstance(task, engine_task.StubTask):
+                duration = 0
+            else:
+                duration = duration_estimator(task) if duration_estimator else None
+                if duration is None:
+                    duration = 1
+            priorities[task_id] = duration + max(
+                [priorities[successor_id]
+                 for successor_id in self._execution_graph.successors_iter(task_id)] or [0])
+        return priorities
+
     def _executable_tasks(self):
+        """
+        Returns the tasks ready to be executed, the ones on the longest paths to the end of the
+        workflow first
+        """
         now = datetime.utcnow()
-        return (task for task in self._tasks_iter()
-                if task.status in model.Task.WAIT_STATES and
-                task.due_at <= now and
-                not self._task_has_dependencies(task))
+        ready_tasks = [(-self._priorities[task.id], index, task)
+                       for index, task in enumerate(self._tasks_iter())
+                       if not self._task_has_dependencies(task) and
+                       task.status in model.Task.WAIT_STATES and
+                       task.due_at <= now]
+        heapq.heapify(ready_tasks)
+        while ready_tasks:
+            yield heapq.heappop(ready_tasks)[-1]
 
     def _ended_tasks(self):
         return (task for task in self._tasks_iter() if task.status in model.Task.END_STATES)
@@ -112,11 +160,26 @@ class Engine(logger.LoggerMixin):
         if isinstance(task, engine_task.StubTask):
             task.status = model.Task.SUCCESS
         else:
+            if self._scheduling_policy is not None:
+                if not self._scheduling_policy.acquire(task):
+                    # Throttled, the task will be dispatched on a later iteration
+                    return
+                self._dispatched_tasks[task.id] = task
+            self._sent_task_ids.add(task.id)
             events.sent_task_signal.send(task)
             self._executor.execute(task)
 
+    def _release_dispatched_tasks(self):
+        for task_id, task in self._dispatched_tasks.items():
+            if task.status not in (model.Task.SENT, model.Task.STARTED):
+                del self._dispatched_tasks[task_id]
+                self._scheduling_policy.release(task)
+
     def _handle_ended_tasks(self, task):
         if task.status == model.Task.FAILED and not task.ignore_failure:
             raise exceptions.ExecutorException('Workflow failed')
         else:
+            if task.status == model.Task.SUCCESS and task.id in self._sent_task_ids:
+                # Tasks which succeeded before the execution was resumed were already recorded
+                statistics.record_task_duration(task)
             self._execution_graph.remove_node(task.id)
@@ -0,0 +1,99 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Resumption of interrupted or failed executions from the tasks stored by their previous run
+"""
+
+from collections import deque
+from datetime import datetime
+
+from aria.storage import model
+
+
+class IdempotencyPolicy(object):
+    """
+    Decides whether operation tasks which were in flight (sent or started) when the execution was
+    interrupted may be run again when it is resumed. Tasks which may not be run again are marked
+    as failed and interrupted: they are never requeued, so they have to be handled manually.
+
+    :param idempotent: whether operations are considered idempotent by default
+    :param operations: a dict of operation names to whether they are idempotent, overriding the
+     default
+    """
+
+    def __init__(self, idempotent=True, operations=None):
+        self._idempotent = idempotent
+        self._operations = operations or {}
+
+    def is_idempotent(self, model_task):
+        """
+        :param model_task: the stored task
+        :return: whether the task may be run again
+        """
+        # task names are made of the operation name followed by the actor id
+        operation_name = model_task.name.rsplit('.', 1)[0]
+        return self._operations.get(operation_name, self._idempotent)
+
+
+def load_stored_tasks(workflow_context, idempotency_policy=None):
+    """
+    Loads the tasks stored for the workflow context's execution and prepares them for resumption:
+    succeeded tasks are kept as they are, failed tasks are requeued with their retries reset
+    (unless they were interrupted), and in flight tasks are requeued or failed according to the
+    idempotency policy.
+
+    :param workflow_context: the context of the execution being resumed
+    :param idempotency_policy: the policy for in flight tasks (by default all operations are
+     considered idempotent)
+    :return: a dict of task names to a deque of the stored tasks with that name, in the order they
+     were created
+    """
+    idempotency_policy = idempotency_policy or IdempotencyPolicy()
+    model_storage = workflow_context.model
+    now = datetime.utcnow()
+
+    execution = workflow_context.execution
+    if execution.status == execution.FAILED:
+        execution.error = None
+        execution.ended_at = None
+        workflow_context.execution = execution
+
+    stored_tasks = {}
+    for model_task in model_storage.task.iter(filters={'execution_fk': execution.id},
+                                              sort={'id': 'asc'}):
+        status = model_task.status
+        if status in (model.Task.SENT, model.Task.STARTED):
+            if idempotency_policy.is_idempotent(model_task):
+                _requeue(model_task, now)
+            else:
+                model_task.status = model.Task.FAILED
+                model_task.ended_at = now
+                model_task.interrupted = True
+            model_storage.task.put(model_task)
+        elif status == model.Task.FAILED and not (model_task.ignore_failure or
+                                                  model_task.interrupted):
+            _requeue(model_task, now)
+            model_task.retry_count = 0
+            model_storage.task.put(model_task)
+        stored_tasks.setdefault(model_task.name, deque()).append(model_task)
+    return stored_tasks
+
+
+def _requeue(model_task, now):
+    model_task.status = model.Task.PENDING
+    model_task.started_at = None
+    model_task.ended_at = None
+    model_task.due_at = now
@@ -0,0 +1,173 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scheduling policies, limiting the rate and concurrency at which the engine dispatches tasks
+"""
+
+import time
+
+
+class Limit(object):
+    """
+    A limit on a group of tasks: at most max_concurrency of them may run at once, and at most rate
+    of them may be dispatched per second, with bursts of up to burst tasks. Either may be None for
+    no limit.
+    """
+
+    def __init__(self, max_concurrency=None, rate=None, burst=1):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+
+
+class _Throttle(object):
+    """
+    The state of a limit applied to a single group of tasks: a semaphore and a token bucket
+    """
+
+    def __init__(self, limit, clock):
+        self._limit = limit
+        self._clock = clock
+        self._running = 0
+        self._tokens = float(limit.burst)
+        self._updated_at = clock()
+
+    def available(self):
+        """
+        :return: whether another task may be dispatched now
+        """
+        if self._limit.max_concurrency is not None and \
+                self._running >= self._limit.max_concurrency:
+            return False
+        if self._limit.rate is not None:
+            now = self._clock()
+            self._tokens = min(float(self._limit.burst),
+                               self._tokens + (now - self._updated_at) * self._limit.rate)
+            self._updated_at = now
+            if self._tokens < 1:
+                return False
+        return True
+
+    def acquire(self):
+        """
+        Accounts for a dispatched task
+        """
+        self._running += 1
+        if self._limit.rate is not None:
+            self._tokens -= 1
+
+    def release(self):
+        """
+        Accounts for a task which is no longer running
+        """
+        self._running -= 1
+
+
+class SchedulingPolicy(object):
+    """
+    Limits the dispatching of operation tasks, globally and per group of tasks. A task is only
+    dispatched when all the limits which apply to it allow it; otherwise it stays queued.
+
+    :param Limit total: limit for all the tasks of the workflow
+    :param Limit per_host: limit for the tasks running on each host
+    :param Limit per_plugin: limit for the tasks of each plugin
+    :param Limit per_operation: limit for the tasks of each operation
+    :param dict operations: limits for the tasks of specific operations, by operation name
+     (overriding per_operation)
+    """
+
+    def __init__(self,
+                 total=None,
+                 per_host=None,
+                 per_plugin=None,
+                 per_operation=None,
+                 operations=None,
+                 clock=time.time):
+        self._total = total
+        self._per_host = per_host
+        self._per_plugin = per_plugin
+        self._per_operation = per_operation
+        self._operations = operations or {}
+        self._clock = clock
+        self._throttles = {}
+        self._task_limits = {}
+        self._acquired = {}
+        self._task_groups = {}
+
+    def limit_group(self, name, task_ids, limit):
+        """
+        Applies a limit to a specific group of tasks, e.g. the operations of a single workflow
+        :param name: the name of the group
+        :param task_ids: the ids of the tasks in the group
+        :param Limit limit: the limit for the tasks of the group
+        """
+        for task_id in task_ids:
+            self._task_groups.setdefault(task_id, []).append((('group', name), limit))
+
+    def acquire(self, task):
+        """
+        Acquires all the limits which apply to the task
+        :param task: the operation task about to be dispatched
+        :return: True if the task may be dispatched, otherwise False
+        """
+        # reading the task's attributes goes through the storage, so the task's limits are only
+        # resolved once while it's waiting to be dispatched
+        limits = self._task_limits.get(task.id)
+        if limits is None:
+            limits = self._task_limits[task.id] = list(self._limits(task))
+        throttles = [self._get_throttle(key, limit) for key, limit in limits]
+        if not all(throttle.available() for throttle in throttles):
+            return False
+        for throttle in throttles:
+            throttle.acquire()
+        del self._task_limits[task.id]
+        self._acquired[task.id] = throttles
+        return True
+
+    def release(self, task):
+        """
+        Releases the limits acquired for the task, once it's no longer running
+        :param task: the operation task
+        """
+        for throttle in self._acquired.pop(task.id, ()):
+            throttle.release()
+
+    def _limits(self, task):
+        if self._total is not None:
+            yield None, self._total
+        if self._per_host is not None:
+            runs_on = task.runs_on
+            if runs_on is not None:
+                yield ('host', runs_on.host_fk or runs_on.id), self._per_host
+        if self._per_plugin is not None and task.plugin_name:
+            yield ('plugin', task.plugin_name), self._per_plugin
+        operation_name = _operation_name(task.name)
+        operation_limit = self._operations.get(operation_name, self._per_operation)
+        if operation_limit is not None:
+            yield ('operation', operation_name), operation_limit
+        for group_limit in self._task_groups.get(task.id, ()):
+            yield group_limit
+
+    def _get_throttle(self, key, limit):
+        throttle = self._throttles.get(key)
+        if throttle is None:
+            throttle = self._throttles[key] = _Throttle(limit, self._clock)
+        return throttle
+
+
+def _operation_name(task_name):
+    # task names are made of the operation name followed by the actor id
+    return task_name.rsplit('.', 1)[0]
@@ -0,0 +1,102 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Task duration statistics, aggregated per operation, node type and plugin
+"""
+
+from aria.storage import exceptions
+
+# statistics may be updated concurrently by several engines, in which case all but one of the
+# updates fail and are retried
+_MAX_RECORD_ATTEMPTS = 5
+
+
+def record_task_duration(task):
+    """
+    Adds the duration of a succeeded task to the statistics of its operation, node type and
+    plugin
+    :param task: the core operation task
+    """
+    model_task = task.model_task
+    if model_task.started_at is None or model_task.ended_at is None:
+        return
+    duration = (model_task.ended_at - model_task.started_at).total_seconds()
+
+    model_storage = task.context.model
+    operation_name, node_type, plugin_name = _statistics_key(model_task)
+    for attempt in xrange(_MAX_RECORD_ATTEMPTS):
+        statistics = model_storage.task_duration_statistics.list(
+            filters={'name': operation_name, 'node_type': node_type, 'plugin_name': plugin_name})
+        if statistics:
+            statistics = statistics[0]
+        else:
+            statistics = model_storage.task_duration_statistics.model_cls(
+                name=operation_name, node_type=node_type, plugin_name=plugin_name)
+        statistics.add(duration)
+        try:
+            model_storage.task_duration_statistics.put(statistics)
+            return
+        except exceptions.StorageError:
+            # the statistics were created or updated by another engine in the meantime
+            if attempt == _MAX_RECORD_ATTEMPTS - 1:
+                raise
+
+
+def get_statistics(model_storage, operation_name=None, node_type=None, plugin_name=None):
+    """
+    Returns the task duration statistics matching the given filters
+    :param model_storage: the model storage
+    :param operation_name: the operation name (all operations if None)
+    :param node_type: the node type (all node types if None)
+    :param plugin_name: the plugin name (all plugins if None)
+    :return: a list of TaskDurationStatistics models
+    """
+    filters = dict((key, value) for key, value in (('name', operation_name),
+                                                   ('node_type', node_type),
+                                                   ('plugin_name', plugin_name))
+                   if value is not None)
+    return list(model_storage.task_duration_statistics.iter(
+        filters=filters,
+        sort={'name': 'asc', 'node_type': 'asc', 'plugin_name': 'asc'}))
+
+
+class DurationEstimator(object):
+    """
+    Estimates the duration of operation tasks as the median duration of the previously succeeded
+    tasks of the same operation, node type and plugin, as recorded in the statistics
+    :param model_storage: the model storage
+    """
+
+    def __init__(self, model_storage):
+        self._durations = dict(((task_statistics.name,
+                                 task_statistics.node_type,
+                                 task_statistics.plugin_name), task_statistics.percentile(50))
+                               for task_statistics in get_statistics(model_storage))
+
+    def __call__(self, task):
+        """
+        :param task: the core operation task
+        :return: the estimated duration of the task in seconds, or None if there are no statistics
+        """
+        return self._durations.get(_statistics_key(task.model_task))
+
+
+def _statistics_key(model_task):
+    runs_on = model_task.runs_on
+    # task names are made of the operation name followed by the actor id
+    return (model_task.name.rsplit('.', 1)[0],
+            runs_on.node.type if runs_on is not None else '',
+            model_task.plugin_name or '')
@@ -103,7 +103,12 @@ class OperationTask(BaseTask):
     Operation tasks
     """
 
-    def __init__(self, api_task, *args, **kwargs):
+    def __init__(self, api_task, model_task=None, *args, **kwargs):
+        """
+        :param api_task: the api task
+        :param model_task: a task already stored for the api task (when resuming an execution);
+         a new task is stored if None
+        """
         super(OperationTask, self).__init__(id=api_task.id, **kwargs)
         self._workflow_context = api_task._workflow_context
         model_storage = api_task._workflow_context.model
@@ -118,37 +123,39 @@ class OperationTask(BaseTask):
         else:
             raise RuntimeError('No operation context could be created for {actor.model_cls}'
                                .format(actor=api_task.actor))
-        plugin = api_task.plugin
-        plugins = model_storage.plugin.list(filters={
-            'package_name': plugin.get('package_name', ''),
-            'package_version': plugin.get('package_version', '')
-        })
-        # Validation during installation ensures that at most one plugin can exists with provided
-        # package_name and package_version
-        operation_task = task_model_cls(
-            name=api_task.name,
-            operation_mapping=api_task.operation_mapping,
-            instance=api_task.actor,
-            inputs=api_task.inputs,
-            status=base_task_model.PENDING,
-            max_attempts=api_task.max_attempts,
-            retry_interval=api_task.retry_interval,
-            ignore_failure=api_task.ignore_failure,
-            plugin=plugins[0] if plugins else None,
-            plugin_name=plugin.get('name'),
-            execution=self._workflow_context.execution,
-            runs_on=api_task.runs_on
-        )
-        self._workflow_context.model.task.put(operation_task)
+        if model_task is None:
+            plugin = api_task.plugin
+            plugins = model_storage.plugin.list(filters={
+                'package_name': plugin.get('package_name', ''),
+                'package_version': plugin.get('package_version', '')
+            })
+            # Validation during installation ensures that at most one plugin can exists with
+            # provided package_name and package_version
+            model_task = task_model_cls(
+                name=api_task.name,
+                operation_mapping=api_task.operation_mapping,
+                instance=api_task.actor,
+                inputs=api_task.inputs,
+                status=base_task_model.PENDING,
+                max_attempts=api_task.max_attempts,
+                retry_interval=api_task.retry_interval,
+                ignore_failure=api_task.ignore_failure,
+                plugin=plugins[0] if plugins else None,
+                plugin_name=plugin.get('name'),
+                execution=self._workflow_context.execution,
+                runs_on=api_task.runs_on
+            )
+            self._workflow_context.model.task.put(model_task)
 
         self._ctx = context_class(name=api_task.name,
                                   model_storage=self._workflow_context.model,
                                   resource_storage=self._workflow_context.resource,
                                   deployment_id=self._workflow_context._deployment_id,
-                                  task_id=operation_task.id,
+                                  task_id=model_task.id,
                                   actor_id=api_task.actor.id,
                                   workdir=self._workflow_context._workdir)
-        self._task_id = operation_task.id
+        self._task_id = model_task.id
+        self._name = model_task.name
         self._update_fields = None
 
     @contextmanager
@@ -179,6 +186,14 @@ class OperationTask(BaseTask):
     def model_task(self, value):
         self._workflow_context.model.task.put(value)
 
+    @property
+    def name(self):
+        """
+        Returns the task name, without accessing the storage
+        :return: task name
+        """
+        return self._name
+
     @property
     def context(self):
         """
@@ -24,14 +24,27 @@ from . import task as core_task
 def build_execution_graph(
         task_graph,
         execution_graph,
+        keep_markers=False,
         start_cls=core_task.StartWorkflowTask,
         end_cls=core_task.EndWorkflowTask,
-        depends_on=()):
+        depends_on=(),
+        stored_tasks=None):
     """
     Translates the user graph to the execution graph
+
+    By default, sub-workflows are inlined into the execution graph: their tasks are wired directly
+    to the tasks preceding and following the sub-workflow, so no start and end markers are added
+    for them. Only the markers of the workflow itself are added, along with the sub-workflow
+    markers which join parallel tasks: wiring each of k parallel tasks to each of m parallel tasks
+    following them would take k*m edges, whereas a marker between them takes k+m.
+
     :param task_graph: The user's graph
-    :param workflow_context: The workflow
     :param execution_graph: The execution graph that is being built
+    :param keep_markers: whether to add start and end markers for sub-workflows as well (useful
+     for tracing sub-workflows' execution)
+    :param stored_tasks: when resuming an execution, a dict of task names to a deque of the tasks
+     already stored with that name; operation tasks are matched with the stored tasks in order
+     instead of storing new ones
     :param start_cls: internal use
     :param end_cls: internal use
     :param depends_on: internal use
@@ -40,39 +53,82 @@ def build_execution_graph(
     start_task = start_cls(id=_start_graph_suffix(task_graph.id))
     _add_task_and_dependencies(execution_graph, start_task, depends_on)
 
+    workflow_dependencies = _add_graph_tasks(task_graph,
+                                             execution_graph,
+                                             depends_on=[start_task],
+                                             keep_markers=keep_markers,
+                                             stored_tasks=stored_tasks)
+
+    # Insert end marker
+    end_task = end_cls(id=_end_graph_suffix(task_graph.id))
+    _add_task_and_dependencies(execution_graph, end_task, workflow_dependencies)
+
+
+def _add_graph_tasks(task_graph, execution_graph, depends_on, keep_markers, stored_tasks=None):
+    """
+    Adds the tasks of the user graph to the execution graph, where the graph's tasks which have no
+    dependencies depend on depends_on.
+    :return: the execution tasks which anything following the user graph should depend on
+    """
+    # The execution tasks which each api task's dependents should depend on. A sub-workflow is
+    # represented by its end marker, or by its own final tasks when it's inlined.
+    final_tasks = {}
+
     for api_task in task_graph.topological_order(reverse=True):
-        dependencies = task_graph.get_dependencies(api_task)
         operation_dependencies = _get_tasks_from_dependencies(
-            execution_graph,
-            dependencies,
-            default=[start_task])
+            final_tasks,
+            task_graph.get_dependencies(api_task),
+            default=depends_on)
 
         if isinstance(api_task, api.task.OperationTask):
             # Add the task an the dependencies
-            operation_task = core_task.OperationTask(api_task)
+            operation_task = core_task.OperationTask(
+                api_task, model_task=_pop_stored_task(stored_tasks, api_task.name))
             _add_task_and_dependencies(execution_graph, operation_task, operation_dependencies)
+            final_tasks[api_task.id] = [operation_task]
         elif isinstance(api_task, api.task.WorkflowTask):
-            # Build the graph recursively while adding start and end markers
-            build_execution_graph(
-                task_graph=api_task,
-                execution_graph=execution_graph,
-                start_cls=core_task.StartSubWorkflowTask,
-                end_cls=core_task.EndSubWorkflowTask,
-                depends_on=operation_dependencies
-            )
+            if keep_markers:
+                # Build the graph recursively while adding start and end markers
+                build_execution_graph(
+                    task_graph=api_task,
+                    execution_graph=execution_graph,
+                    keep_markers=keep_markers,
+                    start_cls=core_task.StartSubWorkflowTask,
+                    end_cls=core_task.EndSubWorkflowTask,
+                    depends_on=operation_dependencies,
+                    stored_tasks=stored_tasks
+                )
+                final_tasks[api_task.id] = \
+                    [execution_graph.node[_end_graph_suffix(api_task.id)]['task']]
+            else:
+                if len(operation_dependencies) > 1 and \
+                        _has_several(_get_tasks_without_dependencies(api_task)):
+                    start_task = core_task.StartSubWorkflowTask(
+                        id=_start_graph_suffix(api_task.id))
+                    _add_task_and_dependencies(execution_graph, start_task, operation_dependencies)
+                    operation_dependencies = [start_task]
+                sub_workflow_final_tasks = _add_graph_tasks(
+                    task_graph=api_task,
+                    execution_graph=execution_graph,
+                    depends_on=operation_dependencies,
+                    keep_markers=keep_markers,
+                    stored_tasks=stored_tasks)
+                if len(sub_workflow_final_tasks) > 1 and \
+                        next(task_graph.get_dependents(api_task), None) is not None:
+                    end_task = core_task.EndSubWorkflowTask(id=_end_graph_suffix(api_task.id))
+                    _add_task_and_dependencies(execution_graph, end_task, sub_workflow_final_tasks)
+                    sub_workflow_final_tasks = [end_task]
+                final_tasks[api_task.id] = sub_workflow_final_tasks
         elif isinstance(api_task, api.task.StubTask):
             stub_task = core_task.StubTask(id=api_task.id)
             _add_task_and_dependencies(execution_graph, stub_task, operation_dependencies)
+            final_tasks[api_task.id] = [stub_task]
         else:
             raise RuntimeError('Undefined state')
 
-    # Insert end marker
-    workflow_dependencies = _get_tasks_from_dependencies(
-        execution_graph,
-        _get_non_dependency_tasks(task_graph),
-        default=[start_task])
-    end_task = end_cls(id=_end_graph_suffix(task_graph.id))
-    _add_task_and_dependencies(execution_graph, end_task, workflow_dependencies)
+    return _get_tasks_from_dependencies(final_tasks,
+                                        _get_non_dependency_tasks(task_graph),
+                                        default=depends_on)
 
 
 def _add_task_and_dependencies(execution_graph, operation_task, operation_dependencies=()):
@@ -81,15 +137,25 @@ def _add_task_and_dependencies(execution_graph, operation_task, operation_depend
         execution_graph.add_edge(dependency.id, operation_task.id)
 
 
-def _get_tasks_from_dependencies(execution_graph, dependencies, default=()):
+def _pop_stored_task(stored_tasks, name):
+    """
+    Returns the next stored task with the given name, or None if there is none left (in which case
+    a new task is stored)
+    """
+    if stored_tasks and stored_tasks.get(name):
+        return stored_tasks[name].popleft()
+    return None
+
+
+def _get_tasks_from_dependencies(final_tasks, dependencies, default=()):
     """
     Returns task list from dependencies.
     """
-    return [execution_graph.node[dependency.id
-                                 if isinstance(dependency, (api.task.OperationTask,
-                                                            api.task.StubTask))
-                                 else _end_graph_suffix(dependency.id)]['task']
-            for dependency in dependencies] or default
+    tasks = {}
+    for dependency in dependencies:
+        for task in final_tasks[dependency.id]:
+            tasks.setdefault(task.id, task)
+    return tasks.values() or list(default)
 
 
 def _start_graph_suffix(id):
@@ -102,5 +168,15 @@ def _end_graph_suffix(id):
 
 def _get_non_dependency_tasks(graph):
     for task in graph.tasks:
-        if len(list(graph.get_dependents(task))) == 0:
+        if next(graph.get_dependents(task), None) is None:
             yield task
+
+
+def _get_tasks_without_dependencies(graph):
+    for task in graph.tasks:
+        if next(graph.get_dependencies(task), None) is None:
+            yield task
+
+
+def _has_several(iterator):
+    return next(iterator, None) is not None and next(iterator, None) is not None
@@ -133,4 +133,6 @@ class Read(Consumer):
                                                                origin_location)
         reader = self.context.reading.reader_source.get_reader(self.context.reading, location,
                                                                loader)
+        if self.context.reading.cache is not None:
+            return self.context.reading.cache.read(reader)
         return reader.read()
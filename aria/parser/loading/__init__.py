@@ -16,13 +16,15 @@
 
 from .exceptions import LoaderException, LoaderNotFoundError, DocumentNotFoundException
 from .context import LoadingContext
-from .loader import Loader
-from .source import LoaderSource, DefaultLoaderSource
+from .loader import Loader, LoadingMetrics
+from .source import LoaderSource, DefaultLoaderSource, CsarLoaderSource
 from .location import Location, UriLocation, LiteralLocation
 from .literal import LiteralLoader
-from .uri import UriTextLoader
-from .request import SESSION, SESSION_CACHE_PATH, RequestLoader, RequestTextLoader
+from .uri import UriTextLoader, UriResolutionCache, RESOLUTION_CACHE
+from .request import (get_session, SESSION_CACHE_PATH, SESSION_CACHE_MAX_SIZE, RequestSession,
+                      RequestMetrics, BoundedFileCache, RequestLoader, RequestTextLoader)
 from .file import FileTextLoader
+from .zip import ZipArchive, ZipTextLoader
 
 
 __all__ = (
@@ -31,15 +33,25 @@ __all__ = (
     'DocumentNotFoundException',
     'LoadingContext',
     'Loader',
+    'LoadingMetrics',
     'LoaderSource',
     'DefaultLoaderSource',
+    'CsarLoaderSource',
     'Location',
     'UriLocation',
     'LiteralLocation',
     'LiteralLoader',
     'UriTextLoader',
-    'SESSION',
+    'UriResolutionCache',
+    'RESOLUTION_CACHE',
+    'get_session',
     'SESSION_CACHE_PATH',
+    'SESSION_CACHE_MAX_SIZE',
+    'RequestSession',
+    'RequestMetrics',
+    'BoundedFileCache',
     'RequestLoader',
     'RequestTextLoader',
-    'FileTextLoader')
+    'FileTextLoader',
+    'ZipArchive',
+    'ZipTextLoader')
@@ -16,6 +16,9 @@
 
 from ...utils.collections import StrictList
 from .source import DefaultLoaderSource
+from .uri import RESOLUTION_CACHE
+from .request import get_session
+from .loader import LoadingMetrics
 
 
 class LoadingContext(object):
@@ -24,8 +27,29 @@ class LoadingContext(object):
 
     * :code:`loader_source`: For finding loader instances
     * :code:`prefixes`: List of additional prefixes for :class:`UriTextLoader`
+    * :code:`resolution_cache`: :class:`UriResolutionCache` for :class:`UriTextLoader` (the
+      process-wide cache by default, None to disable)
+    * :code:`request_session`: :class:`RequestSession` for :class:`RequestLoader` (the
+      process-wide session, see :func:`get_session`, unless set)
+    * :code:`timeout`: Timeout in seconds for requests
+    * :code:`metrics`: :class:`LoadingMetrics` for local loaders
     """
 
     def __init__(self):
         self.loader_source = DefaultLoaderSource()
         self.prefixes = StrictList(value_class=basestring)
+        self.resolution_cache = RESOLUTION_CACHE
+        self.timeout = 10  # in seconds
+        self.metrics = LoadingMetrics()
+        self._request_session = None
+
+    @property
+    def request_session(self):
+        if self._request_session is None:
+            # Created on first use, so that contexts that never make requests do not need it
+            return get_session()
+        return self._request_session
+
+    @request_session.setter
+    def request_session(self, value):
+        self._request_session = value
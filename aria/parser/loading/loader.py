@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 
 class Loader(object):
     """
@@ -32,3 +34,31 @@ class Loader(object):
 
     def load(self):
         raise NotImplementedError
+
+
+class LoadingMetrics(object):
+    """
+    Bytes loaded and time spent by the local loaders (remote requests are timed by
+    :class:`RequestMetrics`).
+
+    Properties:
+
+    * :code:`count`: Number of documents loaded
+    * :code:`size`: Total number of bytes loaded
+    * :code:`total_time`: Total time in seconds spent opening and loading
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0
+        self.total_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, size, duration):
+        with self._lock:
+            self.count += 1
+            self.size += size
+            self.total_time += duration
+
+    def __str__(self):
+        return '%d documents, %d bytes, %.3fs total' % (self.count, self.size, self.total_time)
@@ -13,23 +13,232 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from requests import Session
-from requests.exceptions import ConnectionError
-from cachecontrol import CacheControl
+import os
+import time
+import threading
+
+from requests import Session, Request
+from requests.exceptions import ConnectionError, Timeout
+from requests.structures import CaseInsensitiveDict
+from cachecontrol import CacheControlAdapter
 from cachecontrol.caches import FileCache
+from cachecontrol.controller import CacheController
 
+from ...utils import file as file_utils
 from .exceptions import LoaderException, DocumentNotFoundException
 from .loader import Loader
 
-SESSION = None
-SESSION_CACHE_PATH = '/tmp'
+SESSION_CACHE_PATH = file_utils.get_user_cache_dir('requests')
+SESSION_CACHE_MAX_SIZE = 64 * 1024 * 1024  # in bytes
+
+
+class RequestSession(object):
+    """
+    HTTP session shared by :class:`RequestLoader` instances.
+
+    Connections are pooled per host, so that the threads reading imports in parallel reuse them.
+    Responses are cached in a directory (evicting the least recently used when it grows over
+    :code:`cache_max_size` bytes) and revalidated with conditional requests when they have an
+    ETag or Last-Modified header.
+
+    In :code:`offline` mode no requests are made: documents are only loaded from the cache,
+    however stale.
+
+    Cached responses are unpickled when read, so the cache directory is made private to the
+    current user (see :func:`aria.utils.file.make_private_dirs`).
+    """
+
+    def __init__(self, cache_directory=None, cache_max_size=SESSION_CACHE_MAX_SIZE,
+                 pool_connections=10, pool_maxsize=10, offline=False):
+        cache_directory = cache_directory or SESSION_CACHE_PATH
+        file_utils.make_private_dirs(cache_directory)
+        self.offline = offline
+        self.metrics = RequestMetrics()
+        self.cache = BoundedFileCache(cache_directory, cache_max_size)
+        self._adapter = CacheControlAdapter(cache=self.cache,
+                                            controller_class=_RevalidatingCacheController,
+                                            pool_connections=pool_connections,
+                                            pool_maxsize=pool_maxsize)
+        self._session = Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+
+    def get(self, uri, headers=None, timeout=None):
+        """
+        Gets the response for the URI, from the cache if possible.
+
+        :raises DocumentNotFoundException: if offline and the URI is not cached
+        """
+
+        start = time.time()
+        try:
+            if self.offline:
+                response = self._get_cached(uri, headers)
+            else:
+                response = self._session.get(uri, headers=headers, timeout=timeout)
+        except Exception:
+            self.metrics.record(time.time() - start, failed=True)
+            raise
+        self.metrics.record(time.time() - start, from_cache=getattr(response, 'from_cache',
+                                                                    False))
+        return response
+
+    def close(self):
+        self._session.close()
+
+    def _get_cached(self, uri, headers):
+        request = self._session.prepare_request(Request('GET', uri, headers=headers))
+        controller = self._adapter.controller
+        cached = controller.serializer.loads(request,
+                                             self.cache.get(controller.cache_url(uri)))
+        if not cached:
+            raise DocumentNotFoundException('document not cached (offline): "%s"' % uri)
+        return self._adapter.build_response(request, cached, from_cache=True)
+
+
+class RequestMetrics(object):
+    """
+    Timing of the requests made by a :class:`RequestSession`.
+
+    Properties:
+
+    * :code:`count`: Number of requests
+    * :code:`from_cache`: Number of responses from the cache (including those revalidated)
+    * :code:`failed`: Number of requests that raised an exception
+    * :code:`total_time`: Total time in seconds
+    * :code:`max_time`: Longest time in seconds
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.from_cache = 0
+        self.failed = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    def record(self, duration, from_cache=False, failed=False):
+        with self._lock:
+            self.count += 1
+            if from_cache:
+                self.from_cache += 1
+            if failed:
+                self.failed += 1
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+
+    def __str__(self):
+        return '%d requests (%d from cache, %d failed), %.3fs total, %.3fs mean, %.3fs max' % (
+            self.count, self.from_cache, self.failed, self.total_time, self.mean_time,
+            self.max_time)
+
+
+class BoundedFileCache(FileCache):
+    """
+    :class:`FileCache` that evicts the least recently used entries when the total size of the
+    directory grows over :code:`max_size` bytes.
+
+    The directory is scanned whenever an entry is written, which is rare compared to reads.
+    """
+
+    def __init__(self, directory, max_size=SESSION_CACHE_MAX_SIZE, **kwargs):
+        super(BoundedFileCache, self).__init__(directory, **kwargs)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = super(BoundedFileCache, self).get(key)
+        if value is not None:
+            try:
+                os.utime(self._fn(key), None)
+            except OSError:
+                pass
+        return value
+
+    def set(self, key, value):
+        super(BoundedFileCache, self).set(key, value)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            size = 0
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    size += stat.st_size
+            if size <= self.max_size:
+                return
+            entries.sort()
+            for _, entry_size, path in entries:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= entry_size
+                if size <= self.max_size:
+                    break
+
+
+class _RevalidatingCacheController(CacheController):
+    """
+    Also caches responses that only have a Last-Modified header, so that they can be revalidated
+    with If-Modified-Since.
+    """
+
+    def cached_request(self, request):
+        cache_url = self.cache_url(request.url)
+        cache_data = self.cache.get(cache_url)
+        response = super(_RevalidatingCacheController, self).cached_request(request)
+        if (not response) and cache_data and (self.cache.get(cache_url) is None):
+            # The base controller purges stale responses without an ETag
+            cached = self.serializer.loads(request, cache_data)
+            if cached and ('last-modified' in CaseInsensitiveDict(cached.headers)):
+                self.cache.set(cache_url, cache_data)
+        return response
+
+    def cache_response(self, request, response, body=None):
+        super(_RevalidatingCacheController, self).cache_response(request, response, body)
+        headers = CaseInsensitiveDict(response.headers)
+        if (response.status == 200) and ('etag' not in headers) \
+                and ('last-modified' in headers) \
+                and ('no-store' not in self.parse_cache_control(headers)) \
+                and ('no-store' not in self.parse_cache_control(request.headers)):
+            self.cache.set(self.cache_url(request.url),
+                           self.serializer.dumps(request, response, body=body))
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the process-wide :class:`RequestSession`, which is created on first use.
+    """
+
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = RequestSession()
+        return _SESSION
 
 
 class RequestLoader(Loader):
     """
     Base class for ARIA request-based loaders.
 
-    Extracts a document from a URI by performing a request.
+    Extracts a document from a URI by performing a request via the :class:`RequestSession` of
+    the :class:`LoadingContext`.
 
     Note that the "file:" schema is not supported: :class:`FileTextLoader` should
     be used instead.
@@ -47,12 +256,13 @@ class RequestLoader(Loader):
         pass
 
     def open(self):
-        global SESSION
-        if SESSION is None:
-            SESSION = CacheControl(Session(), cache=FileCache(SESSION_CACHE_PATH))
-
         try:
-            self._response = SESSION.get(self.uri, headers=self.headers)
+            self._response = self.context.request_session.get(self.uri, headers=self.headers,
+                                                              timeout=self.context.timeout)
+        except DocumentNotFoundException:
+            raise
+        except Timeout as e:
+            raise LoaderException('request timeout: "%s"' % self.uri, cause=e)
         except ConnectionError as e:
             raise LoaderException('request connection error: "%s"' % self.uri, cause=e)
         except Exception as e:
@@ -13,9 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import posixpath
+from urlparse import urlparse
+
 from .location import LiteralLocation, UriLocation
 from .literal import LiteralLoader
 from .uri import UriTextLoader
+from .zip import ZipTextLoader
 
 
 class LoaderSource(object):
@@ -42,3 +47,47 @@ class DefaultLoaderSource(LoaderSource):
             return LiteralLoader(location)
 
         return super(DefaultLoaderSource, self).get_loader(context, location, origin_location)
+
+
+class CsarLoaderSource(DefaultLoaderSource):
+    """
+    Generates a :class:`ZipTextLoader` for a :class:`UriLocation` found in a :class:`ZipArchive`
+    (such as a CSAR), so that it can be parsed without extracting it. Other locations are handled
+    by :class:`DefaultLoaderSource`.
+
+    Relative URIs are looked up in the archive relative to the document importing them, and then
+    relative to each of the :code:`prefixes` (the root of the archive by default).
+    """
+
+    def __init__(self, archive, prefixes=None):
+        self.archive = archive
+        self.prefixes = prefixes if prefixes is not None else ('',)
+
+    def get_loader(self, context, location, origin_location):
+        if isinstance(location, UriLocation):
+            name = self._get_name(location.uri, origin_location)
+            if name is not None:
+                location.uri = self.archive.get_uri(name)
+                return ZipTextLoader(context, self.archive, location, origin_location)
+
+        return super(CsarLoaderSource, self).get_loader(context, location, origin_location)
+
+    def _get_name(self, uri, origin_location):
+        name = self.archive.get_name(uri)
+        if name is not None:
+            return name
+        if urlparse(uri).scheme or os.path.isabs(uri):
+            return None
+
+        candidates = []
+        if isinstance(origin_location, UriLocation):
+            origin_name = self.archive.get_name(origin_location.uri)
+            if origin_name is not None:
+                candidates.append(posixpath.join(posixpath.dirname(origin_name), uri))
+        candidates += [posixpath.join(prefix, uri) for prefix in self.prefixes]
+
+        for candidate in candidates:
+            candidate = posixpath.normpath(candidate)
+            if candidate in self.archive:
+                return candidate
+        return None
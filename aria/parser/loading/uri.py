@@ -14,7 +14,11 @@
 # limitations under the License.
 
 import os
-from urlparse import urljoin
+import json
+import time
+import tempfile
+import threading
+from urlparse import urljoin, urlparse
 
 from ...extension import parser
 from ...utils.collections import StrictList
@@ -25,6 +29,102 @@ from .request import RequestTextLoader
 from .exceptions import DocumentNotFoundException
 
 
+class UriResolutionCache(object):
+    """
+    Caches the resolution of URIs against search prefixes by :class:`UriTextLoader`, so that the
+    failed attempts preceding a successful one (or a failure at all prefixes) are not repeated.
+
+    Entries map a URI and its list of prefixes (and the current directory, if any of them is a
+    relative path) to the URI it was found at, or to None if it was not found. Entries expire
+    after :code:`ttl` seconds, except for entries resolved to a file that were only preceded by
+    other files: :class:`UriTextLoader` validates those on every hit, by checking that none of the
+    preceding files exists now and by opening the file.
+
+    The cache is optionally persistent: if a path is given, entries are loaded from it and
+    :meth:`save` writes them back.
+    """
+
+    def __init__(self, path=None, ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        if (path is not None) and os.path.isfile(path):
+            try:
+                with open(path) as the_file:
+                    entries = json.load(the_file)
+                for uri, cwd, prefixes, resolved_uri, timestamp, expires in entries:
+                    self._entries[(uri, cwd, tuple(prefixes))] = (resolved_uri, timestamp, expires)
+            except (IOError, ValueError, TypeError):
+                # A corrupt (or older) cache file is ignored
+                self._entries.clear()
+
+    def get(self, uri, prefixes):
+        """
+        Returns a tuple of whether there is an entry, and the URI it resolves to (None if the URI
+        was not found).
+        """
+
+        entry = self._entries.get(_get_key(uri, prefixes))
+        if entry is None:
+            return False, None
+        resolved_uri, timestamp, expires = entry
+        if expires and (time.time() - timestamp > self.ttl):
+            return False, None
+        return True, resolved_uri
+
+    def put(self, uri, prefixes, resolved_uri, expires=True):
+        """
+        Adds an entry. Entries that do not expire must be validated by the caller when used.
+        """
+
+        self._entries[_get_key(uri, prefixes)] = (resolved_uri, time.time(), expires)
+
+    def discard(self, uri, prefixes):
+        self._entries.pop(_get_key(uri, prefixes), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def save(self):
+        """
+        Writes the entries to the cache file, if there is one.
+        """
+
+        if self.path is None:
+            return
+        with self._lock:
+            entries = [(uri, cwd, prefixes, resolved_uri, timestamp, expires)
+                       for (uri, cwd, prefixes), (resolved_uri, timestamp, expires)
+                       in self._entries.items()]
+            # Write to a temporary file and rename it, so that concurrent readers never see a
+            # partial file
+            the_file = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(self.path)),
+                                                   suffix='.tmp', delete=False)
+            try:
+                with the_file:
+                    json.dump(entries, the_file)
+                os.rename(the_file.name, self.path)
+            except BaseException:
+                if os.path.isfile(the_file.name):
+                    os.remove(the_file.name)
+                raise
+
+
+def _get_key(uri, prefixes):
+    # Relative file paths are tried against the current directory
+    relative = any(_is_relative_path(value) for value in [uri] + list(prefixes))
+    return (uri, os.getcwd() if relative else None, tuple(prefixes))
+
+
+def _is_relative_path(uri):
+    url = urlparse(uri)
+    return (not url.scheme) and (not os.path.isabs(url.path))
+
+
+RESOLUTION_CACHE = UriResolutionCache()
+
+
 class UriTextLoader(Loader):
     """
     Base class for ARIA URI loaders.
@@ -42,6 +142,7 @@ class UriTextLoader(Loader):
     def __init__(self, context, location, origin_location=None):
         self.context = context
         self.location = location
+        self.origin_location = origin_location
         self._prefixes = StrictList(value_class=basestring)
         self._loader = None
 
@@ -60,23 +161,58 @@ class UriTextLoader(Loader):
         add_prefixes(parser.uri_loader_prefix())
 
     def open(self):
+        uri = self.location.uri
+        candidate_uris = self._get_candidate_uris()
+        cache = self.context.resolution_cache
+        if cache is not None:
+            found, resolved_uri = cache.get(uri, self._prefixes)
+            if found:
+                if resolved_uri is None:
+                    if not _any_file_exists(candidate_uris):
+                        raise DocumentNotFoundException('document not found at URI: "%s"'
+                                                        % self.location)
+                    # Stale failure: one of the files has been created since
+                    cache.discard(uri, self._prefixes)
+                elif _any_file_exists(candidate_uris, resolved_uri):
+                    # Stale entry: a file that comes first has been created since
+                    cache.discard(uri, self._prefixes)
+                else:
+                    try:
+                        self._open(resolved_uri)
+                        return
+                    except DocumentNotFoundException:
+                        # Stale entry
+                        cache.discard(uri, self._prefixes)
+
         try:
-            self._open(self.location.uri)
-            return
+            self._resolve(candidate_uris)
         except DocumentNotFoundException:
-            # Try prefixes in order
-            for prefix in self._prefixes:
-                if as_file(prefix) is not None:
-                    uri = os.path.join(prefix, self.location.uri)
-                else:
-                    uri = urljoin(prefix, self.location.uri)
-                try:
-                    self._open(uri)
-                    return
-                except DocumentNotFoundException:
-                    pass
+            if cache is not None:
+                cache.put(uri, self._prefixes, None)
+            raise
+        if cache is not None:
+            cache.put(uri, self._prefixes, self.location.uri,
+                      _expires(candidate_uris, self.location.uri))
+
+    def _resolve(self, candidate_uris):
+        # Try the URI itself, then prefixes in order
+        for uri in candidate_uris:
+            try:
+                self._open(uri)
+                return
+            except DocumentNotFoundException:
+                pass
         raise DocumentNotFoundException('document not found at URI: "%s"' % self.location)
 
+    def _get_candidate_uris(self):
+        candidate_uris = [self.location.uri]
+        for prefix in self._prefixes:
+            if as_file(prefix) is not None:
+                candidate_uris.append(os.path.join(prefix, self.location.uri))
+            else:
+                candidate_uris.append(urljoin(prefix, self.location.uri))
+        return candidate_uris
+
     def close(self):
         if self._loader is not None:
             self._loader.close()
@@ -94,3 +230,26 @@ class UriTextLoader(Loader):
         loader.open() # might raise an exception
         self._loader = loader
         self.location.uri = uri
+
+
+def _any_file_exists(candidate_uris, resolved_uri=None):
+    # Checks the candidates that are files, up to the resolved one
+    for uri in candidate_uris:
+        the_file = as_file(uri)
+        if resolved_uri in (uri, the_file):
+            break
+        if (the_file is not None) and os.path.isfile(the_file):
+            return True
+    return False
+
+
+def _expires(candidate_uris, resolved_uri):
+    # Resolutions to a file that was only preceded by other files can be validated when used, but
+    # remote URIs can change without notice
+    for uri in candidate_uris:
+        the_file = as_file(uri)
+        if the_file is None:
+            return True
+        if the_file == resolved_uri:
+            return False
+    return True
@@ -0,0 +1,127 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import zipfile
+
+from .loader import Loader
+from .exceptions import LoaderException, DocumentNotFoundException
+
+
+class ZipArchive(object):
+    """
+    A zip archive (such as a CSAR) whose members are read lazily, without extracting it.
+
+    The central directory is read once, when the archive is opened. Members are addressed by URIs
+    of the form :code:`<archive path>!/<member name>`, so that relative imports can be resolved
+    against them like against other URIs.
+    """
+
+    SEPARATOR = '!/'
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        try:
+            self._zip = zipfile.ZipFile(self.path)
+        except (IOError, zipfile.BadZipfile) as e:
+            raise LoaderException('zip error: "%s"' % self.path, cause=e)
+        self._names = set(name for name in self._zip.namelist() if not name.endswith('/'))
+
+    @property
+    def names(self):
+        return self._names
+
+    def get_uri(self, name):
+        return self.path + self.SEPARATOR + name
+
+    def get_name(self, uri):
+        """
+        Returns the member name for a URI in this archive, or None if the URI is not in this
+        archive.
+        """
+
+        prefix = self.path + self.SEPARATOR
+        if uri.startswith(prefix):
+            return uri[len(prefix):]
+        return None
+
+    def read(self, name):
+        # Opening a member opens its own file handle, so this is safe for concurrent threads
+        try:
+            return self._zip.read(name)
+        except KeyError as e:
+            raise DocumentNotFoundException('member not found in "%s": "%s"' % (self.path, name),
+                                            cause=e)
+        except (IOError, zipfile.BadZipfile) as e:
+            raise LoaderException('zip error: "%s"' % self.get_uri(name), cause=e)
+
+    def open(self, name):
+        """
+        Opens a member for streaming.
+        """
+
+        try:
+            return self._zip.open(name)
+        except KeyError as e:
+            raise DocumentNotFoundException('member not found in "%s": "%s"' % (self.path, name),
+                                            cause=e)
+        except (IOError, zipfile.BadZipfile) as e:
+            raise LoaderException('zip error: "%s"' % self.get_uri(name), cause=e)
+
+    def extract(self, directory, names=None):
+        """
+        Extracts members (all of them by default) into a directory.
+        """
+
+        self._zip.extractall(directory, names)
+
+    def close(self):
+        self._zip.close()
+
+    def __contains__(self, name):
+        return name in self._names
+
+
+class ZipTextLoader(Loader):
+    """
+    ARIA zip member text loader.
+
+    Extracts a text document from a member of a :class:`ZipArchive`. The default encoding is
+    UTF-8, but other supported encoding can be specified instead.
+    """
+
+    def __init__(self, context, archive, location, origin_location=None, encoding='utf-8'):
+        self.context = context
+        self.archive = archive
+        self.location = location
+        self.origin_location = origin_location
+        self.encoding = encoding
+        self._name = archive.get_name(location.uri)
+
+    def open(self):
+        if self._name not in self.archive:
+            raise DocumentNotFoundException('document not found at URI: "%s"' % self.location)
+
+    def load(self):
+        start = time.time()
+        raw = self.archive.read(self._name)
+        try:
+            data = raw.decode(self.encoding)
+        except Exception as e:
+            raise LoaderException('zip member error: "%s"' % self.location, cause=e)
+        if getattr(self.context, 'metrics', None) is not None:
+            self.context.metrics.record(len(raw), time.time() - start)
+        return data
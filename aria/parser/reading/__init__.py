@@ -17,6 +17,8 @@ from .locator import Locator
 from .json import JsonReader
 from .jinja import JinjaReader
 from .context import ReadingContext
+from .locations import LocationIndex
+from .cache import ReadingCache
 from .source import ReaderSource, DefaultReaderSource
 from .exceptions import (ReaderException,
                          ReaderNotFoundError,
@@ -32,6 +34,8 @@ __all__ = (
     'ReaderSource',
     'DefaultReaderSource',
     'ReadingContext',
+    'LocationIndex',
+    'ReadingCache',
     'RawReader',
     'Locator',
     'YamlReader',
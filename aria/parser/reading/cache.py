@@ -0,0 +1,219 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import  # so we can import standard 'json'
+
+import os
+import json
+import hashlib
+import datetime
+import tempfile
+
+from ...VERSION import version
+from ...utils.collections import OrderedDict
+from ..loading import UriLocation
+from .yaml import YamlReader
+from .json import JsonReader
+from .locator import Locator
+
+
+class ReadingCache(object):
+    """
+    Disk-backed cache of agnostic raw data and its locators.
+
+    Entries are keyed by the canonical URI of the document, a hash of its content, and the ARIA
+    version, so that a changed document or a different ARIA version never uses a stale entry.
+    They are stored as JSON with tagged containers, so that loading an entry never executes code
+    and reproduces the raw data types (and locators) produced by the reader. Raw data with values
+    that cannot be represented this way is not cached.
+
+    Only documents at :class:`aria.loading.UriLocation` that are read by :class:`YamlReader` or
+    :class:`JsonReader` are cached: other readers (e.g. :class:`JinjaReader`) may produce
+    different raw data from the same content.
+    """
+
+    READER_CLASSES = (YamlReader, JsonReader)
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def read(self, reader):
+        """
+        Reads the raw data via the reader, or from the cache if it has an entry for the document.
+        """
+
+        if not (isinstance(reader.location, UriLocation) and
+                isinstance(reader, self.READER_CLASSES)):
+            return reader.read()
+
+        # Note that loading also canonicalizes the location's URI
+        data = reader.load()
+        path = self._get_path(reader, data)
+
+        raw = self._get(path, reader.loader.location)
+        if raw is None:
+            raw = reader.read()
+            self._put(path, raw)
+        return raw
+
+    def _get_path(self, reader, data):
+        if isinstance(data, unicode):
+            data = data.encode('utf8')
+        key = '\n'.join((version,
+                         reader.__class__.__name__,
+                         reader.location.uri,
+                         hashlib.sha256(data).hexdigest()))
+        return os.path.join(self.directory, '%s.json' % hashlib.sha256(key).hexdigest())
+
+    @staticmethod
+    def _get(path, location):
+        try:
+            with open(path, 'rb') as the_file:
+                entry = json.load(the_file)
+            encoded_raw, encoded_locator = entry
+            raw = _decode(encoded_raw)
+            if encoded_locator is not None:
+                setattr(raw, '_locator', _decode_locator(encoded_locator, location))
+            return raw
+        except (EnvironmentError, ValueError, TypeError, AttributeError):
+            # A missing or corrupt entry is a cache miss
+            return None
+
+    def _put(self, path, raw):
+        try:
+            locator = getattr(raw, '_locator', None)
+            entry = json.dumps((_encode(raw),
+                                _encode_locator(locator) if locator is not None else None),
+                               separators=(',', ':'))
+        except UnsupportedValueError:
+            return
+
+        try:
+            if not os.path.isdir(self.directory):
+                try:
+                    os.makedirs(self.directory)
+                except OSError:
+                    # Possibly created by another thread in the meantime
+                    if not os.path.isdir(self.directory):
+                        raise
+            # Write to a temporary file and rename it, so that concurrent readers never see a
+            # partial entry
+            the_file = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp',
+                                                   delete=False)
+        except EnvironmentError:
+            # The cache is an optimization: failing to store an entry should not fail the reading
+            return
+        try:
+            with the_file:
+                the_file.write(entry)
+            os.rename(the_file.name, path)
+        except EnvironmentError:
+            if os.path.isfile(the_file.name):
+                os.remove(the_file.name)
+
+
+class UnsupportedValueError(ValueError):
+    """
+    Raw data contains a value that cannot be stored in the reading cache.
+    """
+
+
+# Scalars that JSON represents as is; all other values are stored as [tag, value] lists
+
+_PLAIN_TYPES = (unicode, bool, int, long, float, type(None))
+
+
+def _encode(value):  # pylint: disable=too-many-return-statements
+    if isinstance(value, dict):
+        return ['d', [[_encode(k), _encode(v)] for k, v in value.iteritems()]]
+    elif isinstance(value, list):
+        return ['l', [_encode(v) for v in value]]
+    elif isinstance(value, tuple):
+        return ['t', [_encode(v) for v in value]]
+    elif isinstance(value, (set, frozenset)):
+        return ['s', [_encode(v) for v in value]]
+    elif isinstance(value, str):
+        # Latin-1 maps every byte to a code point
+        return ['b', value.decode('latin-1')]
+    elif isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            raise UnsupportedValueError('timezone-aware datetime')
+        return ['dt', [value.year, value.month, value.day, value.hour, value.minute,
+                       value.second, value.microsecond]]
+    elif isinstance(value, datetime.date):
+        return ['da', [value.year, value.month, value.day]]
+    elif isinstance(value, unicode):
+        # Also unwraps the locatable types
+        return unicode(value)
+    elif isinstance(value, bool) or (value is None):
+        return value
+    elif isinstance(value, (int, long)):
+        return int(value)
+    elif isinstance(value, float):
+        return float(value)
+    raise UnsupportedValueError(type(value).__name__)
+
+
+def _decode(encoded):
+    if isinstance(encoded, list):
+        tag, value = encoded
+        if tag == 'd':
+            return OrderedDict((_decode_key(k), _decode(v)) for k, v in value)
+        elif tag == 'l':
+            return [_decode(v) for v in value]
+        elif tag == 't':
+            return tuple(_decode(v) for v in value)
+        elif tag == 's':
+            return set(_decode_key(v) for v in value)
+        elif tag == 'b':
+            return value.encode('latin-1')
+        elif tag == 'dt':
+            return datetime.datetime(*value)
+        elif tag == 'da':
+            return datetime.date(*value)
+        raise ValueError('unknown tag in reading cache entry: %r' % tag)
+    elif isinstance(encoded, _PLAIN_TYPES):
+        return encoded
+    raise ValueError('unexpected value in reading cache entry: %r' % encoded)
+
+
+def _decode_key(encoded):
+    key = _decode(encoded)
+    if isinstance(key, (dict, list, set)):
+        raise ValueError('unhashable key in reading cache entry')
+    return key
+
+
+def _encode_locator(locator):
+    children = locator.children
+    if isinstance(children, list):
+        children = ['l', [_encode_locator(child) for child in children]]
+    elif isinstance(children, dict):
+        children = ['d', [[_encode(k), _encode_locator(child)]
+                          for k, child in children.iteritems()]]
+    elif children is not None:
+        raise UnsupportedValueError('locator children: %s' % type(children).__name__)
+    return [locator.line, locator.column, children]
+
+
+def _decode_locator(encoded, location):
+    line, column, children = encoded
+    if children is not None:
+        tag, value = children
+        if tag == 'l':
+            children = [_decode_locator(child, location) for child in value]
+        elif tag == 'd':
+            children = dict((_decode_key(k), _decode_locator(child, location))
+                            for k, child in value)
+        else:
+            raise ValueError('unknown tag in reading cache entry: %r' % tag)
+    return Locator(location, line, column, children)
@@ -10,8 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from ...utils.threading import LockedList
 from .source import DefaultReaderSource
+from .locations import LocationIndex
 
 
 class ReadingContext(object):
@@ -20,10 +20,13 @@ class ReadingContext(object):
 
     * :code:`reader_source`: For finding reader instances
     * :code:`reader`: Overrides :code:`reader_source` with a specific class
+    * :code:`cache`: Optional :class:`ReadingCache` for raw data read from URIs
+    * :code:`locations`: :class:`LocationIndex` of the locations already read, and of which
+      location imported each of them
     """
 
     def __init__(self):
         self.reader_source = DefaultReaderSource()
         self.reader = None
-
-        self._locations = LockedList()  # for keeping track of locations already read
+        self.cache = None
+        self.locations = LocationIndex()
@@ -12,10 +12,11 @@
 
 import os
 
-from jinja2 import Template
+from jinja2.sandbox import SandboxedEnvironment
 
 from ...VERSION import version
-from ..loading import LiteralLocation, LiteralLoader
+from ...utils.templates import TemplateCache
+from ..loading import LiteralLocation, UriLocation
 from .reader import Reader
 from .exceptions import ReaderSyntaxError
 
@@ -25,31 +26,41 @@ CONTEXT = {
     'ARIA_VERSION': version,
     'ENV': os.environ}
 
+TEMPLATE_CACHE = TemplateCache(environment_class=SandboxedEnvironment, render_capacity=100)
+
 
 class JinjaReader(Reader):
     """
     ARIA Jinja reader.
 
-    Forwards the rendered result to a new reader in the reader source.
+    Renders the template in a sandboxed environment, and forwards the rendered result to a new
+    reader in the reader source: the one for the location with the ".jinja" extension stripped
+    off, or the literal reader. The rendered result keeps the original location, so the document
+    is still read only once and its locators point at the template.
+
+    Compiled templates and rendered results are cached in :code:`template_cache`.
     """
 
+    template_cache = TEMPLATE_CACHE
+
     def read(self):
         data = self.load()
         try:
-            data = str(data)
-            template = Template(data)
-            literal = template.render(CONTEXT)
+            literal = self.template_cache.render(data, CONTEXT)
             # TODO: might be useful to write the literal result to a file for debugging
             location = self.location
-            if isinstance(location, basestring) and location.endswith('.jinja'):
-                # Use reader based on the location with the ".jinja" prefix stripped off
-                location = location[:-6]
-                next_reader = self.context.reading.reader_source.get_reader(
-                    self.context, LiteralLocation(literal, name=location), LiteralLoader(literal))
+            if isinstance(location, UriLocation) and location.uri.endswith('.jinja'):
+                # Use reader based on the location with the ".jinja" extension stripped off
+                next_reader = self.context.reader_source.get_reader(
+                    self.context, UriLocation(location.uri[:-6]), self.loader)
             else:
                 # Use reader for literal loader
-                next_reader = self.context.reading.reader_source.get_reader(
-                    self.context, LiteralLocation(literal), LiteralLoader(literal))
+                next_reader = self.context.reader_source.get_reader(
+                    self.context, LiteralLocation(literal), self.loader)
+            # The original location was already read by us, so the rendered result is handed
+            # over as already loaded data
+            next_reader.location = location
+            next_reader.preload(literal)
             return next_reader.read()
         except Exception as e:
             raise ReaderSyntaxError('Jinja: %s' % e, cause=e)
@@ -0,0 +1,127 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import urlparse
+import threading
+
+from ...utils.uris import as_file
+from ..loading import UriLocation, LiteralLocation
+
+
+class LocationIndex(object):
+    """
+    Keeps track of the locations already read, and of the location that first imported each of
+    them.
+
+    Locations are canonicalized into hashable keys (see :func:`get_location_key`), so checking
+    whether a location was already read is a single dict operation. The check and the insertion
+    are one atomic :code:`setdefault`, so no lock is needed even when imports are read in
+    parallel.
+
+    Locations that have no key (literals with unhashable content, e.g. already parsed data, and
+    other location types) are compared with :meth:`aria.loading.Location.is_equivalent` instead,
+    by scanning them under a lock.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._unkeyed_entries = []
+        self._unkeyed_lock = threading.Lock()
+
+    def add(self, location, origin_location=None):
+        """
+        Adds a location, unless an equivalent location was already added.
+
+        :param location: the location being read
+        :param origin_location: the location that imported it, if any
+        :return: True if the location was added, False if it was already there
+        """
+
+        entry = (location, origin_location)
+        key = get_location_key(location)
+        if key is None:
+            with self._unkeyed_lock:
+                if self._find_unkeyed_entry(location) is not None:
+                    return False
+                self._unkeyed_entries.append(entry)
+                return True
+        return self._entries.setdefault(key, entry) is entry
+
+    def get_origin_location(self, location):
+        """
+        Returns the location that first imported the location, or None if it was not imported
+        (or was not read at all).
+        """
+
+        entry = self._get_entry(location)
+        return entry[1] if entry is not None else None
+
+    def iter_imports(self):
+        """
+        Iterates the import dependency graph as :code:`(origin_location, location)` pairs, where
+        :code:`origin_location` is None for locations that were not imported.
+        """
+
+        with self._unkeyed_lock:
+            entries = self._entries.values() + self._unkeyed_entries
+        for location, origin_location in entries:
+            yield origin_location, location
+
+    def _get_entry(self, location):
+        key = get_location_key(location)
+        if key is None:
+            with self._unkeyed_lock:
+                return self._find_unkeyed_entry(location)
+        return self._entries.get(key)
+
+    def _find_unkeyed_entry(self, location):
+        for entry in self._unkeyed_entries:
+            if entry[0].is_equivalent(location):
+                return entry
+        return None
+
+    def __contains__(self, location):
+        return self._get_entry(location) is not None
+
+    def __len__(self):
+        return len(self._entries) + len(self._unkeyed_entries)
+
+
+def get_location_key(location):
+    """
+    Returns a hashable key that is equal for equivalent locations, or None if the location cannot
+    be keyed.
+
+    Files are keyed by their device and inode when they exist (so that links to the same file are
+    equivalent), and otherwise by their normalized absolute path. Other URIs are keyed with their
+    scheme and host in lower case. Literals are keyed by their content, if it is hashable.
+    """
+
+    if isinstance(location, UriLocation):
+        path = as_file(location.uri)
+        if path is not None:
+            try:
+                stat = os.stat(path)
+                return ('inode', stat.st_dev, stat.st_ino)
+            except OSError:
+                return ('file', os.path.normcase(os.path.normpath(path)))
+        url = urlparse.urlparse(location.uri)
+        url = url._replace(scheme=url.scheme.lower(), netloc=url.netloc.lower())
+        return ('uri', urlparse.urlunparse(url))
+    elif isinstance(location, LiteralLocation):
+        try:
+            hash(location.content)
+        except TypeError:
+            return None
+        return ('literal', location.content)
+    return None
@@ -13,19 +13,20 @@
 from ...utils.console import puts, Colored, indent
 
 # We are inheriting the primitive types in order to add the ability to set
-# an attribute (_locator) on them.
+# an attribute (_locator) on them. A slot is used instead of an instance dict, which would
+# otherwise take more memory than the value itself.
 
 
 class LocatableString(unicode):
-    pass
+    __slots__ = ('_locator',)
 
 
 class LocatableInt(int):
-    pass
+    __slots__ = ('_locator',)
 
 
 class LocatableFloat(float):
-    pass
+    __slots__ = ('_locator',)
 
 
 def wrap(value):
@@ -42,7 +43,13 @@ def wrap(value):
 class Locator(object):
     """
     Stores location information (line and column numbers) for agnostic raw data.
+
+    There is one locator per raw value, so they use slots to keep their memory footprint small.
+    Copies of raw data share locators instead of copying them (like :code:`copy_locators` does).
     """
+
+    __slots__ = ('location', 'line', 'column', 'children')
+
     def __init__(self, location, line, column, children=None):
         self.location = location
         self.line = line
@@ -91,6 +98,12 @@ class Locator(object):
                     raise ValueError('location map does not match agnostic raw data: %s' %
                                      child_path)
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def merge(self, locator):
         if isinstance(self.children, dict) and isinstance(locator.children, dict):
             for k, loc in locator.children.iteritems():
@@ -25,19 +25,31 @@ class Reader(object):
         self.context = context
         self.location = location
         self.loader = loader
+        self._data = None
+
+    def preload(self, data):
+        """
+        Provides data that was already loaded (e.g. rendered from another document), so that
+        :meth:`load` returns it instead of using the loader.
+        """
+
+        self._data = data
 
     def load(self):
+        if self._data is not None:
+            # Already loaded (e.g. in order to look up the reading cache)
+            return self._data
+
         with OpenClose(self.loader) as loader:
             if self.context is not None:
-                with self.context._locations:
-                    for location in self.context._locations:
-                        if location.is_equivalent(loader.location):
-                            raise AlreadyReadException('already read: %s' % loader.location)
-                    self.context._locations.append(loader.location)
+                if not self.context.locations.add(loader.location,
+                                                  getattr(loader, 'origin_location', None)):
+                    raise AlreadyReadException('already read: %s' % loader.location)
 
             data = loader.load()
             if data is None:
                 raise ReaderException('loader did not provide data: %s' % loader)
+            self._data = data
             return data
 
     def read(self):
@@ -28,6 +28,7 @@ yaml.representer.RoundTripRepresenter.add_representer(
 
 MERGE_TAG = u'tag:yaml.org,2002:merge'
 MAP_TAG = u'tag:yaml.org,2002:map'
+SEQ_TAG = u'tag:yaml.org,2002:seq'
 
 
 class YamlLocator(Locator):
@@ -35,6 +36,8 @@ class YamlLocator(Locator):
     Map for agnostic raw data read from YAML.
     """
 
+    __slots__ = ()
+
     def add_children(self, node):
         if isinstance(node, yaml.SequenceNode):
             self.children = []
@@ -70,32 +73,105 @@ def construct_yaml_map(self, node):
 yaml.constructor.SafeConstructor.add_constructor(MAP_TAG, construct_yaml_map)
 
 
+class YamlLocatorConstructor(yaml.constructor.SafeConstructor):
+    """
+    Constructs agnostic raw data while building its locators in the same pass, instead of walking
+    the node tree separately.
+
+    Aliased nodes are constructed only once, but each occurrence gets its own locator (like with
+    :meth:`YamlLocator.add_children`): occurrences of a node that was already constructed get
+    their children by walking the node.
+    """
+
+    def __init__(self):
+        yaml.constructor.SafeConstructor.__init__(self)
+        self._locators = {}
+
+    def construct_located_document(self, node, location):
+        locator = YamlLocator(location, 0, 0)
+        self._locators[node] = [locator]
+        raw = self.construct_document(node)
+        self._locators.clear()
+        return raw, locator
+
+    def construct_located_map(self, node):
+        data = OrderedDict()
+        yield data
+        # Merge keys are flattened first, so that their locators are added as our children
+        self.flatten_mapping(node)
+        for locator in self._locators.pop(node, ()):
+            self._add_children(locator, node, False)
+        data.update(self.construct_mapping(node))
+
+    def construct_located_seq(self, node):
+        data = []
+        yield data
+        for locator in self._locators.pop(node, ()):
+            self._add_children(locator, node, False)
+        data.extend(self.construct_sequence(node))
+
+    def _add_children(self, locator, node, walk):
+        if isinstance(node, yaml.MappingNode):
+            self.flatten_mapping(node)
+            locator.children = {}
+            for key_node, value_node in node.value:
+                locator.children[key_node.value] = self._add_locator(locator, value_node, walk)
+        elif isinstance(node, yaml.SequenceNode):
+            locator.children = [self._add_locator(locator, child_node, walk)
+                                for child_node in node.value]
+
+    def _add_locator(self, parent_locator, node, walk):
+        locator = YamlLocator(parent_locator.location, node.start_mark.line + 1,
+                              node.start_mark.column + 1)
+        if isinstance(node, (yaml.MappingNode, yaml.SequenceNode)):
+            if walk or (node in self.constructed_objects):
+                # Another occurrence of an aliased node
+                self._add_children(locator, node, True)
+            else:
+                # Children of collections are constructed after their parents, so their locators
+                # are looked up when they are
+                self._locators.setdefault(node, []).append(locator)
+        return locator
+
+
+YamlLocatorConstructor.add_constructor(MAP_TAG, YamlLocatorConstructor.construct_located_map)
+YamlLocatorConstructor.add_constructor(SEQ_TAG, YamlLocatorConstructor.construct_located_seq)
+
+
+if yaml.__with_libyaml__:
+    class CYamlLoader(yaml.cyaml.CParser, YamlLocatorConstructor, yaml.resolver.Resolver):
+        """
+        Loader using the libyaml C parser, with single-pass locator construction.
+        """
+
+        def __init__(self, stream):
+            yaml.cyaml.CParser.__init__(self, stream)
+            YamlLocatorConstructor.__init__(self)
+            yaml.resolver.Resolver.__init__(self)
+else:
+    CYamlLoader = None
+
+
 class YamlReader(Reader):
     """
     ARIA YAML reader.
+
+    Uses the libyaml C parser when ruamel.yaml was built with it (see :code:`use_libyaml`), and
+    otherwise falls back to the pure Python parser.
     """
 
+    use_libyaml = CYamlLoader is not None
+
     def read(self):
         data = self.load()
         try:
             data = unicode(data)
-            # see issue here:
-            # https://bitbucket.org/ruamel/yaml/issues/61/roundtriploader-causes-exceptions-with
-            #yaml_loader = yaml.RoundTripLoader(data)
-            yaml_loader = yaml.SafeLoader(data)
-            try:
-                node = yaml_loader.get_single_node()
-                locator = YamlLocator(self.loader.location, 0, 0)
-                if node is not None:
-                    locator.add_children(node)
-                    raw = yaml_loader.construct_document(node)
-                else:
-                    raw = OrderedDict()
-                #locator.dump()
-                setattr(raw, '_locator', locator)
-                return raw
-            finally:
-                yaml_loader.dispose()
+            if self.use_libyaml and (CYamlLoader is not None):
+                raw = self._read_with_libyaml(data)
+            else:
+                raw = self._read_with_python(data)
+            #raw._locator.dump()
+            return raw
         except yaml.parser.MarkedYAMLError as e:
             context = e.context or 'while parsing'
             problem = e.problem
@@ -111,3 +187,36 @@ class YamlReader(Reader):
                                     cause=e)
         except Exception as e:
             raise ReaderSyntaxError('YAML: %s' % e, cause=e)
+
+    def _read_with_libyaml(self, data):
+        yaml_loader = CYamlLoader(data)
+        try:
+            node = yaml_loader.get_single_node()
+            if node is not None:
+                raw, locator = yaml_loader.construct_located_document(node,
+                                                                      self.loader.location)
+            else:
+                raw = OrderedDict()
+                locator = YamlLocator(self.loader.location, 0, 0)
+            setattr(raw, '_locator', locator)
+            return raw
+        finally:
+            yaml_loader.dispose()
+
+    def _read_with_python(self, data):
+        # see issue here:
+        # https://bitbucket.org/ruamel/yaml/issues/61/roundtriploader-causes-exceptions-with
+        #yaml_loader = yaml.RoundTripLoader(data)
+        yaml_loader = yaml.SafeLoader(data)
+        try:
+            node = yaml_loader.get_single_node()
+            locator = YamlLocator(self.loader.location, 0, 0)
+            if node is not None:
+                locator.add_children(node)
+                raw = yaml_loader.construct_document(node)
+            else:
+                raw = OrderedDict()
+            setattr(raw, '_locator', locator)
+            return raw
+        finally:
+            yaml_loader.dispose()
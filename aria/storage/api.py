@@ -145,6 +145,17 @@ class ResourceAPI(StorageAPI):
         """
         raise NotImplementedError('Subclass must implement abstract data method')
 
+    def stat(self, entry_id, path=None, **kwargs):
+        """
+        Get the metadata of a resource in the storage, which changes whenever its content does.
+
+        :param entry_id:
+        :param path:
+        :param kwargs:
+        :return: a tuple of the resource's location, modification time and size
+        """
+        raise NotImplementedError('Subclass must implement abstract stat method')
+
     def download(self, entry_id, destination, path=None, **kwargs):
         """
         Download a resource from the storage.
@@ -34,7 +34,9 @@ classes:
     * NodeInstance - node instance implementation model.
     * RelationshipInstance - relationship instance implementation model.
     * Plugin - plugin implementation model.
+    * TaskDurationStatistics - task duration statistics implementation model.
 """
+import bisect
 from collections import namedtuple
 from datetime import datetime
 
@@ -49,6 +51,7 @@ from sqlalchemy import (
     Enum,
     String,
     Float,
+    UniqueConstraint,
     orm,
 )
 from sqlalchemy.ext.orderinglist import ordering_list
@@ -72,7 +75,8 @@ __all__ = (
     'NodeInstanceBase',
     'RelationshipInstanceBase',
     'PluginBase',
-    'TaskBase'
+    'TaskBase',
+    'TaskDurationStatisticsBase'
 )
 
 #pylint: disable=no-self-argument, abstract-method
@@ -147,7 +151,9 @@ class ExecutionBase(ModelMixin):
     VALID_TRANSITIONS = {
         PENDING: [STARTED, CANCELLED],
         STARTED: END_STATES + [CANCELLING],
-        CANCELLING: END_STATES + [FORCE_CANCELLING]
+        CANCELLING: END_STATES + [FORCE_CANCELLING],
+        # A failed execution may be resumed
+        FAILED: [STARTED]
     }
 
     @orm.validates('status')
@@ -715,6 +721,10 @@ class TaskBase(ModelMixin):
     retry_count = Column(Integer, default=0)
     retry_interval = Column(Float, default=0)
     ignore_failure = Column(Boolean, default=False)
+    # Whether the task was in flight when its execution was interrupted, and was failed instead of
+    # being run again when the execution was resumed. Such tasks are never requeued: they have to
+    # be handled manually (e.g. by marking them as succeeded).
+    interrupted = Column(Boolean, default=False)
 
     # Operation specific fields
     operation_mapping = Column(String)
@@ -755,3 +765,76 @@ class TaskBase(ModelMixin):
     @staticmethod
     def retry(message=None, retry_interval=None):
         raise TaskRetryException(message, retry_interval=retry_interval)
+
+
+class TaskDurationStatisticsBase(ModelMixin):
+    """
+    Duration statistics of the succeeded tasks of an operation, for a node type and plugin.
+    The name is the operation's name.
+
+    Durations are aggregated into a histogram with exponentially growing buckets, so the
+    statistics take constant space and can be updated incrementally.
+
+    There is a single row per operation, node type and plugin (an empty string when there is no
+    node type or plugin), and rows are versioned, so that concurrent updates of the same
+    statistics fail instead of overwriting each other.
+    """
+    __tablename__ = 'task_duration_statistics'
+    __table_args__ = (UniqueConstraint('name', 'node_type', 'plugin_name'),)
+
+    # Upper bounds (in seconds) of the histogram buckets. The last bucket has no upper bound.
+    HISTOGRAM_BOUNDS = tuple(0.1 * 2 ** i for i in range(20))
+
+    node_type = Column(Text, nullable=False, default='', index=True)
+    plugin_name = Column(Text, nullable=False, default='', index=True)
+    version = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    total_duration = Column(Float, nullable=False, default=0)
+    min_duration = Column(Float)
+    max_duration = Column(Float)
+    histogram = Column(List)
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.version}
+
+    def add(self, duration):
+        """
+        Adds a task duration (in seconds) to the statistics
+        """
+        histogram = list(self.histogram or [0] * (len(self.HISTOGRAM_BOUNDS) + 1))
+        histogram[bisect.bisect_left(self.HISTOGRAM_BOUNDS, duration)] += 1
+        self.histogram = histogram
+        self.count = (self.count or 0) + 1
+        self.total_duration = (self.total_duration or 0) + duration
+        self.min_duration = (duration if self.min_duration is None
+                             else min(self.min_duration, duration))
+        self.max_duration = (duration if self.max_duration is None
+                             else max(self.max_duration, duration))
+
+    @property
+    def mean(self):
+        """
+        The mean duration in seconds, or None if there are no durations
+        """
+        return float(self.total_duration) / self.count if self.count else None
+
+    def percentile(self, percent):
+        """
+        Estimates a percentile of the durations, interpolating within the histogram bucket
+        :param percent: the percentile, between 0 and 100
+        :return: the estimated duration in seconds, or None if there are no durations
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        cumulative = 0
+        for index, bucket_count in enumerate(self.histogram):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.HISTOGRAM_BOUNDS[index - 1] if index > 0 else 0
+                upper = (self.HISTOGRAM_BOUNDS[index] if index < len(self.HISTOGRAM_BOUNDS)
+                         else self.max_duration)
+                value = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(max(value, self.min_duration), self.max_duration)
+            cumulative += bucket_count
+        return self.max_duration
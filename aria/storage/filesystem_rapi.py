@@ -102,6 +102,23 @@ class FileSystemResourceAPI(api.ResourceAPI):
         :return: the content of the file
         :rtype: bytes
         """
+        with open(self._get_resource_file(entry_id, path), 'rb') as resource_file:
+            return resource_file.read()
+
+    def stat(self, entry_id, path=None, **_):
+        """
+        Retrieve the metadata of a file system storage resource, without reading it.
+
+        :param str entry_id: the id of the entry.
+        :param str path: a path to a specific resource.
+        :return: the absolute path, modification time and size of the file
+        :rtype: tuple
+        """
+        resource = os.path.abspath(self._get_resource_file(entry_id, path))
+        resource_stat = os.stat(resource)
+        return resource, resource_stat.st_mtime, resource_stat.st_size
+
+    def _get_resource_file(self, entry_id, path=None):
         resource_relative_path = os.path.join(self.name, entry_id, path or '')
         resource = os.path.join(self.directory, resource_relative_path)
         if not os.path.exists(resource):
@@ -112,8 +129,7 @@ class FileSystemResourceAPI(api.ResourceAPI):
             if len(resources) != 1:
                 raise exceptions.StorageError('No resource in path: {0}'.format(resource))
             resource = os.path.join(resource, resources[0])
-        with open(resource, 'rb') as resource_file:
-            return resource_file.read()
+        return resource
 
     def download(self, entry_id, destination, path=None, **_):
         """
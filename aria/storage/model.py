@@ -35,6 +35,7 @@ classes:
     * RelationshipInstance - relationship instance implementation model.
     * ProviderContext - provider context implementation model.
     * Plugin - plugin implementation model.
+    * TaskDurationStatistics - task duration statistics implementation model.
 """
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -53,6 +54,7 @@ __all__ = (
     'NodeInstance',
     'RelationshipInstance',
     'Plugin',
+    'TaskDurationStatistics',
 )
 
 
@@ -108,3 +110,7 @@ class Plugin(DeclarativeBase, base.PluginBase):
 
 class Task(DeclarativeBase, base.TaskBase):
     pass
+
+
+class TaskDurationStatistics(DeclarativeBase, base.TaskDurationStatisticsBase):
+    pass
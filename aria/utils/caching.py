@@ -20,6 +20,8 @@ from functools import partial
 
 from .collections import OrderedDict
 
+_MISSING = object()
+
 
 class cachedmethod(object):  # pylint: disable=invalid-name
     """
@@ -131,3 +133,55 @@ class HasCachedMethods(object):
                 entry = entry.fget
             if hasattr(entry, 'reset_cache_info'):
                 entry.reset_cache_info()
+
+
+class LRUCache(object):
+    """
+    Dict-like cache that evicts its least recently used entries once it holds more than
+    ``capacity`` entries.
+
+    The implementation is thread-safe.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                return default
+            self._entries[key] = value
+            return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
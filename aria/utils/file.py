@@ -14,7 +14,10 @@
 # limitations under the License.
 
 import errno
+import getpass
 import os
+import stat
+import tempfile
 
 
 def makedirs(path):
@@ -23,6 +26,42 @@ def makedirs(path):
         return
     try:
         os.makedirs(path)
-    except IOError as e:
+    except (IOError, OSError) as e:
         if e.errno != errno.EEXIST:
             raise
+
+
+def get_user_cache_dir(name):
+    """
+    Returns the path of a cache directory for the current user (it is not created, see
+    :func:`make_private_dirs`).
+
+    :param name: the name of the cache
+    """
+    return os.path.join(tempfile.gettempdir(), 'aria-{0}-{1}'.format(getpass.getuser(), name))
+
+
+def make_private_dirs(path):
+    """
+    Creates a directory (and its missing parents) accessible only by the current user, or makes
+    sure that an existing one is.
+
+    An existing directory must not be a symbolic link and must be owned by the current user, in
+    which case its permissions are reset to 0700.
+
+    :raises OSError: if the directory is not private to the current user
+    """
+    parent = os.path.dirname(path)
+    if parent and not os.path.isdir(parent):
+        makedirs(parent)
+    try:
+        os.mkdir(path, 0700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    path_stat = os.lstat(path)
+    if not stat.S_ISDIR(path_stat.st_mode) or \
+            (hasattr(os, 'getuid') and path_stat.st_uid != os.getuid()):
+        raise OSError(errno.EPERM, 'Not a directory owned by the current user', path)
+    if stat.S_IMODE(path_stat.st_mode) != 0700:
+        os.chmod(path, 0700)
@@ -0,0 +1,135 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+
+import jinja2
+import jinja2.meta
+
+from .caching import LRUCache
+
+
+class TemplateCache(object):
+    """
+    Cache of compiled Jinja templates, keyed by the hash of their source.
+
+    Templates are compiled by a single shared :class:`jinja2.Environment` (or an instance of
+    ``environment_class``, such as :class:`jinja2.sandbox.SandboxedEnvironment`). Compiled
+    templates are kept in memory (the least recently used are evicted once ``capacity`` is
+    reached), and their bytecode is also stored in a :class:`jinja2.FileSystemBytecodeCache`, so
+    that other processes rendering the same source can skip compilation as well.
+
+    If ``render_capacity`` is set, rendered results are cached too, keyed by the hash of the
+    source and the values of the context variables the template refers to. This is only correct
+    for templates that render the same given the same context.
+
+    The implementation is thread-safe.
+    """
+
+    def __init__(self, capacity=400, bytecode_cache_dir=None, render_capacity=0,
+                 environment_class=jinja2.Environment, **environment_options):
+        bytecode_cache_options = {}
+        if environment_class is not jinja2.Environment:
+            # Bytecode compiled by other environments (e.g. sandboxed ones) differs for the same
+            # source, so it must not be shared with the default environment
+            bytecode_cache_options['pattern'] = \
+                '__jinja2_%s_%%s.cache' % environment_class.__name__.lower()
+        self.environment = environment_class(
+            bytecode_cache=jinja2.FileSystemBytecodeCache(directory=bytecode_cache_dir,
+                                                          **bytecode_cache_options),
+            **environment_options)
+        self._templates = LRUCache(capacity)
+        self._variables = LRUCache(capacity)
+        self._renders = LRUCache(render_capacity) if render_capacity else None
+
+    def get_template(self, source):
+        """
+        Returns the compiled template for ``source``, compiling it only if it is not cached.
+
+        :rtype: :class:`jinja2.Template`
+        """
+        return self._get_template(_get_key(source), source)
+
+    def render(self, source, *args, **kwargs):
+        key = _get_key(source)
+        template = self._get_template(key, source)
+        if self._renders is None:
+            return template.render(*args, **kwargs)  # pylint: disable=no-member
+
+        context = dict(*args, **kwargs)
+        try:
+            render_key = (key, self._get_context_key(key, source, context))
+            hash(render_key)
+        except TypeError:
+            # Unhashable context values
+            return template.render(context)  # pylint: disable=no-member
+        result = self._renders.get(render_key)
+        if result is None:
+            result = template.render(context)  # pylint: disable=no-member
+            self._renders[render_key] = result
+        return result
+
+    def clear(self):
+        self._templates.clear()
+        self._variables.clear()
+        if self._renders is not None:
+            self._renders.clear()
+        self.environment.bytecode_cache.clear()
+
+    def _get_template(self, key, source):
+        template = self._templates.get(key)
+        if template is None:
+            template = _SourceLoader(source).load(self.environment, key,
+                                                  self.environment.make_globals(None))
+            self._templates[key] = template
+        return template
+
+    def _get_context_key(self, key, source, context):
+        variables = self._variables.get(key)
+        if variables is None:
+            variables = tuple(sorted(jinja2.meta.find_undeclared_variables(
+                self.environment.parse(source))))
+            self._variables[key] = variables
+        return tuple((name, _freeze(context.get(name))) for name in variables)
+
+
+def _get_key(source):
+    return hashlib.sha256(source.encode('utf-8') if isinstance(source, unicode)
+                          else source).hexdigest()
+
+
+def _freeze(value):
+    # values are tagged with their types, as equal values may render differently (e.g. 1, 1.0 and
+    # True, or a list and a tuple)
+    if hasattr(value, 'items'):
+        return type(value), frozenset((_freeze(k), _freeze(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return type(value), tuple(_freeze(v) for v in value)
+    return type(value), value
+
+
+class _SourceLoader(jinja2.BaseLoader):
+    """
+    Loads a single template from its source, through the environment's bytecode cache.
+    """
+
+    def __init__(self, source):
+        self._source = source
+
+    def get_source(self, environment, template):
+        return self._source, None, lambda: True
+
+
+template_cache = TemplateCache()
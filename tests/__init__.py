@@ -15,4 +15,18 @@
 
 import os
 
+import aria
+
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+_EXTENSIONS_INSTALLED = []
+
+
+def install_aria_extensions():
+    """
+    Installs the ARIA extensions once per process (installing them again would fail on the
+    already registered definitions).
+    """
+    if not _EXTENSIONS_INSTALLED:
+        aria.install_aria_extensions()
+        _EXTENSIONS_INSTALLED.append(True)
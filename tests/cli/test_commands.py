@@ -0,0 +1,67 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import StringIO
+
+import pytest
+
+from aria.cli import commands
+from aria.cli.args_parser import config_parser
+from aria.storage import model
+
+from tests import mock, storage
+
+
+class TestTaskStatsCommand(object):
+
+    @pytest.fixture
+    def storage_path(self, tmpdir):
+        api_kwargs = storage.get_sqlite_api_kwargs(str(tmpdir))
+        context = mock.context.simple(api_kwargs)
+        task_statistics = model.TaskDurationStatistics(name='operation',
+                                                       node_type='node_type',
+                                                       plugin_name='')
+        for duration in (10, 20):
+            task_statistics.add(duration)
+        context.model.task_duration_statistics.put(task_statistics)
+        # the command opens the storage by itself
+        api_kwargs['session'].remove()
+        return str(tmpdir.join('db.sqlite'))
+
+    def _run(self, *args):
+        args_namespace, unknown_args = config_parser().parse_known_args(('task-stats',) + args)
+        commands.TaskStatsCommand()(args_namespace, unknown_args)
+
+    def test_csv(self, storage_path, mocker):
+        stdout = mocker.patch('sys.stdout', StringIO.StringIO())
+        self._run(storage_path, '--csv')
+        rows = list(csv.reader(StringIO.StringIO(stdout.getvalue())))
+        assert rows[0] == ['Operation', 'Node type', 'Plugin', 'Count', 'Mean', 'P50', 'P95',
+                           'Max']
+        assert rows[1][:5] == ['operation', 'node_type', '', '2', '15.0']
+        assert len(rows) == 2
+
+    def test_filters(self, storage_path, mocker):
+        stdout = mocker.patch('sys.stdout', StringIO.StringIO())
+        self._run(storage_path, '--csv', '--node-type', 'other_node_type')
+        assert len(list(csv.reader(StringIO.StringIO(stdout.getvalue())))) == 1
+
+    def test_missing_storage(self, tmpdir):
+        storage_path = tmpdir.join('missing.sqlite')
+        with pytest.raises(ValueError) as exc_ctx:
+            self._run(str(storage_path))
+        assert 'does not exist' in str(exc_ctx.value)
+        assert not storage_path.exists()
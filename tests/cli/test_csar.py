@@ -0,0 +1,268 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import logging
+import hashlib
+import zipfile
+
+import pytest
+
+import aria
+from aria.cli import csar
+from aria.cli.commands import CSARCreateCommand, CSARValidateCommand
+from aria.cli.args_parser import config_parser
+
+
+MAIN_DEFINITIONS = """\
+tosca_definitions_version: tosca_simple_yaml_1_0
+imports:
+  - types.yaml
+topology_template:
+  node_templates:
+    server:
+      type: my.nodes.Server
+"""
+
+TYPE_DEFINITIONS = """\
+tosca_definitions_version: tosca_simple_yaml_1_0
+node_types:
+  my.nodes.Server:
+    derived_from: tosca.nodes.Compute
+"""
+
+logger = logging.getLogger('tests.cli.test_csar')
+
+
+@pytest.fixture
+def service_template(tmpdir):
+    source = tmpdir.mkdir('service_template')
+    source.mkdir('definitions')
+    source.join('definitions', 'main.yaml').write(MAIN_DEFINITIONS)
+    source.join('definitions', 'types.yaml').write(TYPE_DEFINITIONS)
+    source.mkdir('artifacts')
+    source.join('artifacts', 'image.qcow2').write('image')
+    return str(source)
+
+
+@pytest.fixture
+def csar_path(service_template, tmpdir):
+    path = str(tmpdir.join('service.csar'))
+    csar.write(service_template, 'definitions/main.yaml', path, logger, jobs=1)
+    return path
+
+
+def _rewrite(path, replace=None, remove=()):
+    replace = replace or {}
+    with zipfile.ZipFile(path) as the_zip:
+        members = [(name, the_zip.read(name)) for name in the_zip.namelist()
+                   if name not in remove]
+    with zipfile.ZipFile(path, 'w') as the_zip:
+        for name, data in members:
+            the_zip.writestr(name, replace.pop(name, data))
+        for name, data in replace.iteritems():
+            the_zip.writestr(name, data)
+
+
+def _run(command_class, *args):
+    args_namespace, unknown_args = config_parser().parse_known_args(args)
+    command_class()(args_namespace, unknown_args)
+
+
+class TestCSARWriter(object):
+
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_write(self, service_template, tmpdir, jobs):
+        path = str(tmpdir.join('service.csar'))
+        csar.write(service_template, 'definitions/main.yaml', path, logger, jobs=jobs)
+        with zipfile.ZipFile(path) as the_zip:
+            assert the_zip.testzip() is None
+            assert sorted(the_zip.namelist()) == sorted([
+                'definitions/main.yaml', 'definitions/types.yaml', 'artifacts/image.qcow2',
+                csar.DIGESTS_FILE, csar.META_FILE])
+            assert the_zip.read('definitions/main.yaml') == MAIN_DEFINITIONS
+            assert the_zip.getinfo('definitions/main.yaml').compress_type == \
+                zipfile.ZIP_DEFLATED
+            assert the_zip.getinfo('artifacts/image.qcow2').compress_type == zipfile.ZIP_STORED
+
+            metadata = csar.yaml.safe_load(the_zip.read(csar.META_FILE))
+            expected_metadata = csar.BASE_METADATA.copy()
+            expected_metadata[csar.META_ENTRY_DEFINITIONS_KEY] = 'definitions/main.yaml'
+            assert metadata == expected_metadata
+
+            digests = the_zip.read(csar.DIGESTS_FILE).splitlines()
+            assert sorted(digests) == sorted(
+                '{0}  {1}'.format(hashlib.sha256(the_zip.read(name)).hexdigest(), name)
+                for name in ('definitions/main.yaml', 'definitions/types.yaml',
+                             'artifacts/image.qcow2'))
+
+    @pytest.mark.parametrize('generated_file', [csar.META_FILE, csar.DIGESTS_FILE])
+    def test_generated_files_must_not_exist(self, service_template, tmpdir, generated_file):
+        os.mkdir(os.path.join(service_template, 'TOSCA-Metadata'))
+        with open(os.path.join(service_template, generated_file), 'w') as the_file:
+            the_file.write('')
+        with pytest.raises(ValueError):
+            csar.write(service_template, 'definitions/main.yaml', str(tmpdir.join('service.csar')),
+                       logger, jobs=1)
+
+    def test_write_member_checks(self, service_template, tmpdir):
+        path = os.path.join(service_template, 'definitions', 'main.yaml')
+        member = csar._prepare_member((path, False, str(tmpdir)))
+        the_zip = zipfile.ZipFile(str(tmpdir.join('service.csar')), 'w')
+        csar._write_member(the_zip, path, 'main.yaml', member)
+        with pytest.raises(ValueError):
+            csar._write_member(the_zip, path, 'main.yaml', member)
+        the_zip.close()
+        with pytest.raises(RuntimeError):
+            csar._write_member(the_zip, path, 'other.yaml', member)
+        with zipfile.ZipFile(str(tmpdir.join('service.csar'))) as the_zip:
+            assert the_zip.namelist() == ['main.yaml']
+            assert the_zip.read('main.yaml') == MAIN_DEFINITIONS
+
+
+class TestCSARVerification(object):
+
+    def test_verify(self, csar_path):
+        csar.read(csar_path, None, logger, verify=True).close()
+
+    def test_tampered_member(self, csar_path):
+        _rewrite(csar_path, {'definitions/types.yaml': TYPE_DEFINITIONS + '# tampered\n'})
+        csar.read(csar_path, None, logger).close()
+        with pytest.raises(ValueError) as e:
+            csar.read(csar_path, None, logger, verify=True)
+        assert 'definitions/types.yaml' in str(e.value)
+
+    def test_unlisted_member(self, csar_path):
+        _rewrite(csar_path, {'definitions/extra.yaml': ''})
+        with pytest.raises(ValueError) as e:
+            csar.read(csar_path, None, logger, verify=True)
+        assert 'definitions/extra.yaml' in str(e.value)
+
+    def test_missing_member(self, csar_path):
+        _rewrite(csar_path, remove=('artifacts/image.qcow2',))
+        with pytest.raises(ValueError) as e:
+            csar.read(csar_path, None, logger, verify=True)
+        assert 'artifacts/image.qcow2' in str(e.value)
+
+    @pytest.mark.parametrize('digests', ['not a digest line\n', 'abc  definitions/main.yaml\n'])
+    def test_malformed_digests_file(self, csar_path, digests):
+        _rewrite(csar_path, {csar.DIGESTS_FILE: digests})
+        with pytest.raises(ValueError):
+            csar.read(csar_path, None, logger, verify=True)
+
+    def test_no_digests_file(self, csar_path):
+        _rewrite(csar_path, remove=(csar.DIGESTS_FILE,))
+        csar.read(csar_path, None, logger, verify=True).close()
+
+
+class TestCSARReader(object):
+
+    def test_read(self, csar_path):
+        reader = csar.read(csar_path, None, logger)
+        try:
+            assert reader.meta_file_version == csar.META_FILE_VERSION_VALUE
+            assert reader.csar_version == csar.META_CSAR_VERSION_VALUE
+            assert reader.created_by == csar.META_CREATED_BY_VALUE
+            assert reader.entry_definitions == 'definitions/main.yaml'
+            assert reader.entry_definitions_uri == csar_path + '!/definitions/main.yaml'
+            assert reader.entry_definitions_yaml['imports'] == ['types.yaml']
+            assert reader.archive.names == set([csar.META_FILE, csar.DIGESTS_FILE,
+                                                'definitions/main.yaml',
+                                                'definitions/types.yaml',
+                                                'artifacts/image.qcow2'])
+        finally:
+            reader.close()
+
+    def test_close(self, csar_path):
+        reader = csar.read(csar_path, None, logger)
+        reader.close()
+        with pytest.raises(RuntimeError):
+            reader.archive.read('definitions/main.yaml')
+
+    def test_extract(self, csar_path, tmpdir):
+        destination = tmpdir.join('extracted')
+        csar.read(csar_path, str(destination), logger).close()
+        assert destination.join('definitions', 'main.yaml').read() == MAIN_DEFINITIONS
+        assert destination.join('artifacts', 'image.qcow2').read() == 'image'
+
+        with pytest.raises(ValueError):
+            csar.read(csar_path, str(destination), logger)
+
+    def test_missing_metadata_closes_archive(self, tmpdir, mocker):
+        path = str(tmpdir.join('service.csar'))
+        with zipfile.ZipFile(path, 'w') as the_zip:
+            the_zip.writestr('definitions/main.yaml', MAIN_DEFINITIONS)
+        close = mocker.spy(csar.ZipArchive, 'close')
+        with pytest.raises(ValueError):
+            csar.read(path, None, logger)
+        assert close.call_count == 1
+
+    def test_missing_entry_definitions(self, tmpdir):
+        path = str(tmpdir.join('service.csar'))
+        metadata = csar.BASE_METADATA.copy()
+        metadata[csar.META_ENTRY_DEFINITIONS_KEY] = 'definitions/missing.yaml'
+        with zipfile.ZipFile(path, 'w') as the_zip:
+            the_zip.writestr(csar.META_FILE, csar.yaml.dump(metadata))
+        with pytest.raises(ValueError):
+            csar.read(path, None, logger)
+
+    def test_not_a_csar(self, tmpdir):
+        path = tmpdir.join('service.csar')
+        path.write('not a zip')
+        with pytest.raises(ValueError):
+            csar.read(str(path), None, logger)
+        with pytest.raises(ValueError):
+            csar.read(str(tmpdir.join('missing.csar')), None, logger)
+
+    def test_remote_csar_is_removed_on_close(self, csar_path, mocker):
+        response = mocker.MagicMock(status_code=200)
+        with open(csar_path, 'rb') as the_file:
+            response.iter_content.return_value = [the_file.read()]
+        mocker.patch.object(csar.requests, 'get', return_value=response)
+        reader = csar.read('http://example.com/service.csar', None, logger)
+        download_target = reader.source
+        assert os.path.isfile(download_target)
+        reader.close()
+        assert not os.path.exists(download_target)
+
+    def test_invalid_remote_csar_is_removed(self, mocker, tmpdir):
+        response = mocker.MagicMock(status_code=200)
+        response.iter_content.return_value = ['not a zip']
+        mocker.patch.object(csar.requests, 'get', return_value=response)
+        mocker.patch.object(csar.tempfile, 'tempdir', str(tmpdir))
+        with pytest.raises(ValueError):
+            csar.read('http://example.com/service.csar', None, logger)
+        assert tmpdir.listdir() == []
+
+
+class TestCSARCommands(object):
+
+    @pytest.fixture(autouse=True)
+    def tosca_extension(self):
+        if not aria.extension.parser.presenter_class():
+            pytest.skip('the TOSCA extension is not installed')
+
+    def test_create_and_validate(self, service_template, tmpdir):
+        path = str(tmpdir.join('service.csar'))
+        _run(CSARCreateCommand, 'csar-create', service_template, 'definitions/main.yaml',
+             '-d', path, '-j', '1')
+        _run(CSARValidateCommand, 'csar-validate', path)
+
+    def test_validate_fails_on_unresolved_import(self, service_template, tmpdir):
+        os.remove(os.path.join(service_template, 'definitions', 'types.yaml'))
+        path = str(tmpdir.join('service.csar'))
+        csar.write(service_template, 'definitions/main.yaml', path, logger, jobs=1)
+        with pytest.raises(RuntimeError):
+            _run(CSARValidateCommand, 'csar-validate', path)
@@ -15,9 +15,9 @@
 
 import pytest
 
-import aria
+import tests
 
 
 @pytest.fixture(scope='session', autouse=True)
 def install_aria_extensions():
-    aria.install_aria_extensions()
+    tests.install_aria_extensions()
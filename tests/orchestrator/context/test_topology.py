@@ -0,0 +1,163 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from aria.orchestrator import context
+from aria.orchestrator.context import topology as topology_module
+from aria.orchestrator.workflows import api
+from aria.orchestrator.workflows.builtin import utils
+
+from tests import mock
+from tests import storage
+
+
+@pytest.fixture
+def ctx():
+    context = mock.context.simple(storage.get_sqlite_api_kwargs())
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+def _get_node_instance(ctx, name):
+    return ctx.model.node_instance.get_by_name(name)
+
+
+def test_topology_is_loaded_once(ctx):
+    assert ctx.topology is ctx.topology
+
+
+def test_topology_models(ctx):
+    topology = ctx.topology
+    assert set(topology.nodes) == set(node.id for node in ctx.nodes)
+    assert set(topology.node_instances) == set(
+        node_instance.id for node_instance in ctx.node_instances)
+    assert set(topology.relationships) == set(
+        relationship.id for relationship in ctx.model.relationship.iter())
+    assert set(topology.relationship_instances) == set(
+        relationship_instance.id
+        for relationship_instance in ctx.model.relationship_instance.iter())
+
+
+def test_node_instances_of(ctx):
+    for node in ctx.nodes:
+        assert [node_instance.id for node_instance in ctx.topology.node_instances_of(node.id)] == \
+               [node_instance.id for node_instance in ctx.node_instances
+                if node_instance.node_fk == node.id]
+
+
+def test_relationship_adjacency(ctx):
+    topology = ctx.topology
+    for node_instance in ctx.node_instances:
+        assert topology.outbound_relationship_instances(node_instance.id) == \
+               list(node_instance.outbound_relationship_instances)
+        assert topology.inbound_relationship_instances(node_instance.id) == \
+               list(node_instance.inbound_relationship_instances)
+    for node in ctx.nodes:
+        assert topology.outbound_relationships(node.id) == list(node.outbound_relationships)
+        assert topology.inbound_relationships(node.id) == list(node.inbound_relationships)
+
+
+def test_hosts(ctx):
+    dependency_node_instance = _get_node_instance(ctx, mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    dependent_node_instance = _get_node_instance(ctx, mock.models.DEPENDENT_NODE_INSTANCE_NAME)
+    dependent_node_instance.host_fk = dependency_node_instance.id
+    ctx.model.node_instance.update(dependent_node_instance)
+
+    topology = ctx.topology
+    assert topology.contained_node_instances(dependency_node_instance.id) == \
+           [dependent_node_instance]
+    assert topology.contained_node_instances(dependent_node_instance.id) == []
+    assert topology.host_chain(dependent_node_instance.id) == \
+           [dependent_node_instance, dependency_node_instance]
+
+
+def test_only_the_deployment_relationships_are_loaded(ctx, mocker):
+    other_relationship, other_relationship_instance = _create_other_deployment(ctx)
+    loaded = _record_loaded_models(ctx, mocker, 'relationship', 'relationship_instance')
+    topology = ctx.topology
+    assert other_relationship.id not in topology.relationships
+    assert other_relationship_instance.id not in topology.relationship_instances
+    assert set(model.id for model in loaded['relationship']) == set(topology.relationships)
+    assert set(model.id for model in loaded['relationship_instance']) == \
+        set(topology.relationship_instances)
+
+
+def test_relationships_loaded_in_batches(ctx, mocker):
+    mocker.patch.object(topology_module, '_MAX_FILTER_VALUES', 1)
+    loaded = _record_loaded_models(ctx, mocker, 'relationship_instance')
+    assert set(ctx.topology.relationship_instances) == set(
+        relationship_instance.id
+        for relationship_instance in loaded['relationship_instance'])
+    assert len(ctx.topology.relationship_instances) == 1
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_node_instance_task_dependencies(ctx, reverse):
+    _create_other_deployment(ctx)
+    dependency_node_instance = _get_node_instance(ctx, mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    dependent_node_instance = _get_node_instance(ctx, mock.models.DEPENDENT_NODE_INSTANCE_NAME)
+    graph = api.task_graph.TaskGraph('test')
+    with context.workflow.current.push(ctx):
+        dependency_task = api.task.StubTask()
+        dependent_task = api.task.StubTask()
+    graph.add_tasks(dependency_task, dependent_task)
+    utils.create_node_instance_task_dependencies(
+        ctx, graph, [(dependency_task, dependency_node_instance),
+                     (dependent_task, dependent_node_instance)], reverse=reverse)
+    if reverse:
+        assert list(graph.get_dependencies(dependency_task)) == [dependent_task]
+        assert list(graph.get_dependencies(dependent_task)) == []
+    else:
+        assert list(graph.get_dependencies(dependent_task)) == [dependency_task]
+        assert list(graph.get_dependencies(dependency_task)) == []
+
+
+def _record_loaded_models(ctx, mocker, *model_names):
+    loaded = {}
+    for model_name in model_names:
+        model_api = getattr(ctx.model, model_name)
+        loaded[model_name] = []
+
+        def iter_models(_original=model_api.iter, _loaded=loaded[model_name], **kwargs):
+            for model in _original(**kwargs):
+                _loaded.append(model)
+                yield model
+        mocker.patch.object(model_api, 'iter', iter_models)
+    return loaded
+
+
+def _create_other_deployment(ctx):
+    deployment = mock.models.get_deployment(ctx.deployment.blueprint)
+    deployment.name = 'other_deployment'
+    ctx.model.deployment.put(deployment)
+    dependency_node = mock.models.get_dependency_node(deployment)
+    ctx.model.node.put(dependency_node)
+    dependency_node_instance = mock.models.get_dependency_node_instance(dependency_node)
+    dependency_node_instance.name = 'other_dependency_node_instance'
+    ctx.model.node_instance.put(dependency_node_instance)
+    dependent_node = mock.models.get_dependent_node(deployment)
+    ctx.model.node.put(dependent_node)
+    dependent_node_instance = mock.models.get_dependent_node_instance(dependent_node)
+    dependent_node_instance.name = 'other_dependent_node_instance'
+    ctx.model.node_instance.put(dependent_node_instance)
+    relationship = mock.models.get_relationship(dependent_node, dependency_node)
+    ctx.model.relationship.put(relationship)
+    relationship_instance = mock.models.get_relationship_instance(
+        source_instance=dependent_node_instance,
+        target_instance=dependency_node_instance,
+        relationship=relationship)
+    ctx.model.relationship_instance.put(relationship_instance)
+    return relationship, relationship_instance
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import os
+import stat
 from collections import namedtuple
 
 import requests
@@ -26,12 +29,17 @@ from aria.orchestrator.execution_plugin import common
 class TestDownloadScript(object):
 
     @pytest.fixture(autouse=True)
-    def patch_requests(self, mocker):
-        def _mock_requests_get(url):
-            response = namedtuple('Response', 'text status_code')
-            return response(url, self.status_code)
+    def patch_requests(self, mocker, tmpdir):
+        def _mock_requests_get(url, headers=None):
+            self.requests_headers.append(headers)
+            response = namedtuple('Response', 'content status_code headers')
+            return response(self.content or url, self.status_code, self.response_headers)
+        self.content = None
         self.status_code = 200
+        self.response_headers = {}
+        self.requests_headers = []
         mocker.patch.object(requests, 'get', _mock_requests_get)
+        mocker.patch.object(common, 'script_cache', common.ScriptCache(str(tmpdir), 1024))
 
     def _test_url(self, url):
         class Ctx(object):
@@ -42,6 +50,7 @@ class TestDownloadScript(object):
         with open(result) as f:
             assert script_path == f.read()
         assert result.endswith('-some_script.py')
+        return result
 
     def test_http_url(self):
         self._test_url('http://localhost/some_script.py')
@@ -56,16 +65,167 @@ class TestDownloadScript(object):
         exception = exc_ctx.value
         assert 'status code: 404' in str(exception)
 
+    def test_url_revalidated_with_etag(self):
+        self.response_headers = {'ETag': '"1"'}
+        first_result = self._test_url('http://localhost/some_script.py')
+        self.status_code = 304
+        second_result = self._test_url('http://localhost/some_script.py')
+        assert first_result == second_result
+        assert self.requests_headers == [{}, {'If-None-Match': '"1"'}]
+
+    def test_url_without_validators_is_downloaded_again(self):
+        self._test_url('http://localhost/some_script.py')
+        self._test_url('http://localhost/some_script.py')
+        assert self.requests_headers == [{}, {}]
+
+    def test_non_ascii_content(self):
+        self.content = u'echo \u2713'.encode('utf-8')
+
+        class Ctx(object):
+            task = model.Task
+
+        result = common.download_script(Ctx, 'http://localhost/some_script.sh')
+        with open(result, 'rb') as f:
+            assert f.read() == self.content
+
     def test_blueprint_resource(self):
         test_script_path = 'my_script.py'
+        reads = []
+        resource_stat = ['/resources/my_script.py', 1.0, len('content')]
 
         class Ctx(object):
             @staticmethod
-            def download_resource(destination, path):
+            def get_resource_stat(path):
                 assert path == test_script_path
-                return destination
+                return tuple(resource_stat)
+
+            @staticmethod
+            def get_resource(path):
+                assert path == test_script_path
+                reads.append(path)
+                return 'content'
         result = common.download_script(Ctx, test_script_path)
         assert result.endswith(test_script_path)
+        with open(result) as f:
+            assert f.read() == 'content'
+        # the resource is unchanged, so it is not read again
+        assert common.download_script(Ctx, test_script_path) == result
+        assert len(reads) == 1
+        resource_stat[1] = 2.0
+        assert common.download_script(Ctx, test_script_path) == result
+        assert len(reads) == 2
+
+    def test_blueprint_resource_without_stat(self):
+        test_script_path = 'my_script.py'
+        reads = []
+
+        class Ctx(object):
+            @staticmethod
+            def get_resource_stat(path):
+                raise NotImplementedError
+
+            @staticmethod
+            def get_resource(path):
+                reads.append(path)
+                return 'content'
+        first_result = common.download_script(Ctx, test_script_path)
+        assert common.download_script(Ctx, test_script_path) == first_result
+        assert len(reads) == 2
+
+
+class TestScriptCache(object):
+
+    @pytest.fixture
+    def cache(self, tmpdir):
+        return common.ScriptCache(str(tmpdir), max_size=10)
+
+    def test_same_content_is_shared(self, cache):
+        path1 = cache.put(name='script.sh', content='12345')
+        path2 = cache.put(name='script.sh', content='12345')
+        path3 = cache.put(name='script.sh', content='54321')
+        assert path1 == path2
+        assert path1 != path3
+
+    def test_entries_are_read_only(self, cache):
+        path = cache.put(name='script.sh', content='12345')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0555
+
+    def test_least_recently_used_entries_are_evicted(self, cache):
+        path1 = cache.put(name='script1.sh', content='12345')
+        path2 = cache.put(name='script2.sh', content='abcde')
+        os.utime(path1, (0, 0))
+        cache.put(name='script3.sh', content='ABCDE')
+        assert not os.path.exists(path1)
+        assert os.path.exists(path2)
+
+    def test_recently_used_entries_are_not_evicted(self, cache):
+        path1 = cache.put(name='script1.sh', content='12345')
+        path2 = cache.put(name='script2.sh', content='abcde')
+        cache.put(name='script3.sh', content='ABCDE')
+        assert os.path.exists(path1)
+        assert os.path.exists(path2)
+
+    def test_lookup_resource(self, cache):
+        resource_stat = ('/resources/script.sh', 1.0, 5)
+        assert cache.lookup_resource(resource_stat) is None
+        path = cache.put(name='script.sh', content='12345', resource_stat=resource_stat)
+        assert cache.lookup_resource(resource_stat) == path
+        assert cache.lookup_resource(('/resources/script.sh', 2.0, 5)) is None
+        assert cache.lookup_resource(('/resources/script.sh', 1.0, 6)) is None
+        assert cache.lookup_resource(('/resources/other_script.sh', 1.0, 5)) is None
+
+    def test_lookup_resource_ignores_modified_entries(self, cache):
+        resource_stat = ('/resources/script.sh', 1.0, 5)
+        path = cache.put(name='script.sh', content='12345', resource_stat=resource_stat)
+        os.chmod(path, 0755)
+        assert cache.lookup_resource(resource_stat) is None
+        os.chmod(path, 0555)
+        os.remove(path)
+        assert cache.lookup_resource(resource_stat) is None
+
+    def test_lookup_url(self, cache):
+        url = 'http://localhost/script.sh'
+        assert cache.lookup_url(url) == (None, {})
+        path = cache.put(name='script.sh', content='12345', url=url,
+                         response_headers={'Last-Modified': 'yesterday'})
+        assert cache.lookup_url(url) == (path, {'If-Modified-Since': 'yesterday'})
+        os.chmod(path, 0755)
+        os.remove(path)
+        assert cache.lookup_url(url) == (None, {})
+
+    def test_lookup_url_outside_the_cache_is_ignored(self, cache, tmpdir):
+        url = 'http://localhost/script.sh'
+        cache.put(name='script.sh', content='12345', url=url, response_headers={'ETag': '"1"'})
+        planted = tmpdir.join('planted').join(
+            os.path.basename(cache.lookup_url(url)[0]))
+        planted.write('12345', ensure=True)
+        with open(cache._metadata_path(url), 'w') as f:
+            json.dump({'path': str(planted), 'etag': '"1"'}, f)
+        assert cache.lookup_url(url) == (None, {})
+
+    def test_tampered_entries_are_replaced(self, cache):
+        url = 'http://localhost/script.sh'
+        path = cache.put(name='script.sh', content='12345', url=url,
+                         response_headers={'ETag': '"1"'})
+        os.chmod(path, 0755)
+        with open(path, 'w') as f:
+            f.write('evil!')
+        assert cache.lookup_url(url) == (None, {})
+        assert cache.put(name='script.sh', content='12345') == path
+        with open(path) as f:
+            assert f.read() == '12345'
+
+    def test_directory_is_private(self, tmpdir):
+        directory = tmpdir.join('cache')
+        directory.mkdir().chmod(0777)
+        common.ScriptCache(str(directory), max_size=10).put(name='script.sh', content='12345')
+        assert stat.S_IMODE(directory.stat().mode) == 0700
+
+    def test_symlinked_directory_is_refused(self, tmpdir):
+        tmpdir.join('cache').mksymlinkto(tmpdir.mkdir('elsewhere'))
+        cache = common.ScriptCache(str(tmpdir.join('cache')), max_size=10)
+        with pytest.raises(OSError):
+            cache.put(name='script.sh', content='12345')
 
 
 class TestCreateProcessConfig(object):
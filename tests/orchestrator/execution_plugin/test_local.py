@@ -19,12 +19,14 @@ import os
 import pytest
 
 from aria import workflow
+from aria.utils import caching
 from aria.orchestrator import events
 from aria.orchestrator.workflows import api
 from aria.orchestrator.workflows.exceptions import ExecutorException
 from aria.orchestrator.exceptions import TaskAbortException, TaskRetryException
 from aria.orchestrator.execution_plugin import operations
 from aria.orchestrator.execution_plugin.exceptions import ProcessException
+from aria.orchestrator.execution_plugin import common
 from aria.orchestrator.execution_plugin import local
 from aria.orchestrator.execution_plugin import constants
 from aria.orchestrator.workflows.executor import process
@@ -512,6 +514,50 @@ if __name__ == '__main__':
         storage.release_sqlite_storage(workflow_context.model)
 
 
+class TestCompileScript(object):
+
+    @pytest.fixture(autouse=True)
+    def compiled_scripts(self, mocker):
+        mocker.patch.object(local, '_compiled_scripts', caching.LRUCache(10))
+
+    def test_unchanged_script_compiled_once(self, tmpdir):
+        script = tmpdir.join('script.py')
+        script.write('a = 1')
+        code = local._compile_script(str(script))
+        assert local._compile_script(str(script)) is code
+        script.write('a = 2')
+        assert local._compile_script(str(script)) is not code
+
+    def test_code_names_its_script(self, tmpdir):
+        script1 = tmpdir.join('script1.py')
+        script1.write('a = 1')
+        script2 = tmpdir.join('script2.py')
+        script2.write('a = 1')
+        code1 = local._compile_script(str(script1))
+        code2 = local._compile_script(str(script2))
+        assert code1.co_filename == str(script1)  # pylint: disable=no-member
+        assert code2.co_filename == str(script2)  # pylint: disable=no-member
+
+    def test_cached_script_code_is_shared_between_processes(self, tmpdir, mocker):
+        cache = common.ScriptCache(str(tmpdir.join('cache')), max_size=1024)
+        mocker.patch.object(common, 'script_cache', cache)
+        script_path = cache.put(name='script.py', content='a = 1')
+        code = local._compile_script(script_path)
+        # another process, with an empty memory cache
+        mocker.patch.object(local, '_compiled_scripts', caching.LRUCache(10))
+        compile_mock = mocker.patch('__builtin__.compile')
+        assert local._compile_script(script_path) == code
+        assert not compile_mock.called
+
+    def test_code_is_not_stored_for_scripts_outside_the_cache(self, tmpdir, mocker):
+        cache = common.ScriptCache(str(tmpdir.join('cache')), max_size=1024)
+        mocker.patch.object(common, 'script_cache', cache)
+        script = tmpdir.join('script.py')
+        script.write('a = 1')
+        local._compile_script(str(script))
+        assert not tmpdir.join('cache').check()
+
+
 class BaseTestConfiguration(object):
 
     @pytest.fixture(autouse=True)
@@ -529,8 +575,12 @@ class BaseTestConfiguration(object):
 
     class Ctx(object):
         @staticmethod
-        def download_resource(destination, *args, **kwargs):
-            return destination
+        def get_resource_stat(*args, **kwargs):
+            raise NotImplementedError
+
+        @staticmethod
+        def get_resource(*args, **kwargs):
+            return ''
 
     def _run(self, script_path, process=None):
         local.run_script(
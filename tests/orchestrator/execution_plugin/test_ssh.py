@@ -14,13 +14,17 @@
 # limitations under the License.
 
 import contextlib
+import io
 import json
 import logging
 import os
+import tarfile
+import threading
 
 import pytest
 
 import fabric.api
+import fabric.state
 from fabric.contrib import files
 from fabric import context_managers
 
@@ -36,6 +40,7 @@ from aria.orchestrator.execution_plugin import operations
 from aria.orchestrator.execution_plugin import constants
 from aria.orchestrator.execution_plugin.exceptions import ProcessException, TaskException
 from aria.orchestrator.execution_plugin.ssh import operations as ssh_operations
+from aria.orchestrator.execution_plugin.ssh import pool
 
 from tests import mock, storage, resources
 from tests.orchestrator.workflows.helpers import events_collector
@@ -439,25 +444,165 @@ class TestFabricEnvHideGroupsAndRunCommands(object):
             hide_output=hide_output)
 
 
+class TestConnectionPool(object):
+
+    class MockClient(object):
+
+        def __init__(self, active=True):
+            self.active = active
+            self.closed = False
+
+        def get_transport(self):
+            client = self
+
+            class Transport(object):
+                @staticmethod
+                def is_active():
+                    return client.active
+            return Transport
+
+        def close(self):
+            self.closed = True
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, mocker):
+        mocker.patch.object(fabric.state, 'connections', fabric.state.HostConnectionCache())
+        self.pool = pool.ConnectionPool(idle_timeout=60)
+        self.key = 'user@host:22'
+
+    def _use(self, password='password', client=None):
+        with fabric.api.settings(host_string='host', user='user', password=password):
+            with self.pool.connection():
+                if client is not None:
+                    fabric.state.connections[self.key] = client
+        return dict.get(fabric.state.connections, self.key)
+
+    def test_connection_reused(self):
+        client = self.MockClient()
+        self._use(client=client)
+        assert self._use() is client
+        assert not client.closed
+
+    def test_inactive_connection_dropped(self):
+        client = self.MockClient()
+        self._use(client=client)
+        client.active = False
+        assert self._use() is None
+        assert client.closed
+
+    def test_connection_dropped_on_credentials_change(self):
+        client = self.MockClient()
+        self._use(client=client)
+        assert self._use(password='other_password') is None
+        assert client.closed
+
+    def test_idle_connection_evicted(self, mocker):
+        client = self.MockClient()
+        self._use(client=client)
+        self.pool.idle_timeout = 0
+        mocker.patch('time.time', return_value=10 ** 10)
+        assert self._use() is None
+        assert client.closed
+
+    def test_close(self):
+        client = self.MockClient()
+        self._use(client=client)
+        self.pool.close()
+        assert dict.get(fabric.state.connections, self.key) is None
+        assert client.closed
+
+    def test_credentials_change_waits_for_connection_in_use(self):
+        client = self.MockClient()
+        in_use = threading.Event()
+        release = threading.Event()
+
+        def use_connection():
+            with fabric.api.settings(host_string='host', user='user', password='password'):
+                with self.pool.connection():
+                    fabric.state.connections[self.key] = client
+                    in_use.set()
+                    release.wait()
+                    assert not client.closed
+        thread = threading.Thread(target=use_connection)
+        thread.start()
+        in_use.wait()
+        threading.Timer(0.1, release.set).start()
+        assert self._use(password='other_password') is None
+        thread.join()
+        assert client.closed
+
+    def test_closed_when_workflow_ends(self, mocker):
+        mocker.patch.object(ssh_operations, 'connection_pool', self.pool)
+        client = self.MockClient()
+        self._use(client=client)
+        events.on_success_workflow_signal.send(mocker.MagicMock())
+        assert client.closed
+
+
 class TestUtilityFunctions(object):
 
     def test_paths(self):
         base_dir = '/path'
-        local_script_path = '/local/script/path.py'
+        local_script_path = '/local/script/digest-path.py'
         paths = ssh_operations._Paths(base_dir=base_dir,
                                       local_script_path=local_script_path)
         assert paths.local_script_path == local_script_path
         assert paths.remote_ctx_dir == base_dir
-        assert paths.base_script_path == 'path.py'
+        assert paths.base_script_path == 'digest-path.py'
         assert paths.remote_ctx_path == '/path/ctx'
         assert paths.remote_scripts_dir == '/path/scripts'
         assert paths.remote_work_dir == '/path/work'
-        assert paths.remote_env_script_path.startswith('/path/scripts/env-path.py-')
-        assert paths.remote_script_path.startswith('/path/scripts/path.py-')
+        assert paths.remote_cache_dir == '/path/cache'
+        assert paths.remote_env_script_path.startswith('/path/scripts/env-digest-path.py-')
+        assert paths.remote_bundle_path.startswith('/path/scripts/bundle-digest-path.py-')
+        assert paths.remote_script_path == '/path/cache/digest-path.py'
+
+    def test_bundle(self, mocker, tmpdir):
+        uploaded = {}
+
+        def put(local_path, remote_path):
+            uploaded[remote_path] = local_path.read()
+        mocker.patch('fabric.api.put', put)
+        local_file = tmpdir.join('file')
+        local_file.write('file content')
+        bundle = ssh_operations._Bundle('/path/bundle.tar')
+        bundle.add_file(str(local_file), '/path/cache/file')
+        bundle.add_content('env content', '/path/scripts/env')
+        bundle.upload()
+        tar = tarfile.open(fileobj=io.BytesIO(uploaded['/path/bundle.tar']))
+        assert tar.extractfile('0').read() == 'file content'
+        assert tar.extractfile('1').read() == 'env content'
+        assert bundle.unpack_command() == (
+            'mkdir -p /path/bundle.tar.d && '
+            'tar -xf /path/bundle.tar -C /path/bundle.tar.d && '
+            'mv -f /path/bundle.tar.d/0 /path/cache/file && '
+            'mv -f /path/bundle.tar.d/1 /path/scripts/env && '
+            'rm -rf /path/bundle.tar /path/bundle.tar.d')
+
+    def test_prepare_remote_dirs(self, mocker):
+        commands = []
+
+        class Result(object):
+            failed = False
+            stdout = 'some login banner\nmissing:/path/cache/digest-path.py\n'
+
+        def run(command):
+            commands.append(command)
+            return Result
+        mocker.patch('fabric.api.run', run)
+        paths = ssh_operations._Paths(base_dir='/path',
+                                      local_script_path='/local/script/digest-path.py')
+        missing_paths = ssh_operations._prepare_remote_dirs(
+            paths, [paths.remote_ctx_path, paths.remote_script_path])
+        assert missing_paths == set([paths.remote_script_path])
+        assert commands == [
+            'mkdir -p /path/scripts /path/work /path/cache && '
+            '{ test -f /path/ctx || echo missing:/path/ctx; } && '
+            '{ test -f /path/cache/digest-path.py || echo missing:/path/cache/digest-path.py; }']
 
     def test_write_environment_script_file(self):
         base_dir = '/path'
-        local_script_path = '/local/script/path.py'
+        local_script_path = '/local/script/digest-path.py'
         paths = ssh_operations._Paths(base_dir=base_dir,
                                       local_script_path=local_script_path)
         env = {'one': "'1'"}
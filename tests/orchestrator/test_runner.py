@@ -31,6 +31,13 @@ def mock_create_operation(ctx, key, value, **kwargs): # pylint: disable=unused-a
     OPERATION_RESULTS[key] = value
 
 
+@operation
+def mock_fail_once_operation(ctx, **kwargs): # pylint: disable=unused-argument
+    OPERATION_RESULTS['invocations'] = OPERATION_RESULTS.get('invocations', 0) + 1
+    if OPERATION_RESULTS['invocations'] == 1:
+        raise RuntimeError
+
+
 @pytest.fixture(autouse=True)
 def cleanup():
     OPERATION_RESULTS.clear()
@@ -57,6 +64,40 @@ def test_runner_tasks():
     assert OPERATION_RESULTS.get('create') is True
 
 
+def test_runner_resume(tmpdir):
+    execution_ids = []
+
+    @workflow
+    def workflow_fn(ctx, graph):
+        execution_ids.append(ctx.execution.id)
+        for node_instance in ctx.model.node_instance.iter():
+            graph.add_tasks(
+                OperationTask.node_instance(instance=node_instance,
+                                            name='tosca.interfaces.node.lifecycle.Standard.create'))
+
+    def initialize_model_storage_fn(model_storage):
+        mock.topology.create_simple_topology_single_node(
+            model_storage,
+            1,
+            '%s.%s' % (__name__, mock_fail_once_operation.__name__)
+        )
+
+    storage_path = str(tmpdir.join('storage.db'))
+    runner_kwargs = dict(workflow_name='runner workflow',
+                         workflow_fn=workflow_fn,
+                         inputs={},
+                         initialize_model_storage_fn=initialize_model_storage_fn,
+                         deployment_id=1,
+                         storage_path=storage_path,
+                         is_storage_temporary=False)
+    with pytest.raises(Exception):
+        Runner(**runner_kwargs).run()
+    Runner(execution_id=execution_ids[0], **runner_kwargs).run()
+
+    assert execution_ids == [execution_ids[0]] * 2
+    assert OPERATION_RESULTS['invocations'] == 2
+
+
 def _initialize_model_storage_fn(model_storage):
     mock.topology.create_simple_topology_single_node(
         model_storage,
@@ -252,6 +252,28 @@ class TestTaskGraphGraphTraversal(object):
         with pytest.raises(task_graph.TaskNotInGraphError):
             list(graph.get_dependencies(task_not_in_graph))
 
+    def test_topological_order(self, graph):
+        tasks = [MockTask(), MockTask(), MockTask()]
+        graph.sequence(*tasks)
+        assert list(graph.topological_order()) == list(reversed(tasks))
+        assert list(graph.topological_order(reverse=True)) == tasks
+
+    def test_topological_order_after_removing_task(self, graph):
+        tasks = [MockTask(), MockTask(), MockTask()]
+        graph.sequence(*tasks)
+        graph.remove_tasks(tasks[1])
+        graph.add_tasks(tasks[1])
+        assert list(graph.topological_order(reverse=True)) == [tasks[0], tasks[2], tasks[1]]
+
+    def test_topological_order_with_cycle(self, graph):
+        task = MockTask()
+        other_task = MockTask()
+        graph.add_tasks(task, other_task)
+        graph.add_dependency(task, other_task)
+        graph.add_dependency(other_task, task)
+        with pytest.raises(task_graph.TaskGraphCycleError):
+            list(graph.topological_order())
+
 
 class TestTaskGraphDependencies(object):
 
@@ -52,5 +52,65 @@ def test_execute_operation(ctx):
     assert execute_tasks[0].name == '{0}.{1}'.format(operation_name, node_instance.id)
 
 
+def test_execute_operation_by_type(ctx):
+    dependency_node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+    dependency_node.type_hierarchy = ['tosca.nodes.Root', 'test_type']
+    ctx.model.node.update(dependency_node)
+    node_instance = ctx.model.node_instance.get_by_name(mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+
+    execute_tasks = list(_execute_operation(ctx, type_names=['test_type']).tasks)
+
+    assert len(execute_tasks) == 1
+    assert execute_tasks[0].actor == node_instance
+
+
+def test_execute_operation_by_dependency_order(ctx):
+    dependency_node_instance = \
+        ctx.model.node_instance.get_by_name(mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    dependent_node_instance = \
+        ctx.model.node_instance.get_by_name(mock.models.DEPENDENT_NODE_INSTANCE_NAME)
+
+    execute_tasks = list(
+        _execute_operation(ctx, run_by_dependency_order=True).topological_order(reverse=True))
+
+    assert [execute_task.actor for execute_task in execute_tasks] == \
+           [dependency_node_instance, dependent_node_instance]
+
+
+def test_execute_operation_by_dependency_order_with_filtered_node_instance(ctx):
+    dependent_node_instance = \
+        ctx.model.node_instance.get_by_name(mock.models.DEPENDENT_NODE_INSTANCE_NAME)
+
+    execute_graph = _execute_operation(ctx,
+                                       run_by_dependency_order=True,
+                                       node_instance_ids=[dependent_node_instance.id])
+    stub, execute_task = list(execute_graph.topological_order(reverse=True))
+
+    assert isinstance(stub, task.StubTask)
+    assert execute_task.actor == dependent_node_instance
+
+
+def test_execute_operation_with_max_concurrency(ctx):
+    execute_graph = _execute_operation(ctx, max_concurrency=1)
+    first_task, second_task = list(execute_graph.topological_order(reverse=True))
+
+    # the limit is enforced when the tasks are dispatched, not through dependencies
+    assert not execute_graph.has_dependency(second_task, first_task)
+    assert not execute_graph.has_dependency(first_task, second_task)
+    assert ctx.scheduling_policy.acquire(first_task)
+    assert not ctx.scheduling_policy.acquire(second_task)
+    ctx.scheduling_policy.release(first_task)
+    assert ctx.scheduling_policy.acquire(second_task)
+
 
-# TODO: add more scenarios
+def _execute_operation(ctx, **kwargs):
+    workflow_kwargs = dict(
+        operation=mock.operations.NODE_OPERATIONS_INSTALL[0],
+        operation_kwargs={},
+        allow_kwargs_override=False,
+        run_by_dependency_order=False,
+        type_names=[],
+        node_ids=[],
+        node_instance_ids=[])
+    workflow_kwargs.update(kwargs)
+    return task.WorkflowTask(execute_operation, ctx=ctx, **workflow_kwargs)
@@ -16,7 +16,7 @@
 import pytest
 
 from aria.orchestrator.workflows.api import task
-from aria.orchestrator.workflows.builtin.heal import heal
+from aria.orchestrator.workflows.builtin.heal import heal, _get_contained_subgraph
 
 from tests import mock, storage
 
@@ -98,4 +98,17 @@ def test_heal_dependency_node(ctx):
     assert establish_target.name.startswith('aria.interfaces.relationship_lifecycle.establish')
 
 
-# TODO: add tests for contained in scenario
+def test_contained_subgraph(ctx):
+    dependency_node_instance = \
+        ctx.model.node_instance.get_by_name(mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    dependent_node_instance = \
+        ctx.model.node_instance.get_by_name(mock.models.DEPENDENT_NODE_INSTANCE_NAME)
+    dependency_node_instance.host_fk = dependency_node_instance.id
+    dependent_node_instance.host_fk = dependency_node_instance.id
+    ctx.model.node_instance.update(dependency_node_instance)
+    ctx.model.node_instance.update(dependent_node_instance)
+
+    assert _get_contained_subgraph(ctx.topology, dependency_node_instance) == \
+           [dependency_node_instance, dependent_node_instance]
+    assert _get_contained_subgraph(ctx.topology, dependent_node_instance) == \
+           [dependent_node_instance]
@@ -28,13 +28,14 @@ from aria.orchestrator.workflows import (
     api,
     exceptions,
 )
-from aria.orchestrator.workflows.core import engine
+from aria.orchestrator.workflows.core import engine, scheduling, resumption
 from aria.orchestrator.workflows.executor import thread
 
 from tests import mock, storage
 
 
 global_test_holder = {}
+global_test_lock = threading.Lock()
 
 
 class BaseTest(object):
@@ -48,11 +49,12 @@ class BaseTest(object):
         return eng
 
     @staticmethod
-    def _engine(workflow_func, workflow_context, executor):
+    def _engine(workflow_func, workflow_context, executor, **kwargs):
         graph = workflow_func(ctx=workflow_context)
         return engine.Engine(executor=executor,
                              workflow_context=workflow_context,
-                             tasks_graph=graph)
+                             tasks_graph=graph,
+                             **kwargs)
 
     @staticmethod
     def _op(func, ctx,
@@ -211,6 +213,55 @@ class TestEngine(BaseTest):
         assert global_test_holder.get('invocations') == [1, 2]
         assert global_test_holder.get('sent_task_signal_calls') == 2
 
+    def test_scheduling_policy_concurrency(self, workflow_context, executor):
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(*(self._op(mock_concurrent_task, ctx, inputs={'seconds': 0.2})
+                              for _ in range(3)))
+        workflow_context.scheduling_policy = scheduling.SchedulingPolicy(
+            total=scheduling.Limit(max_concurrency=1))
+        self._execute(workflow_func=mock_workflow,
+                      workflow_context=workflow_context,
+                      executor=executor)
+        assert workflow_context.states == ['start', 'success']
+        assert global_test_holder.get('sent_task_signal_calls') == 3
+        assert global_test_holder.get('max_concurrent_invocations') == 1
+
+    def test_critical_path_first(self, workflow_context, executor):
+        @workflow
+        def mock_workflow(ctx, graph):
+            short_op = self._op(mock_ordered_task, ctx, inputs={'counter': 1})
+            long_ops = [self._op(mock_ordered_task, ctx, inputs={'counter': counter})
+                        for counter in (2, 3)]
+            graph.add_tasks(short_op)
+            graph.sequence(*long_ops)
+        workflow_context.scheduling_policy = scheduling.SchedulingPolicy(
+            total=scheduling.Limit(max_concurrency=1))
+        self._execute(workflow_func=mock_workflow,
+                      workflow_context=workflow_context,
+                      executor=executor)
+        assert workflow_context.states == ['start', 'success']
+        assert global_test_holder.get('invocations')[0] == 2
+
+    def test_critical_path_by_estimated_duration(self, workflow_context, executor):
+        @workflow
+        def mock_workflow(ctx, graph):
+            long_op = self._op(mock_ordered_task, ctx, inputs={'counter': 1})
+            short_ops = [self._op(mock_ordered_task, ctx, inputs={'counter': counter})
+                         for counter in (2, 3)]
+            graph.add_tasks(long_op)
+            graph.sequence(*short_ops)
+        workflow_context.scheduling_policy = scheduling.SchedulingPolicy(
+            total=scheduling.Limit(max_concurrency=1))
+        eng = self._engine(
+            workflow_func=mock_workflow,
+            workflow_context=workflow_context,
+            executor=executor,
+            duration_estimator=lambda task: 10 if task.inputs['counter'] == 1 else 1)
+        eng.execute()
+        assert workflow_context.states == ['start', 'success']
+        assert global_test_holder.get('invocations') == [1, 2, 3]
+
 
 class TestCancel(BaseTest):
 
@@ -454,6 +505,105 @@ class TestTaskRetryAndAbort(BaseTest):
         assert global_test_holder.get('sent_task_signal_calls') == 1
 
 
+class TestResume(BaseTest):
+
+    @staticmethod
+    def _workflow(func):
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.sequence(*(BaseTest._op(func, ctx, inputs={'counter': counter})
+                             for counter in (1, 2, 3)))
+        return mock_workflow
+
+    @staticmethod
+    def _stored_tasks(workflow_context):
+        return sorted(workflow_context.model.task.iter(
+            filters={'execution_fk': workflow_context.execution.id}),
+                      key=lambda task: task.id)
+
+    def _interrupt(self, workflow_context, executor):
+        # Stores the tasks as if the execution was interrupted while running the second task
+        self._engine(workflow_func=self._workflow(mock_ordered_task),
+                     workflow_context=workflow_context,
+                     executor=executor)
+        tasks = self._stored_tasks(workflow_context)
+        tasks[0].status = model.Task.SUCCESS
+        tasks[1].status = model.Task.STARTED
+        for task in tasks[:2]:
+            workflow_context.model.task.put(task)
+
+    def test_resume_failed_execution(self, workflow_context, executor):
+        with pytest.raises(exceptions.ExecutorException):
+            self._execute(workflow_func=self._workflow(mock_fail_once_task),
+                          workflow_context=workflow_context,
+                          executor=executor)
+        assert workflow_context.execution.status == model.Execution.FAILED
+        assert global_test_holder.get('invocations') == [1, 2]
+
+        eng = self._engine(workflow_func=self._workflow(mock_fail_once_task),
+                           workflow_context=workflow_context,
+                           executor=executor,
+                           resume=True)
+        eng.execute()
+        assert workflow_context.states == ['start', 'failure', 'start', 'success']
+        assert global_test_holder.get('invocations') == [1, 2, 2, 3]
+        execution = workflow_context.execution
+        assert execution.status == model.Execution.TERMINATED
+        assert execution.error is None
+        tasks = self._stored_tasks(workflow_context)
+        assert len(tasks) == 3
+        assert all(task.status == model.Task.SUCCESS for task in tasks)
+
+    def test_resume_in_flight_task(self, workflow_context, executor):
+        self._interrupt(workflow_context, executor)
+        eng = self._engine(workflow_func=self._workflow(mock_ordered_task),
+                           workflow_context=workflow_context,
+                           executor=executor,
+                           resume=True)
+        eng.execute()
+        assert workflow_context.states == ['start', 'success']
+        assert global_test_holder.get('invocations') == [2, 3]
+        assert len(self._stored_tasks(workflow_context)) == 3
+        # only the tasks run by the resumed execution are recorded
+        task_statistics = workflow_context.model.task_duration_statistics.list()
+        assert [s.count for s in task_statistics] == [2]
+
+    def test_resume_non_idempotent_in_flight_task(self, workflow_context, executor):
+        self._interrupt(workflow_context, executor)
+        eng = self._engine(
+            workflow_func=self._workflow(mock_ordered_task),
+            workflow_context=workflow_context,
+            executor=executor,
+            resume=True,
+            idempotency_policy=resumption.IdempotencyPolicy(
+                operations={'aria.interfaces.lifecycle.create': False}))
+        with pytest.raises(exceptions.ExecutorException):
+            eng.execute()
+        assert workflow_context.states == ['start', 'failure']
+        assert global_test_holder.get('invocations') is None
+        assert [task.status for task in self._stored_tasks(workflow_context)] == \
+               [model.Task.SUCCESS, model.Task.FAILED, model.Task.PENDING]
+
+    def test_resume_interrupted_task_again(self, workflow_context, executor):
+        self._interrupt(workflow_context, executor)
+        idempotency_policy = resumption.IdempotencyPolicy(
+            operations={'aria.interfaces.lifecycle.create': False})
+        for _ in range(2):
+            eng = self._engine(workflow_func=self._workflow(mock_ordered_task),
+                               workflow_context=workflow_context,
+                               executor=executor,
+                               resume=True,
+                               idempotency_policy=idempotency_policy)
+            with pytest.raises(exceptions.ExecutorException):
+                eng.execute()
+        # the interrupted task is not requeued by the second resumption either
+        assert global_test_holder.get('invocations') is None
+        tasks = self._stored_tasks(workflow_context)
+        assert [task.status for task in tasks] == \
+               [model.Task.SUCCESS, model.Task.FAILED, model.Task.PENDING]
+        assert tasks[1].interrupted
+
+
 @operation
 def mock_success_task(**_):
     pass
@@ -470,6 +620,13 @@ def mock_ordered_task(counter, **_):
     invocations.append(counter)
 
 
+@operation
+def mock_fail_once_task(counter, **_):
+    invocations = global_test_holder.setdefault('invocations', [])
+    invocations.append(counter)
+    if counter == 2 and invocations.count(counter) == 1:
+        raise RuntimeError
+
 @operation
 def mock_conditional_failure_task(failure_count, **_):
     invocations = global_test_holder.setdefault('invocations', [])
@@ -486,6 +643,18 @@ def mock_sleep_task(seconds, **_):
     time.sleep(seconds)
 
 
+@operation
+def mock_concurrent_task(seconds, **_):
+    with global_test_lock:
+        running = global_test_holder.get('running_invocations', 0) + 1
+        global_test_holder['running_invocations'] = running
+        global_test_holder['max_concurrent_invocations'] = max(
+            running, global_test_holder.get('max_concurrent_invocations', 0))
+    time.sleep(seconds)
+    with global_test_lock:
+        global_test_holder['running_invocations'] -= 1
+
+
 @operation
 def mock_task_retry(ctx, message, retry_interval=None, **_):
     _add_invocation_timestamp()
@@ -0,0 +1,122 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from itertools import count
+
+from aria.orchestrator.workflows.core.scheduling import (
+    Limit,
+    SchedulingPolicy
+)
+
+
+_ids = count()
+
+
+class MockNodeInstance(object):
+    def __init__(self, id, host_fk=None):
+        self.id = id
+        self.host_fk = host_fk
+
+
+class MockTask(object):
+    def __init__(self, name='operation', runs_on=None, plugin_name=None):
+        self.id = next(_ids)
+        self.name = '{0}.{1}'.format(name, self.id)
+        self.runs_on = runs_on
+        self.plugin_name = plugin_name
+
+
+class MockClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_no_limits():
+    policy = SchedulingPolicy()
+    assert all(policy.acquire(MockTask()) for _ in range(10))
+
+
+def test_total_concurrency():
+    policy = SchedulingPolicy(total=Limit(max_concurrency=2))
+    first_task, second_task, third_task = MockTask(), MockTask(), MockTask()
+    assert policy.acquire(first_task)
+    assert policy.acquire(second_task)
+    assert not policy.acquire(third_task)
+    policy.release(first_task)
+    assert policy.acquire(third_task)
+
+
+def test_per_host_concurrency():
+    host = MockNodeInstance(1)
+    other_host = MockNodeInstance(2)
+    policy = SchedulingPolicy(per_host=Limit(max_concurrency=1))
+    assert policy.acquire(MockTask(runs_on=host))
+    assert not policy.acquire(MockTask(runs_on=MockNodeInstance(3, host_fk=host.id)))
+    assert policy.acquire(MockTask(runs_on=other_host))
+
+
+def test_per_plugin_concurrency():
+    policy = SchedulingPolicy(per_plugin=Limit(max_concurrency=1))
+    assert policy.acquire(MockTask(plugin_name='plugin'))
+    assert not policy.acquire(MockTask(plugin_name='plugin'))
+    assert policy.acquire(MockTask(plugin_name='other_plugin'))
+    assert policy.acquire(MockTask())
+
+
+def test_operation_concurrency():
+    policy = SchedulingPolicy(per_operation=Limit(max_concurrency=2),
+                              operations={'limited': Limit(max_concurrency=1)})
+    assert policy.acquire(MockTask(name='limited'))
+    assert not policy.acquire(MockTask(name='limited'))
+    assert policy.acquire(MockTask(name='operation'))
+    assert policy.acquire(MockTask(name='operation'))
+    assert not policy.acquire(MockTask(name='operation'))
+
+
+def test_group_concurrency():
+    policy = SchedulingPolicy()
+    grouped_tasks = [MockTask(), MockTask()]
+    policy.limit_group('group', [task.id for task in grouped_tasks], Limit(max_concurrency=1))
+    assert policy.acquire(grouped_tasks[0])
+    assert not policy.acquire(grouped_tasks[1])
+    assert policy.acquire(MockTask())
+    policy.release(grouped_tasks[0])
+    assert policy.acquire(grouped_tasks[1])
+
+
+def test_rate():
+    clock = MockClock()
+    policy = SchedulingPolicy(total=Limit(rate=2, burst=2), clock=clock)
+    assert policy.acquire(MockTask())
+    assert policy.acquire(MockTask())
+    assert not policy.acquire(MockTask())
+    clock.now += 0.5
+    assert policy.acquire(MockTask())
+    assert not policy.acquire(MockTask())
+    clock.now += 10
+    assert policy.acquire(MockTask())
+    assert policy.acquire(MockTask())
+    assert not policy.acquire(MockTask())
+
+
+def test_throttled_task_acquires_nothing():
+    policy = SchedulingPolicy(total=Limit(max_concurrency=2),
+                              per_plugin=Limit(max_concurrency=1))
+    assert policy.acquire(MockTask(plugin_name='plugin'))
+    assert not policy.acquire(MockTask(plugin_name='plugin'))
+    assert policy.acquire(MockTask(plugin_name='other_plugin'))
@@ -0,0 +1,166 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, orm
+
+import aria
+from aria.storage import exceptions, model
+from aria.storage.sql_mapi import SQLAlchemyModelAPI
+from aria.orchestrator.workflows.core import statistics
+
+from tests import mock, storage
+
+
+OPERATION_NAME = 'tosca.interfaces.node.lifecycle.Standard.create'
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(storage.get_sqlite_api_kwargs(str(tmpdir)))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+class MockContext(object):
+    def __init__(self, model_storage):
+        self.model = model_storage
+
+
+class MockTask(object):
+    def __init__(self, ctx, seconds, plugin_name=None):
+        node_instance = ctx.model.node_instance.get_by_name(
+            mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+        now = datetime.utcnow()
+        self.model_task = model.Task.as_node_instance(
+            name='{0}.{1}'.format(OPERATION_NAME, node_instance.id),
+            instance=node_instance,
+            runs_on=model.Task.RUNS_ON_NODE_INSTANCE,
+            status=model.Task.SUCCESS,
+            started_at=now,
+            ended_at=now + timedelta(seconds=seconds),
+            plugin_name=plugin_name,
+            execution=ctx.execution)
+        ctx.model.task.put(self.model_task)
+        self.context = MockContext(ctx.model)
+
+
+class TestTaskDurationStatistics(object):
+
+    def test_empty(self):
+        task_statistics = model.TaskDurationStatistics()
+        assert task_statistics.mean is None
+        assert task_statistics.percentile(50) is None
+
+    def test_single_duration(self):
+        task_statistics = model.TaskDurationStatistics()
+        task_statistics.add(3)
+        assert task_statistics.count == 1
+        assert task_statistics.mean == 3
+        assert task_statistics.percentile(50) == 3
+        assert task_statistics.percentile(95) == 3
+
+    def test_percentiles(self):
+        task_statistics = model.TaskDurationStatistics()
+        for duration in range(1, 101):
+            task_statistics.add(duration)
+        assert task_statistics.count == 100
+        assert task_statistics.mean == 50.5
+        assert task_statistics.min_duration == 1
+        assert task_statistics.max_duration == 100
+        # estimations are within the precision of the histogram buckets
+        assert 25 <= task_statistics.percentile(50) <= 100
+        assert 51.2 <= task_statistics.percentile(95) <= 100
+        assert task_statistics.percentile(0) == 1
+        assert task_statistics.percentile(100) == 100
+        assert len(task_statistics.histogram) == \
+               len(model.TaskDurationStatistics.HISTOGRAM_BOUNDS) + 1
+
+
+def test_record_task_duration(ctx):
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    statistics.record_task_duration(MockTask(ctx, seconds=20))
+    statistics.record_task_duration(MockTask(ctx, seconds=30, plugin_name='plugin'))
+
+    all_statistics = statistics.get_statistics(ctx.model, operation_name=OPERATION_NAME)
+    assert len(all_statistics) == 2
+    assert [(s.node_type, s.plugin_name, s.count, s.mean) for s in all_statistics] == \
+           [('test_node_type', '', 2, 15), ('test_node_type', 'plugin', 1, 30)]
+    assert len(statistics.get_statistics(ctx.model, plugin_name='plugin')) == 1
+    assert statistics.get_statistics(ctx.model, node_type='other_node_type') == []
+
+
+def test_duration_estimator(ctx):
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    statistics.record_task_duration(MockTask(ctx, seconds=1000))
+    statistics.record_task_duration(MockTask(ctx, seconds=30, plugin_name='plugin'))
+
+    estimator = statistics.DurationEstimator(ctx.model)
+    # the median is estimated within the precision of the histogram buckets
+    assert 6.4 <= estimator(MockTask(ctx, seconds=0)) <= 12.8
+    assert 25.6 <= estimator(MockTask(ctx, seconds=0, plugin_name='plugin')) <= 51.2
+    assert estimator(MockTask(ctx, seconds=0, plugin_name='other_plugin')) is None
+
+
+def test_statistics_are_unique(ctx):
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    with pytest.raises(exceptions.StorageError):
+        ctx.model.task_duration_statistics.put(model.TaskDurationStatistics(
+            name=OPERATION_NAME, node_type='test_node_type', plugin_name=''))
+
+
+def test_record_task_duration_retries_concurrent_insert(ctx, mocker):
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    original_list = ctx.model.task_duration_statistics.list
+    reads = []
+
+    def list_statistics(*args, **kwargs):
+        reads.append(None)
+        # the first read misses the statistics another engine has just created
+        return original_list(*args, **kwargs) if len(reads) > 1 else []
+    mocker.patch.object(ctx.model.task_duration_statistics, 'list', list_statistics)
+    statistics.record_task_duration(MockTask(ctx, seconds=20))
+
+    all_statistics = statistics.get_statistics(ctx.model)
+    assert [(s.count, s.mean) for s in all_statistics] == [(2, 15)]
+
+
+def test_record_task_duration_retries_concurrent_update(ctx, tmpdir, mocker):
+    statistics.record_task_duration(MockTask(ctx, seconds=10))
+    # another engine, with its own session
+    engine = create_engine('sqlite:///{0}'.format(tmpdir.join('db.sqlite')))
+    other_model_storage = aria.application_model_storage(
+        SQLAlchemyModelAPI, api_kwargs=dict(engine=engine, session=orm.sessionmaker(bind=engine)()))
+    original_list = ctx.model.task_duration_statistics.list
+    reads = []
+
+    def list_statistics(*args, **kwargs):
+        result = original_list(*args, **kwargs)
+        if not reads:
+            # the other engine updates the statistics after they were read
+            other_statistics = other_model_storage.task_duration_statistics.list()[0]
+            other_statistics.add(30)
+            other_model_storage.task_duration_statistics.put(other_statistics)
+        reads.append(result)
+        return result
+    mocker.patch.object(ctx.model.task_duration_statistics, 'list', list_statistics)
+    statistics.record_task_duration(MockTask(ctx, seconds=20))
+
+    assert len(reads) == 2
+    all_statistics = statistics.get_statistics(ctx.model)
+    assert [(s.count, s.mean) for s in all_statistics] == [(3, 20)]
@@ -51,7 +51,8 @@ def test_task_graph_into_execution_graph():
     # Direct check
     execution_graph = DiGraph()
     core.translation.build_execution_graph(task_graph=test_task_graph,
-                                           execution_graph=execution_graph)
+                                           execution_graph=execution_graph,
+                                           keep_markers=True)
     execution_tasks = topological_sort(execution_graph)
 
     assert len(execution_tasks) == 7
@@ -88,6 +89,95 @@ def test_task_graph_into_execution_graph():
     storage.release_sqlite_storage(task_context.model)
 
 
+def test_task_graph_into_flattened_execution_graph():
+    operation_name = 'tosca.interfaces.node.lifecycle.Standard.create'
+    task_context = mock.context.simple(storage.get_sqlite_api_kwargs())
+    node_instance = \
+        task_context.model.node_instance.get_by_name(mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    def sub_workflow(name, **_):
+        return api.task_graph.TaskGraph(name)
+
+    with context.workflow.current.push(task_context):
+        test_task_graph = api.task.WorkflowTask(sub_workflow, name='test_task_graph')
+        simple_before_task = api.task.OperationTask.node_instance(instance=node_instance,
+                                                                  name=operation_name)
+        simple_after_task = api.task.OperationTask.node_instance(instance=node_instance,
+                                                                 name=operation_name)
+
+        inner_task_graph = api.task.WorkflowTask(sub_workflow, name='test_inner_task_graph')
+        inner_tasks = [api.task.OperationTask.node_instance(instance=node_instance,
+                                                            name=operation_name)
+                       for _ in xrange(2)]
+        inner_task_graph.add_tasks(*inner_tasks)
+        empty_task_graph = api.task.WorkflowTask(sub_workflow, name='test_empty_task_graph')
+
+    test_task_graph.add_tasks(simple_before_task)
+    test_task_graph.add_tasks(simple_after_task)
+    test_task_graph.add_tasks(inner_task_graph)
+    test_task_graph.add_tasks(empty_task_graph)
+    test_task_graph.add_dependency(inner_task_graph, simple_before_task)
+    test_task_graph.add_dependency(empty_task_graph, inner_task_graph)
+    test_task_graph.add_dependency(simple_after_task, empty_task_graph)
+
+    execution_graph = DiGraph()
+    core.translation.build_execution_graph(task_graph=test_task_graph,
+                                           execution_graph=execution_graph)
+
+    start_task_name = '{0}-Start'.format(test_task_graph.id)
+    end_task_name = '{0}-End'.format(test_task_graph.id)
+    # the inner tasks run in parallel, so they are joined by the inner graph's end marker
+    inner_end_task_name = '{0}-End'.format(inner_task_graph.id)
+    assert set(execution_graph.nodes()) == set(
+        [start_task_name, simple_before_task.id, simple_after_task.id, end_task_name,
+         inner_end_task_name] +
+        [inner_task.id for inner_task in inner_tasks])
+    assert set(execution_graph.edges()) == set(
+        [(start_task_name, simple_before_task.id),
+         (inner_end_task_name, simple_after_task.id),
+         (simple_after_task.id, end_task_name)] +
+        [(simple_before_task.id, inner_task.id) for inner_task in inner_tasks] +
+        [(inner_task.id, inner_end_task_name) for inner_task in inner_tasks])
+    storage.release_sqlite_storage(task_context.model)
+
+
+def test_adjacent_parallel_groups_joined_by_a_single_marker():
+    operation_name = 'tosca.interfaces.node.lifecycle.Standard.create'
+    task_context = mock.context.simple(storage.get_sqlite_api_kwargs())
+    node_instance = \
+        task_context.model.node_instance.get_by_name(mock.models.DEPENDENCY_NODE_INSTANCE_NAME)
+    def sub_workflow(name, **_):
+        return api.task_graph.TaskGraph(name)
+
+    with context.workflow.current.push(task_context):
+        test_task_graph = api.task.WorkflowTask(sub_workflow, name='test_task_graph')
+        groups = []
+        for group_name in ('first', 'second'):
+            group = api.task.WorkflowTask(sub_workflow, name=group_name)
+            group.add_tasks(*[api.task.OperationTask.node_instance(instance=node_instance,
+                                                                   name=operation_name)
+                              for _ in xrange(3)])
+            groups.append(group)
+
+    test_task_graph.add_tasks(*groups)
+    test_task_graph.add_dependency(groups[1], groups[0])
+
+    execution_graph = DiGraph()
+    core.translation.build_execution_graph(task_graph=test_task_graph,
+                                           execution_graph=execution_graph)
+
+    join_task_name = '{0}-End'.format(groups[0].id)
+    assert isinstance(_get_task_by_name(join_task_name, execution_graph),
+                      core.task.EndSubWorkflowTask)
+    assert '{0}-Start'.format(groups[1].id) not in execution_graph
+    assert set(execution_graph.predecessors(join_task_name)) == \
+        set(task.id for task in groups[0].tasks)
+    assert set(execution_graph.successors(join_task_name)) == \
+        set(task.id for task in groups[1].tasks)
+    # start and end edges, and 3 + 3 edges through the join marker instead of 3 * 3
+    assert len(execution_graph.edges()) == 3 + 3 + 3 + 3
+    storage.release_sqlite_storage(task_context.model)
+
+
 def _assert_execution_is_api_task(execution_task, api_task):
     assert execution_task.id == api_task.id
     assert execution_task.name == api_task.name
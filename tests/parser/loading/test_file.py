@@ -0,0 +1,125 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+import pytest
+
+from aria.parser.loading import (FileTextLoader, LoadingContext, LoadingMetrics, LoaderException,
+                                 DocumentNotFoundException)
+from aria.parser.loading import file as file_loading
+
+
+def _load(path, context=None, **kwargs):
+    loader = FileTextLoader(context or LoadingContext(), path, **kwargs)
+    loader.open()
+    try:
+        return loader.load()
+    finally:
+        loader.close()
+
+
+class TestFileTextLoader(object):
+
+    def test_load(self, tmpdir):
+        path = tmpdir.join('document.yaml')
+        path.write(u'name: m\xe4in\n'.encode('utf-8'), 'wb')
+        context = LoadingContext()
+        assert _load(str(path), context) == u'name: m\xe4in\n'
+        assert context.metrics.count == 1
+        assert context.metrics.size == len(u'name: m\xe4in\n'.encode('utf-8'))
+
+    def test_encoding(self, tmpdir):
+        path = tmpdir.join('document.yaml')
+        path.write(u'name: m\xe4in\n'.encode('latin-1'), 'wb')
+        assert _load(str(path), encoding='latin-1') == u'name: m\xe4in\n'
+        with pytest.raises(LoaderException):
+            _load(str(path))
+
+    def test_empty_file(self, tmpdir):
+        path = tmpdir.join('document.yaml')
+        path.write('')
+        context = LoadingContext()
+        assert _load(str(path), context) == u''
+        assert context.metrics.size == 0
+
+    def test_missing_file(self, tmpdir):
+        with pytest.raises(DocumentNotFoundException):
+            _load(str(tmpdir.join('missing.yaml')))
+
+    def test_directory(self, tmpdir):
+        with pytest.raises(LoaderException):
+            _load(str(tmpdir))
+
+    @pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='no named pipes')
+    def test_pipe_is_read(self, tmpdir, mocker):
+        path = str(tmpdir.join('pipe.yaml'))
+        os.mkfifo(path)
+
+        def write():
+            with open(path, 'wb') as the_pipe:
+                the_pipe.write('name: pipe\n')
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        mapped = mocker.spy(file_loading.mmap, 'mmap')
+        try:
+            assert _load(path) == u'name: pipe\n'
+        finally:
+            thread.join()
+        assert not mapped.called
+
+    def test_file_is_closed_if_mapping_fails(self, tmpdir, mocker):
+        path = tmpdir.join('document.yaml')
+        path.write('name: main\n')
+        opened = []
+
+        def open_file(*args):
+            opened.append(open(*args))
+            return opened[-1]
+
+        mocker.patch.object(file_loading, 'open', side_effect=open_file, create=True)
+        mocker.patch.object(file_loading.mmap, 'mmap', side_effect=EnvironmentError('no mmap'))
+        loader = FileTextLoader(LoadingContext(), str(path))
+        with pytest.raises(LoaderException):
+            loader.open()
+        assert opened[0].closed
+        loader.close()
+
+
+class TestLoadingMetrics(object):
+
+    def test_record(self):
+        metrics = LoadingMetrics()
+        assert str(metrics) == '0 documents, 0 bytes, 0.000s total'
+        metrics.record(10, 0.5)
+        metrics.record(20, 0.25)
+        assert (metrics.count, metrics.size, metrics.total_time) == (2, 30, 0.75)
+        assert str(metrics) == '2 documents, 30 bytes, 0.750s total'
+
+    def test_concurrent_record(self):
+        metrics = LoadingMetrics()
+
+        def record():
+            for _ in range(1000):
+                metrics.record(1, 0.0)
+
+        threads = [threading.Thread(target=record) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert (metrics.count, metrics.size) == (5000, 5000)
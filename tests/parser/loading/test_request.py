@@ -0,0 +1,197 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import stat
+import time
+import getpass
+import threading
+import BaseHTTPServer
+import SocketServer
+
+import pytest
+
+from aria.parser.loading import (LoadingContext, RequestSession, RequestTextLoader,
+                                 BoundedFileCache, LoaderException, DocumentNotFoundException,
+                                 SESSION_CACHE_PATH)
+from aria.parser.loading import request as request_loading
+
+
+LAST_MODIFIED = 'Mon, 19 Oct 2026 09:00:00 GMT'
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests.append((self.path, dict(self.headers)))
+        document = self.server.documents.get(self.path)
+        if document is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        time.sleep(document.get('delay', 0))
+        headers = document.get('headers', {})
+        if (('ETag' in headers) and (self.headers.get('If-None-Match') == headers['ETag'])) or \
+                (('Last-Modified' in headers) and
+                 (self.headers.get('If-Modified-Since') == headers['Last-Modified'])):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(document['body'])))
+        for name, value in headers.iteritems():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(document['body'])
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    the_server = _Server(('127.0.0.1', 0), _Handler)
+    the_server.documents = {}
+    the_server.requests = []
+    the_server.url = 'http://127.0.0.1:%d' % the_server.server_address[1]
+    thread = threading.Thread(target=the_server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield the_server
+    the_server.shutdown()
+    the_server.server_close()
+
+
+@pytest.fixture
+def cache_directory(tmpdir):
+    return str(tmpdir.join('requests'))
+
+
+def _load(session, uri, timeout=10):
+    context = LoadingContext()
+    context.request_session = session
+    context.timeout = timeout
+    loader = RequestTextLoader(context, uri)
+    loader.open()
+    try:
+        return loader.load()
+    finally:
+        loader.close()
+
+
+class TestRequestSession(object):
+
+    @pytest.mark.parametrize('headers', [{'ETag': '"1"'}, {'Last-Modified': LAST_MODIFIED}])
+    def test_revalidation(self, server, cache_directory, headers):
+        server.documents['/a.yaml'] = {'body': 'content', 'headers': headers}
+        session = RequestSession(cache_directory)
+        assert _load(session, server.url + '/a.yaml') == 'content'
+        assert _load(session, server.url + '/a.yaml') == 'content'
+
+        assert len(server.requests) == 2
+        conditional_headers = server.requests[1][1]
+        if 'ETag' in headers:
+            assert conditional_headers['if-none-match'] == '"1"'
+        else:
+            assert conditional_headers['if-modified-since'] == LAST_MODIFIED
+        assert session.metrics.count == 2
+        assert session.metrics.from_cache == 1
+
+    def test_changed_document_is_reloaded(self, server, cache_directory):
+        server.documents['/a.yaml'] = {'body': 'old', 'headers': {'ETag': '"1"'}}
+        session = RequestSession(cache_directory)
+        assert _load(session, server.url + '/a.yaml') == 'old'
+        server.documents['/a.yaml'] = {'body': 'new', 'headers': {'ETag': '"2"'}}
+        assert _load(session, server.url + '/a.yaml') == 'new'
+
+    def test_offline(self, server, cache_directory):
+        server.documents['/a.yaml'] = {'body': 'content', 'headers': {'ETag': '"1"'}}
+        _load(RequestSession(cache_directory), server.url + '/a.yaml')
+
+        session = RequestSession(cache_directory, offline=True)
+        assert _load(session, server.url + '/a.yaml') == 'content'
+        with pytest.raises(DocumentNotFoundException):
+            _load(session, server.url + '/b.yaml')
+        assert len(server.requests) == 1
+
+    def test_not_found(self, server, cache_directory):
+        with pytest.raises(DocumentNotFoundException):
+            _load(RequestSession(cache_directory), server.url + '/missing.yaml')
+
+    def test_timeout(self, server, cache_directory):
+        server.documents['/slow.yaml'] = {'body': 'content', 'delay': 1}
+        session = RequestSession(cache_directory)
+        with pytest.raises(LoaderException) as e:
+            _load(session, server.url + '/slow.yaml', timeout=0.1)
+        assert 'timeout' in str(e.value)
+        assert session.metrics.failed == 1
+
+    def test_cache_directory_is_private(self, cache_directory):
+        os.mkdir(cache_directory, 0755)
+        RequestSession(cache_directory)
+        assert stat.S_IMODE(os.stat(cache_directory).st_mode) == 0700
+
+    def test_symlinked_cache_directory_is_refused(self, tmpdir, cache_directory):
+        os.symlink(str(tmpdir.mkdir('elsewhere')), cache_directory)
+        with pytest.raises(OSError):
+            RequestSession(cache_directory)
+
+
+class TestBoundedFileCache(object):
+
+    def test_evicts_least_recently_used(self, cache_directory):
+        cache = BoundedFileCache(cache_directory, max_size=2500)
+        for i, key in enumerate(('a', 'b', 'c')):
+            cache.set(key, 'x' * 1000)
+            # Make the access times distinct
+            os.utime(cache._fn(key), (i, i))
+        assert cache.get('a') is None
+        assert cache.get('b') is not None
+        assert cache.get('c') is not None
+
+        # Reading refreshes an entry
+        os.utime(cache._fn('b'), (0, 0))
+        assert cache.get('b') is not None
+        cache.set('d', 'x' * 1000)
+        assert cache.get('b') is not None
+        assert cache.get('c') is None
+
+
+class TestGetSession(object):
+
+    def test_default_cache_is_per_user(self):
+        assert getpass.getuser() in os.path.basename(SESSION_CACHE_PATH)
+
+    def test_created_lazily_once(self, mocker, tmpdir):
+        mocker.patch.object(request_loading, '_SESSION', None)
+        mocker.patch.object(request_loading, 'SESSION_CACHE_PATH', str(tmpdir.join('requests')))
+        created = mocker.spy(request_loading.RequestSession, '__init__')
+        context = LoadingContext()
+        assert not created.called
+
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(request_loading.get_session()))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert created.call_count == 1
+        assert len(set(sessions)) == 1
+        assert context.request_session is sessions[0]
@@ -0,0 +1,92 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zipfile
+
+import pytest
+
+from aria.parser.loading import (CsarLoaderSource, DefaultLoaderSource, LoadingContext,
+                                 UriLocation, LiteralLocation, LiteralLoader, UriTextLoader,
+                                 ZipArchive, ZipTextLoader)
+
+
+@pytest.fixture
+def archive(tmpdir):
+    path = str(tmpdir.join('archive.csar'))
+    with zipfile.ZipFile(path, 'w') as the_zip:
+        for name in ('main.yaml', 'common.yaml', 'definitions/types.yaml',
+                     'definitions/nested/more.yaml', 'definitions/common.yaml'):
+            the_zip.writestr(name, 'name: %s\n' % name)
+    the_archive = ZipArchive(path)
+    yield the_archive
+    the_archive.close()
+
+
+class TestDefaultLoaderSource(object):
+
+    def test_loaders(self):
+        source = DefaultLoaderSource()
+        assert isinstance(source.get_loader(LoadingContext(), UriLocation('a.yaml'), None),
+                          UriTextLoader)
+        assert isinstance(source.get_loader(LoadingContext(), LiteralLocation('a'), None),
+                          LiteralLoader)
+        with pytest.raises(NotImplementedError):
+            source.get_loader(LoadingContext(), object(), None)
+
+
+class TestCsarLoaderSource(object):
+
+    def _get_name(self, source, uri, origin_name=None):
+        origin_location = UriLocation(source.archive.get_uri(origin_name)) \
+            if origin_name is not None else None
+        location = UriLocation(uri)
+        loader = source.get_loader(LoadingContext(), location, origin_location)
+        if isinstance(loader, ZipTextLoader):
+            assert location.uri == source.archive.get_uri(loader._name)
+            return loader._name
+        return None
+
+    def test_archive_uri(self, archive):
+        source = CsarLoaderSource(archive)
+        assert self._get_name(source, archive.get_uri('definitions/types.yaml')) == \
+            'definitions/types.yaml'
+
+    def test_relative_to_importing_document(self, archive):
+        source = CsarLoaderSource(archive)
+        assert self._get_name(source, 'common.yaml', 'definitions/types.yaml') == \
+            'definitions/common.yaml'
+        assert self._get_name(source, 'nested/more.yaml', 'definitions/types.yaml') == \
+            'definitions/nested/more.yaml'
+        assert self._get_name(source, '../types.yaml', 'definitions/nested/more.yaml') == \
+            'definitions/types.yaml'
+        assert self._get_name(source, './common.yaml', 'main.yaml') == 'common.yaml'
+
+    def test_relative_to_prefixes(self, archive):
+        source = CsarLoaderSource(archive, prefixes=('', 'definitions'))
+        assert self._get_name(source, 'common.yaml') == 'common.yaml'
+        assert self._get_name(source, 'types.yaml') == 'definitions/types.yaml'
+        assert self._get_name(source, 'nested/more.yaml', 'main.yaml') == \
+            'definitions/nested/more.yaml'
+        # Only the root by default
+        assert self._get_name(CsarLoaderSource(archive), 'types.yaml') is None
+
+    def test_other_uris_use_default_loaders(self, archive):
+        source = CsarLoaderSource(archive)
+        for uri in ('missing.yaml', '/main.yaml', 'http://example.com/main.yaml',
+                    'tosca-simple-1.0/tosca-simple-1.0.yaml'):
+            loader = source.get_loader(LoadingContext(), UriLocation(uri), None)
+            assert isinstance(loader, UriTextLoader)
+        assert isinstance(source.get_loader(LoadingContext(), LiteralLocation('a'), None),
+                          LiteralLoader)
@@ -0,0 +1,189 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from aria.parser.loading import (LoadingContext, UriLocation, UriTextLoader, UriResolutionCache,
+                                 RequestTextLoader, DocumentNotFoundException)
+from aria.parser.loading import uri as uri_loading
+
+
+class TestUriResolutionCache(object):
+
+    @pytest.fixture
+    def now(self, mocker):
+        now = [1000.0]
+        mocker.patch.object(uri_loading.time, 'time', side_effect=lambda: now[0])
+        return now
+
+    def test_get_and_put(self):
+        cache = UriResolutionCache()
+        assert cache.get('http://example.com/a.yaml', ['http://prefix/']) == (False, None)
+        cache.put('http://example.com/a.yaml', ['http://prefix/'], 'http://prefix/a.yaml')
+        assert cache.get('http://example.com/a.yaml', ['http://prefix/']) == \
+            (True, 'http://prefix/a.yaml')
+        # The prefixes are part of the key
+        assert cache.get('http://example.com/a.yaml', []) == (False, None)
+        cache.discard('http://example.com/a.yaml', ['http://prefix/'])
+        assert cache.get('http://example.com/a.yaml', ['http://prefix/']) == (False, None)
+
+    def test_remote_entries_and_failures_expire(self, now):
+        cache = UriResolutionCache(ttl=10)
+        cache.put('a.yaml', ['http://prefix/'], 'http://prefix/a.yaml')
+        cache.put('b.yaml', ['http://prefix/'], None)
+        now[0] += 10
+        assert cache.get('a.yaml', ['http://prefix/']) == (True, 'http://prefix/a.yaml')
+        assert cache.get('b.yaml', ['http://prefix/']) == (True, None)
+        now[0] += 1
+        assert cache.get('a.yaml', ['http://prefix/']) == (False, None)
+        assert cache.get('b.yaml', ['http://prefix/']) == (False, None)
+
+    def test_validated_entries_do_not_expire(self, now, tmpdir):
+        cache = UriResolutionCache(ttl=10)
+        path = str(tmpdir.join('a.yaml'))
+        cache.put('a.yaml', [str(tmpdir)], path, expires=False)
+        now[0] += 1000
+        assert cache.get('a.yaml', [str(tmpdir)]) == (True, path)
+
+    def test_relative_paths_are_keyed_by_current_directory(self, tmpdir, monkeypatch):
+        cache = UriResolutionCache()
+        monkeypatch.chdir(str(tmpdir.mkdir('first')))
+        cache.put('a.yaml', [], 'first/a.yaml')
+        cache.put('/abs/a.yaml', ['http://prefix/'], '/abs/a.yaml')
+        cache.put('/abs/b.yaml', ['definitions'], '/abs/definitions/b.yaml')
+        monkeypatch.chdir(str(tmpdir.mkdir('second')))
+        assert cache.get('a.yaml', []) == (False, None)
+        assert cache.get('/abs/a.yaml', ['http://prefix/']) == (True, '/abs/a.yaml')
+        assert cache.get('/abs/b.yaml', ['definitions']) == (False, None)
+
+    def test_persistence(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        cache = UriResolutionCache(path)
+        cache.put('a.yaml', ['http://prefix/'], 'http://prefix/a.yaml')
+        cache.put('b.yaml', [], None)
+        cache.save()
+        loaded = UriResolutionCache(path)
+        assert loaded.get('a.yaml', ['http://prefix/']) == (True, 'http://prefix/a.yaml')
+        assert loaded.get('b.yaml', []) == (True, None)
+
+    def test_save_replaces_file(self, tmpdir, mocker):
+        path = tmpdir.join('cache.json')
+        cache = UriResolutionCache(str(path))
+        cache.put('a.yaml', [], None)
+        cache.save()
+        saved = path.read()
+        cache.put('b.yaml', [], None)
+        mocker.patch.object(uri_loading.json, 'dump', side_effect=IOError('disk full'))
+        with pytest.raises(IOError):
+            cache.save()
+        assert path.read() == saved
+        assert tmpdir.listdir() == [path]
+
+    @pytest.mark.parametrize('content', ['', 'not json', '{}', '[[1, 2]]',
+                                         '[["a.yaml", [], null, 1000.0]]'])
+    def test_corrupt_cache_file_is_ignored(self, tmpdir, content):
+        path = tmpdir.join('cache.json')
+        path.write(content)
+        cache = UriResolutionCache(str(path))
+        assert cache.get('a.yaml', []) == (False, None)
+        cache.put('a.yaml', [], None)
+        cache.save()
+        assert UriResolutionCache(str(path)).get('a.yaml', []) == (True, None)
+
+
+class TestUriTextLoaderResolution(object):
+
+    @pytest.fixture
+    def context(self, mocker):
+        # No global prefixes from extensions
+        mocker.patch.object(uri_loading.parser, 'uri_loader_prefix', return_value=[])
+        context = LoadingContext()
+        context.resolution_cache = UriResolutionCache()
+        return context
+
+    @pytest.fixture
+    def prefixes(self, tmpdir):
+        first = tmpdir.mkdir('first')
+        second = tmpdir.mkdir('second')
+        return first, second
+
+    def _load(self, context, uri):
+        loader = UriTextLoader(context, UriLocation(uri))
+        loader.open()
+        try:
+            return loader.load(), loader.location.uri
+        finally:
+            loader.close()
+
+    def test_resolution_is_cached(self, context, prefixes, mocker):
+        first, second = prefixes
+        second.join('a.yaml').write('content')
+        context.prefixes.extend((str(first), str(second)))
+        assert self._load(context, 'a.yaml') == ('content', str(second.join('a.yaml')))
+
+        open_uri = mocker.spy(UriTextLoader, '_open')
+        assert self._load(context, 'a.yaml') == ('content', str(second.join('a.yaml')))
+        assert open_uri.call_count == 1
+
+    def test_stale_entry_is_resolved_again(self, context, prefixes):
+        first, second = prefixes
+        second.join('a.yaml').write('second')
+        context.prefixes.extend((str(first), str(second)))
+        self._load(context, 'a.yaml')
+        second.join('a.yaml').remove()
+        first.join('a.yaml').write('first')
+        assert self._load(context, 'a.yaml') == ('first', str(first.join('a.yaml')))
+
+    def test_entry_is_not_kept_once_preceding_file_exists(self, context, prefixes):
+        first, second = prefixes
+        second.join('a.yaml').write('second')
+        context.prefixes.extend((str(first), str(second)))
+        assert self._load(context, 'a.yaml') == ('second', str(second.join('a.yaml')))
+        first.join('a.yaml').write('first')
+        assert self._load(context, 'a.yaml') == ('first', str(first.join('a.yaml')))
+
+    def test_entry_preceded_by_remote_uri_expires(self, context, prefixes, mocker):
+        _, second = prefixes
+        second.join('a.yaml').write('second')
+        context.prefixes.extend(('http://example.com/', str(second)))
+        request_open = mocker.patch.object(
+            RequestTextLoader, 'open', side_effect=DocumentNotFoundException('not found'))
+        now = [1000.0]
+        mocker.patch.object(uri_loading.time, 'time', side_effect=lambda: now[0])
+        self._load(context, 'a.yaml')
+        self._load(context, 'a.yaml')
+        assert request_open.call_count == 1
+        now[0] += context.resolution_cache.ttl + 1
+        assert self._load(context, 'a.yaml') == ('second', str(second.join('a.yaml')))
+        assert request_open.call_count == 2
+
+    def test_failure_is_not_kept_once_file_exists(self, context, prefixes):
+        first, second = prefixes
+        context.prefixes.extend((str(first), str(second)))
+        with pytest.raises(DocumentNotFoundException):
+            self._load(context, 'a.yaml')
+        assert context.resolution_cache.get('a.yaml', context.prefixes) == (True, None)
+
+        second.join('a.yaml').write('content')
+        assert self._load(context, 'a.yaml') == ('content', str(second.join('a.yaml')))
+
+    def test_remote_failure_is_cached(self, context, mocker):
+        request_open = mocker.patch.object(
+            RequestTextLoader, 'open', side_effect=DocumentNotFoundException('not found'))
+        context.prefixes.append('http://example.com/')
+        for _ in range(2):
+            with pytest.raises(DocumentNotFoundException):
+                self._load(context, 'http://example.com/missing.yaml')
+        assert request_open.call_count == 2  # the URI and the prefix, only once
@@ -0,0 +1,148 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import zipfile
+import threading
+
+import pytest
+
+from aria.parser.loading import (ZipArchive, ZipTextLoader, LoadingContext, UriLocation,
+                                 LoaderException, DocumentNotFoundException)
+
+
+@pytest.fixture
+def archive_path(tmpdir):
+    path = str(tmpdir.join('archive.zip'))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as the_zip:
+        the_zip.writestr('definitions/', '')
+        the_zip.writestr('definitions/main.yaml', u'name: m\xe4in\n'.encode('utf-8'))
+        the_zip.writestr('definitions/types.yaml', 'types: {}\n')
+        the_zip.writestr('latin1.yaml', u'name: m\xe4in\n'.encode('latin-1'))
+    return path
+
+
+@pytest.fixture
+def archive(archive_path):
+    the_archive = ZipArchive(archive_path)
+    yield the_archive
+    the_archive.close()
+
+
+class TestZipArchive(object):
+
+    def test_names(self, archive):
+        assert archive.names == set(['definitions/main.yaml', 'definitions/types.yaml',
+                                     'latin1.yaml'])
+        assert 'definitions/main.yaml' in archive
+        assert 'definitions/' not in archive
+        assert 'missing.yaml' not in archive
+
+    def test_uris(self, archive, archive_path):
+        uri = archive.get_uri('definitions/main.yaml')
+        assert uri == archive_path + '!/definitions/main.yaml'
+        assert archive.get_name(uri) == 'definitions/main.yaml'
+        assert archive.get_name(archive_path) is None
+        assert archive.get_name('/elsewhere.zip!/definitions/main.yaml') is None
+
+    def test_path_is_absolute(self, archive_path, monkeypatch):
+        monkeypatch.chdir(os.path.dirname(archive_path))
+        archive = ZipArchive('archive.zip')
+        try:
+            assert archive.path == archive_path
+        finally:
+            archive.close()
+
+    def test_read(self, archive):
+        assert archive.read('definitions/types.yaml') == 'types: {}\n'
+        with pytest.raises(DocumentNotFoundException):
+            archive.read('missing.yaml')
+
+    def test_open(self, archive):
+        member = archive.open('definitions/types.yaml')
+        try:
+            assert member.read() == 'types: {}\n'
+        finally:
+            member.close()
+        with pytest.raises(DocumentNotFoundException):
+            archive.open('missing.yaml')
+
+    def test_concurrent_reads(self, archive):
+        results = []
+
+        def read():
+            for _ in range(20):
+                results.append(archive.read('definitions/types.yaml'))
+
+        threads = [threading.Thread(target=read) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ['types: {}\n'] * 100
+
+    def test_extract(self, archive, tmpdir):
+        destination = tmpdir.join('extracted')
+        archive.extract(str(destination), ['definitions/types.yaml'])
+        assert destination.join('definitions', 'types.yaml').read() == 'types: {}\n'
+        assert not destination.join('definitions', 'main.yaml').check()
+        archive.extract(str(destination))
+        assert destination.join('latin1.yaml').check()
+
+    def test_not_a_zip(self, tmpdir):
+        path = tmpdir.join('not.zip')
+        path.write('not a zip')
+        with pytest.raises(LoaderException):
+            ZipArchive(str(path))
+        with pytest.raises(LoaderException):
+            ZipArchive(str(tmpdir.join('missing.zip')))
+
+
+class TestZipTextLoader(object):
+
+    def _loader(self, archive, name, **kwargs):
+        return ZipTextLoader(LoadingContext(), archive, UriLocation(archive.get_uri(name)),
+                             **kwargs)
+
+    def test_load(self, archive):
+        loader = self._loader(archive, 'definitions/main.yaml')
+        loader.open()
+        try:
+            assert loader.load() == u'name: m\xe4in\n'
+        finally:
+            loader.close()
+        assert loader.context.metrics.count == 1
+        assert loader.context.metrics.size == len(u'name: m\xe4in\n'.encode('utf-8'))
+
+    def test_encoding(self, archive):
+        loader = self._loader(archive, 'latin1.yaml', encoding='latin-1')
+        loader.open()
+        assert loader.load() == u'name: m\xe4in\n'
+
+    def test_decoding_error(self, archive):
+        loader = self._loader(archive, 'latin1.yaml')
+        loader.open()
+        with pytest.raises(LoaderException):
+            loader.load()
+
+    def test_missing_member(self, archive):
+        loader = self._loader(archive, 'missing.yaml')
+        with pytest.raises(DocumentNotFoundException):
+            loader.open()
+
+    def test_origin_location(self, archive):
+        origin_location = UriLocation(archive.get_uri('definitions/main.yaml'))
+        loader = self._loader(archive, 'definitions/types.yaml', origin_location=origin_location)
+        assert loader.origin_location is origin_location
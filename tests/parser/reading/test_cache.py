@@ -0,0 +1,142 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import datetime
+
+import pytest
+
+from aria.parser.loading import DefaultLoaderSource, LoadingContext, UriLocation
+from aria.parser.reading import ReadingCache, YamlReader, JsonReader, JinjaReader
+from aria.parser.reading.locator import Locator
+from aria.utils.collections import OrderedDict
+
+
+YAML_DOCUMENT = u"""\
+name: hello
+numbers: [1, 2.5, true, null, "\u00fc"]
+created: 2001-12-14t21:59:43.10-05:00
+day: 2002-12-14
+blob: !!binary aGVsbG8=
+tags: !!set {x, y}
+nested:
+  key: value
+"""
+
+
+def _read(path, reader_class=YamlReader, cache=None):
+    location = UriLocation(path)
+    loader = DefaultLoaderSource().get_loader(LoadingContext(), location, None)
+    reader = reader_class(None, location, loader)
+    return cache.read(reader) if cache is not None else reader.read()
+
+
+def _locator_tree(locator):
+    children = locator.children
+    if isinstance(children, list):
+        children = [_locator_tree(child) for child in children]
+    elif isinstance(children, dict):
+        children = dict((k, _locator_tree(child)) for k, child in children.iteritems())
+    return locator.line, locator.column, children
+
+
+class TestReadingCache(object):
+
+    @pytest.fixture
+    def cache(self, tmpdir):
+        return ReadingCache(str(tmpdir.join('cache')))
+
+    @pytest.fixture
+    def document(self, tmpdir):
+        path = tmpdir.join('document.yaml')
+        path.write_text(YAML_DOCUMENT, 'utf-8')
+        return str(path)
+
+    def _entries(self, cache):
+        return os.listdir(cache.directory) if os.path.isdir(cache.directory) else []
+
+    def test_entry_reproduces_raw_data_and_locators(self, cache, document):
+        expected = _read(document)
+        _read(document, cache=cache)
+        assert len(self._entries(cache)) == 1
+
+        raw = _read(document, cache=cache)
+        assert raw == expected
+        assert isinstance(raw, OrderedDict)
+        assert raw.keys() == expected.keys()
+        assert isinstance(raw['created'], datetime.datetime)
+        assert isinstance(raw['day'], datetime.date)
+        assert raw['blob'] == 'hello' and isinstance(raw['blob'], str)
+        assert raw['tags'] == set(['x', 'y'])
+        assert isinstance(raw._locator, Locator)
+        assert raw._locator.location is not None
+        assert _locator_tree(raw._locator) == _locator_tree(expected._locator)
+
+    def test_entry_is_plain_json(self, cache, document):
+        _read(document, cache=cache)
+        entry, = self._entries(cache)
+        assert entry.endswith('.json')
+        with open(os.path.join(cache.directory, entry)) as the_file:
+            assert 'hello' in the_file.read()
+
+    def test_hit_does_not_read(self, cache, document, mocker):
+        _read(document, cache=cache)
+        read = mocker.patch.object(YamlReader, 'read')
+        assert _read(document, cache=cache)['name'] == 'hello'
+        assert not read.called
+
+    def test_changed_document_is_a_miss(self, cache, document, tmpdir):
+        _read(document, cache=cache)
+        tmpdir.join('document.yaml').write_text(u'name: changed\n', 'utf-8')
+        assert _read(document, cache=cache)['name'] == 'changed'
+        assert len(self._entries(cache)) == 2
+
+    @pytest.mark.parametrize('content', ['', 'not json', '[1, 2]', '[["x", []], null]',
+                                         '[["d", [[1]]], null]', '[["d", []], [1, 2]]',
+                                         '{"py/object": "os.system"}'])
+    def test_corrupt_entry_is_a_miss(self, cache, document, content):
+        _read(document, cache=cache)
+        entry, = self._entries(cache)
+        with open(os.path.join(cache.directory, entry), 'w') as the_file:
+            the_file.write(content)
+        assert _read(document, cache=cache) == _read(document)
+
+    def test_unsupported_value_is_not_cached(self, cache, document, mocker):
+        raw = OrderedDict(value=object())
+        mocker.patch.object(YamlReader, 'read', return_value=raw)
+        assert _read(document, cache=cache) is raw
+        assert self._entries(cache) == []
+
+    def test_unwritable_directory_does_not_fail_reading(self, tmpdir, document):
+        blocker = tmpdir.join('blocker')
+        blocker.write('')
+        cache = ReadingCache(str(blocker.join('cache')))
+        assert _read(document, cache=cache)['name'] == 'hello'
+
+    def test_json_document(self, cache, tmpdir):
+        path = tmpdir.join('document.json')
+        path.write('{"b": [1, {"c": "d"}], "a": 1.5}')
+        _read(str(path), JsonReader, cache)
+        raw = _read(str(path), JsonReader, cache)
+        assert raw == {'b': [1, {'c': 'd'}], 'a': 1.5}
+        assert raw.keys() == ['b', 'a']
+
+    def test_other_readers_are_not_cached(self, cache, tmpdir, mocker):
+        path = tmpdir.join('document.yaml.jinja')
+        path.write('name: hello\n')
+        read = mocker.patch.object(JinjaReader, 'read', return_value=OrderedDict())
+        _read(str(path), JinjaReader, cache)
+        assert read.called
+        assert self._entries(cache) == []
@@ -0,0 +1,82 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from aria.parser.loading import DefaultLoaderSource, LoadingContext, UriLocation, LiteralLocation
+from aria.parser.reading import ReadingContext, JinjaReader, YamlReader, AlreadyReadException
+
+
+TEMPLATE = """\
+name: {{ 'document' | upper }}
+items:
+{% for i in range(2) %}
+  - {{ i }}
+{% endfor %}
+"""
+
+
+def _get_reader(context, location):
+    loader = DefaultLoaderSource().get_loader(LoadingContext(), location, None)
+    return context.reader_source.get_reader(context, location, loader)
+
+
+class TestJinjaReader(object):
+
+    @pytest.fixture
+    def template_path(self, tmpdir):
+        path = tmpdir.join('document.yaml.jinja')
+        path.write(TEMPLATE)
+        return str(path)
+
+    def test_read(self, template_path):
+        reader = _get_reader(ReadingContext(), UriLocation(template_path))
+        assert isinstance(reader, JinjaReader)
+        assert reader.read() == {'name': 'DOCUMENT', 'items': [0, 1]}
+
+    def test_rendered_document_keeps_template_location(self, template_path):
+        context = ReadingContext()
+        raw = _get_reader(context, UriLocation(template_path)).read()
+
+        # Locators point at the template
+        locator = raw._locator
+        assert str(locator.location) == template_path
+        assert locator.children['items'].children[1].location is locator.location
+        assert locator.children['name'].line == 1
+
+        # The template is the only document read, so it is not read again
+        assert len(context.locations) == 1
+        assert UriLocation(template_path) in context.locations
+        with pytest.raises(AlreadyReadException):
+            _get_reader(context, UriLocation(template_path)).read()
+
+    def test_literal(self):
+        context = ReadingContext()
+        location = LiteralLocation(TEMPLATE)
+        loader = DefaultLoaderSource().get_loader(LoadingContext(), location, None)
+        assert JinjaReader(context, location, loader).read() == \
+            {'name': 'DOCUMENT', 'items': [0, 1]}
+        assert len(context.locations) == 1
+
+
+class TestReader(object):
+
+    def test_preload(self, mocker):
+        loader = mocker.MagicMock()
+        reader = YamlReader(ReadingContext(), LiteralLocation('name: loaded'), loader)
+        reader.preload(u'name: preloaded')
+        assert reader.read() == {'name': 'preloaded'}
+        assert not loader.open.called
+        assert not loader.load.called
@@ -0,0 +1,118 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+from aria.parser.loading import UriLocation, LiteralLocation
+from aria.parser.loading.location import Location
+from aria.parser.reading import LocationIndex
+
+
+class NamedLocation(Location):
+
+    def __init__(self, name):
+        self.name = name
+
+    def is_equivalent(self, location):
+        return isinstance(location, NamedLocation) and (location.name == self.name)
+
+
+class TestLocationIndex(object):
+
+    def test_add(self):
+        index = LocationIndex()
+        location = UriLocation('http://example.com/a.yaml')
+        assert index.add(location)
+        assert not index.add(UriLocation('http://example.com/a.yaml'))
+        assert location in index
+        assert UriLocation('http://example.com/b.yaml') not in index
+        assert len(index) == 1
+
+    def test_links_to_the_same_file(self, tmpdir):
+        target = tmpdir.join('target.yaml')
+        target.write('')
+        os.symlink(str(target), str(tmpdir.join('link.yaml')))
+        index = LocationIndex()
+        assert index.add(UriLocation(str(target)))
+        assert not index.add(UriLocation(str(tmpdir.join('link.yaml'))))
+        assert not index.add(UriLocation('file://%s' % target))
+
+    def test_missing_files_are_normalized(self, tmpdir):
+        index = LocationIndex()
+        assert index.add(UriLocation(str(tmpdir.join('missing.yaml'))))
+        assert not index.add(UriLocation(str(tmpdir.join('sub', '..', 'missing.yaml'))))
+        assert index.add(UriLocation(str(tmpdir.join('other.yaml'))))
+
+    def test_uri_scheme_and_host_are_case_insensitive(self):
+        index = LocationIndex()
+        assert index.add(UriLocation('http://example.com/a.yaml'))
+        assert not index.add(UriLocation('HTTP://Example.COM/a.yaml'))
+        assert index.add(UriLocation('http://example.com/A.yaml'))
+
+    def test_literals_are_compared_by_content(self):
+        index = LocationIndex()
+        assert index.add(LiteralLocation('content', name='first'))
+        assert not index.add(LiteralLocation('content', name='second'))
+        assert index.add(LiteralLocation('other content'))
+
+    def test_unhashable_literals_are_compared_by_equality(self):
+        index = LocationIndex()
+        assert index.add(LiteralLocation({'a': [1]}))
+        assert not index.add(LiteralLocation({'a': [1]}))
+        assert LiteralLocation({'a': [1]}) in index
+        assert index.add(LiteralLocation({'a': [2]}))
+        assert len(index) == 2
+
+    def test_other_locations_use_is_equivalent(self):
+        index = LocationIndex()
+        assert index.add(NamedLocation('a'))
+        assert not index.add(NamedLocation('a'))
+        assert index.add(NamedLocation('b'))
+
+    def test_origin_locations(self):
+        index = LocationIndex()
+        root = UriLocation('http://example.com/root.yaml')
+        imported = UriLocation('http://example.com/imported.yaml')
+        literal = LiteralLocation([1])
+        index.add(root)
+        index.add(imported, root)
+        index.add(literal, imported)
+        # Only the first origin is kept
+        index.add(UriLocation('http://example.com/imported.yaml'), imported)
+        assert index.get_origin_location(root) is None
+        assert index.get_origin_location(UriLocation('http://example.com/imported.yaml')) is root
+        assert index.get_origin_location(LiteralLocation([1])) is imported
+        assert index.get_origin_location(UriLocation('http://example.com/other.yaml')) is None
+        assert set(index.iter_imports()) == set([(None, root), (root, imported),
+                                                 (imported, literal)])
+
+    def test_concurrent_adds(self):
+        index = LocationIndex()
+        added = []
+
+        def add(location):
+            added.append(index.add(location))
+
+        threads = [threading.Thread(target=add, args=(location,))
+                   for _ in range(20)
+                   for location in (UriLocation('http://example.com/a.yaml'),
+                                    LiteralLocation({'a': 1}))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert added.count(True) == 2
+        assert len(index) == 2
@@ -0,0 +1,94 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from aria.parser.loading import LiteralLocation, LiteralLoader
+from aria.parser.reading import YamlReader
+from aria.parser.reading import yaml as yaml_reading
+
+
+ALIASED_DOCUMENT = """\
+defaults: &defaults
+  image: base
+  ports: &ports
+    - 80
+    - {port: 443, secure: true}
+first:
+  <<: *defaults
+  name: first
+second:
+  settings: *defaults
+  ports: *ports
+  more:
+    - *ports
+    - *defaults
+"""
+
+
+def generate_topology(node_templates):
+    """
+    Generates a TOSCA-like document with the given number of node templates.
+    """
+
+    lines = ['tosca_definitions_version: tosca_simple_yaml_1_0',
+             'topology_template:',
+             '  node_templates:']
+    for i in range(node_templates):
+        lines.extend(('    node_%d:' % i,
+                      '      type: tosca.nodes.Compute',
+                      '      properties:',
+                      '        name: node %d' % i,
+                      '        ports: [%d, %d]' % (i, i + 1),
+                      '      requirements:',
+                      '        - host: node_%d' % max(i - 1, 0)))
+    return '\n'.join(lines) + '\n'
+
+
+def read(content, use_libyaml):
+    location = LiteralLocation(content)
+    reader = YamlReader(None, location, LiteralLoader(location))
+    reader.use_libyaml = use_libyaml
+    return reader.read()
+
+
+def locator_tree(locator):
+    children = locator.children
+    if isinstance(children, list):
+        children = [locator_tree(child) for child in children]
+    elif isinstance(children, dict):
+        children = dict((k, locator_tree(child)) for k, child in children.iteritems())
+    return locator.line, locator.column, children
+
+
+# pylint: disable=no-member
+@pytest.mark.skipif(yaml_reading.CYamlLoader is None, reason='ruamel.yaml built without libyaml')
+class TestLibyamlReader(object):
+
+    @pytest.mark.parametrize('content', [ALIASED_DOCUMENT, generate_topology(20), ''])
+    def test_same_as_python_reader(self, content):
+        python_raw = read(content, False)
+        libyaml_raw = read(content, True)
+        assert libyaml_raw == python_raw
+        assert locator_tree(libyaml_raw._locator) == locator_tree(python_raw._locator)
+
+    def test_aliased_occurrences_have_locators(self):
+        locator = read(ALIASED_DOCUMENT, True)._locator
+        settings = locator.children['second'].children['settings']
+        assert settings.children['image'].line == 2
+        more = locator.children['second'].children['more']
+        assert [loc.line for loc in more.children[0].children] == [4, 5]
+        assert more.children[1].children['ports'].children[1].children['port'].line == 5
+        assert locator.children['first'].children['ports'].children[1].column == 7
@@ -150,6 +150,7 @@ def test_application_storage_factory():
     assert storage.deployment_update_step
     assert storage.deployment_modification
     assert storage.execution
+    assert storage.task_duration_statistics
 
     release_sqlite_storage(storage)
 
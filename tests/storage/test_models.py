@@ -335,7 +335,8 @@ class TestExecution(object):
                                    Execution.TERMINATED,
                                    Execution.CANCELLED,
                                    Execution.CANCELLING],
-            Execution.FAILED: [Execution.FAILED],
+            Execution.FAILED: [Execution.FAILED,
+                               Execution.STARTED],
             Execution.TERMINATED: [Execution.TERMINATED],
             Execution.CANCELLED: [Execution.CANCELLED]
         }
@@ -348,7 +349,6 @@ class TestExecution(object):
             Execution.CANCELLING: [Execution.PENDING,
                                    Execution.STARTED],
             Execution.FAILED: [Execution.PENDING,
-                               Execution.STARTED,
                                Execution.TERMINATED,
                                Execution.CANCELLED,
                                Execution.CANCELLING],
@@ -189,3 +189,20 @@ class TestResourceStorage(TestFileSystem):
 
         with pytest.raises(exceptions.StorageError):
             storage.blueprint.read(entry_id='blueprint_id')
+
+    def test_stat_file(self):
+        storage = self._create_storage()
+        self._create(storage)
+        tmpfile_path = tempfile.mkstemp(suffix=self.__class__.__name__, dir=self.path)[1]
+        self._upload(storage, tmpfile_path, 'blueprint_id')
+
+        location, modified_at, size = storage.blueprint.stat(entry_id='blueprint_id')
+        assert os.path.isabs(location)
+        assert modified_at == os.path.getmtime(location)
+        assert size == len('fake context')
+
+    def test_stat_non_existing_file(self):
+        storage = self._create_storage()
+        self._create(storage)
+        with pytest.raises(exceptions.StorageError):
+            storage.blueprint.stat(entry_id='blueprint_id', path='fake_path')
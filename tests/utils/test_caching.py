@@ -0,0 +1,52 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from aria.utils import caching
+
+
+class TestLRUCache(object):
+
+    def test_get_and_set(self):
+        cache = caching.LRUCache(capacity=2)
+        cache['a'] = 1
+        assert cache['a'] == 1
+        assert cache.get('a') == 1
+        assert cache.get('b', 2) == 2
+        assert 'a' in cache
+        assert 'b' not in cache
+        with pytest.raises(KeyError):
+            cache['b']                                                                              # pylint: disable=pointless-statement
+
+    def test_least_recently_used_evicted(self):
+        cache = caching.LRUCache(capacity=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert len(cache) == 2
+
+    def test_pop_and_clear(self):
+        cache = caching.LRUCache(capacity=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        assert cache.pop('a') == 1
+        assert cache.pop('a') is None
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,80 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from jinja2.sandbox import SandboxedEnvironment
+
+from aria.utils import templates
+
+
+class TestTemplateCache(object):
+
+    def test_render(self, cache):
+        assert cache.render('{{ a }}-{{ b }}', a=1, b=2) == '1-2'
+        assert cache.render(u'{{ a }}\u2713', {'a': 1}) == u'1\u2713'
+
+    def test_same_source_compiled_once(self, cache, mocker):
+        compile_spy = mocker.spy(cache.environment, 'compile')
+        template = cache.get_template('{{ a }}')
+        assert cache.get_template('{{ a }}') is template
+        assert cache.get_template('{{ b }}') is not template
+        assert compile_spy.call_count == 2
+
+    def test_bytecode_shared_between_caches(self, cache, tmpdir, mocker):
+        cache.get_template('{{ a }}')
+        other_cache = templates.TemplateCache(bytecode_cache_dir=str(tmpdir))
+        compile_spy = mocker.spy(other_cache.environment, 'compile')
+        assert other_cache.render('{{ a }}', a=1) == '1'
+        assert compile_spy.call_count == 0
+
+    def test_least_recently_used_evicted(self, tmpdir):
+        cache = templates.TemplateCache(capacity=1, bytecode_cache_dir=str(tmpdir))
+        template = cache.get_template('{{ a }}')
+        cache.get_template('{{ b }}')
+        assert cache.get_template('{{ a }}') is not template
+
+    def test_environment_globals(self, cache):
+        assert cache.render('{% for i in range(3) %}{{ i }}{% endfor %}') == '012'
+
+    def test_bytecode_not_shared_with_other_environments(self, cache, tmpdir, mocker):
+        cache.get_template('{{ a }}')
+        sandboxed_cache = templates.TemplateCache(bytecode_cache_dir=str(tmpdir),
+                                                  environment_class=SandboxedEnvironment)
+        compile_spy = mocker.spy(sandboxed_cache.environment, 'compile')
+        sandboxed_cache.get_template('{{ a }}')
+        assert compile_spy.call_count == 1
+
+    def test_render_cached_by_referenced_values(self, tmpdir, mocker):
+        cache = templates.TemplateCache(bytecode_cache_dir=str(tmpdir), render_capacity=10)
+        render_spy = mocker.spy(cache.get_template('{{ a.x }}'), 'render')
+        assert cache.render('{{ a.x }}', a={'x': 1}, b=1) == '1'
+        assert cache.render('{{ a.x }}', a={'x': 1}, b=2) == '1'
+        assert render_spy.call_count == 1
+        assert cache.render('{{ a.x }}', a={'x': 2}, b=2) == '2'
+        assert render_spy.call_count == 2
+
+    def test_render_cached_by_referenced_types(self, tmpdir):
+        cache = templates.TemplateCache(bytecode_cache_dir=str(tmpdir), render_capacity=10)
+        assert cache.render('{{ a }}', a=1) == '1'
+        assert cache.render('{{ a }}', a=True) == 'True'
+        assert cache.render('{{ a }}', a=1.0) == '1.0'
+        assert cache.render('{{ a }}', a={'x': 1}) == "{'x': 1}"
+        assert cache.render('{{ a }}', a={'x': True}) == "{'x': True}"
+        assert cache.render('{{ a }}', a=[1]) == '[1]'
+        assert cache.render('{{ a }}', a=(1,)) == '(1,)'
+
+    @pytest.fixture
+    def cache(self, tmpdir):
+        return templates.TemplateCache(bytecode_cache_dir=str(tmpdir))